@@ -9,9 +9,11 @@ from . import airport
 from . import aircraft
 from . import flight
 from . import seat
+from . import seat_inventory
 from . import booking
 from . import ticket
 from . import payment
+from . import idempotency_key
 
 __all__ = [
     "user",
@@ -20,7 +22,9 @@ __all__ = [
     "aircraft",
     "flight",
     "seat",
+    "seat_inventory",
     "booking",
     "ticket",
     "payment",
+    "idempotency_key",
 ]
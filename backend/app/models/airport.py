@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Float, Integer, String
 from sqlalchemy.orm import relationship
 from app.config import Base
 
@@ -11,6 +11,9 @@ class Airport(Base):
     name = Column(String(200), nullable=False)
     city = Column(String(100), index=True)  # Index for city searches
     country = Column(String(100))
+    # WGS84 degrees; nearby-airport search skips airports without them
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
 
     departures = relationship("Flight", back_populates="departure_airport", foreign_keys='Flight.departure_airport_id')
     arrivals = relationship("Flight", back_populates="arrival_airport", foreign_keys='Flight.arrival_airport_id')
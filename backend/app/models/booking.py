@@ -15,6 +15,8 @@ class Booking(Base):
     # Provisional booking reference used to perform payments before ticket issuance
     booking_reference = Column(String(40), unique=True, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Seats of an unpaid booking are held until then; the hold reaper cancels it afterwards
+    expires_at = Column(DateTime, nullable=True, index=True)
 
     status = Column(Enum("Payment Pending", "Pending", "Confirmed", "Cancelled", name="booking_status"), default="Payment Pending")
 
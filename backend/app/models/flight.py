@@ -16,6 +16,16 @@ class Flight(Base):
         Index('ix_flights_departure_time', 'departure_time'),
         Index('ix_flights_route_date', 'departure_airport_id', 'arrival_airport_id', 'departure_time'),
         Index('ix_flights_base_price', 'base_price'),
+        # search sorts and filters on the materialized fares, usually per route
+        Index('ix_flights_price_economy', 'price_economy'),
+        Index('ix_flights_route_price_economy', 'departure_airport_id', 'arrival_airport_id', 'price_economy'),
+        Index('ix_flights_route_price_business', 'departure_airport_id', 'arrival_airport_id', 'price_business'),
+        Index('ix_flights_route_price_first', 'departure_airport_id', 'arrival_airport_id', 'price_first'),
+        # duration sort and max-duration filters
+        Index('ix_flights_duration_minutes', 'duration_minutes'),
+        Index('ix_flights_route_duration', 'departure_airport_id', 'arrival_airport_id', 'duration_minutes'),
+        # airline facet filter within a route and date window
+        Index('ix_flights_route_airline_date', 'departure_airport_id', 'arrival_airport_id', 'airline_id', 'departure_time'),
     )
 
     id = Column(Integer, primary_key=True)
@@ -30,11 +40,19 @@ class Flight(Base):
     departure_time = Column(DateTime, nullable=False)
     arrival_time = Column(DateTime, nullable=False)
 
+    # Block time in whole minutes; set whenever departure/arrival times change
+    duration_minutes = Column(Integer, nullable=True)
+
     base_price = Column(Float, nullable=False)
 
     # Demand level: affects dynamic pricing. Values: low, medium, high, extreme
     demand_level = Column(String(20), nullable=False, default="medium")
 
+    # Current dynamic fare per tier, kept up to date by app.services.fare_service
+    price_economy = Column(Float, nullable=True)
+    price_business = Column(Float, nullable=True)
+    price_first = Column(Float, nullable=True)
+
     # Flight status: Scheduled, Boarding, Delayed, Departed, Landed, Cancelled
     status = Column(
         Enum("Scheduled", "Boarding", "Delayed", "Departed", "Landed", "Cancelled", name="flight_status"),
@@ -59,4 +77,15 @@ class Flight(Base):
     arrival_airport = relationship("Airport", foreign_keys=[arrival_airport_id], back_populates="arrivals")
 
     seats = relationship("Seat", back_populates="flight", cascade="all, delete-orphan")
+    inventory = relationship("FlightSeatInventory", back_populates="flight", cascade="all, delete-orphan")
     tickets = relationship("Ticket", back_populates="flight")
+
+    @staticmethod
+    def compute_duration_minutes(departure_time: datetime | None, arrival_time: datetime | None) -> int | None:
+        """Whole minutes between departure and arrival, as stored in `duration_minutes`."""
+        if departure_time is None or arrival_time is None:
+            return None
+        return round((arrival_time - departure_time).total_seconds() / 60)
+
+    def refresh_duration(self) -> None:
+        self.duration_minutes = self.compute_duration_minutes(self.departure_time, self.arrival_time)
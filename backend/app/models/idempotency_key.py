@@ -0,0 +1,19 @@
+from sqlalchemy import Column, DateTime, Integer, LargeBinary, String
+from app.config import Base
+
+
+class IdempotencyKey(Base):
+    """First response to a POST sent with an `Idempotency-Key` header.
+
+    One row per key, kept until `expires_at`: fixed-width digests of the key
+    and of the request, plus the response status and JSON body as sent.
+    A row without `status_code` is a request still in progress.
+    """
+    __tablename__ = "idempotency_keys"
+
+    key_hash = Column(String(64), primary_key=True)  # sha256 of scope + caller + header value
+    request_hash = Column(String(64), nullable=False)  # sha256 of caller + request body
+    status_code = Column(Integer, nullable=True)
+    response_body = Column(LargeBinary, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
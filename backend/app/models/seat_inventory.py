@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy.orm import relationship
+from app.config import Base
+
+
+class FlightSeatInventory(Base):
+    """Denormalized seat counters per flight and seat class.
+
+    Kept in step with `seats` by every path that allocates or releases seats
+    (in the same transaction), so read paths don't have to COUNT the seats
+    table. `scripts/rebuild_seat_inventory.py` rebuilds it from `seats`.
+    """
+    __tablename__ = "flight_seat_inventory"
+
+    flight_id = Column(Integer, ForeignKey("flights.id", ondelete="CASCADE"), primary_key=True)
+    seat_class = Column(String(30), primary_key=True)  # same values as Seat.seat_class
+    total_seats = Column(Integer, nullable=False, default=0)
+    available_seats = Column(Integer, nullable=False, default=0)
+
+    flight = relationship("Flight", back_populates="inventory")
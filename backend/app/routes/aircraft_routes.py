@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Body
 from sqlalchemy.orm import Session
 from app.config import get_db
+from app.services.reference_data import reference_data
 from app.models.aircraft import Aircraft
 from app.models.aircraft_seat_template import AircraftSeatTemplate
 from typing import List
@@ -26,6 +27,7 @@ def create_aircraft(payload: AircraftCreate, db: Session = Depends(get_db)):
     )
     db.add(ac)
     db.commit()
+    reference_data.invalidate()
     db.refresh(ac)
 
     # Create aircraft seat templates so flights can be auto-seated from the template.
@@ -87,6 +89,7 @@ def update_aircraft(aircraft_id: int, payload: AircraftCreate, db: Session = Dep
     ac.business_count = payload.business_count or 0
     ac.first_count = payload.first_count or 0
     db.commit()
+    reference_data.invalidate()
     db.refresh(ac)
     return ac
 
@@ -110,6 +113,7 @@ def patch_aircraft(aircraft_id: int, payload: AircraftUpdate = Body(...), db: Se
     if "first_count" in data:
         ac.first_count = data["first_count"]
     db.commit()
+    reference_data.invalidate()
     db.refresh(ac)
     return ac
 
@@ -121,4 +125,5 @@ def delete_aircraft(aircraft_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="aircraft not found")
     db.delete(ac)
     db.commit()
+    reference_data.invalidate()
     return {"message": "aircraft deleted"}
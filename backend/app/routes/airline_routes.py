@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Body
 from sqlalchemy.orm import Session
 from app.config import get_db
+from app.services.reference_data import reference_data
 from typing import List
 from app.schemas.airline_schema import AirlineCreate, AirlineUpdate, AirlineResponse
 from app.models.airline import Airline
@@ -22,6 +23,7 @@ def create_airline(
     al = Airline(name=payload.name, code=payload.code.upper())
     db.add(al)
     db.commit()
+    reference_data.invalidate()
     db.refresh(al)
     return al
 
@@ -52,6 +54,7 @@ def update_airline(
     al.name = payload.name
     al.code = payload.code.upper()
     db.commit()
+    reference_data.invalidate()
     db.refresh(al)
     return al
 
@@ -72,6 +75,7 @@ def patch_airline(
     if "code" in data and data.get("code"):
         al.code = data["code"].upper()
     db.commit()
+    reference_data.invalidate()
     db.refresh(al)
     return al
 
@@ -87,6 +91,7 @@ def delete_airline(
         raise HTTPException(status_code=404, detail="airline not found")
     db.delete(al)
     db.commit()
+    reference_data.invalidate()
     return {"message": "airline deleted"}
 
 
@@ -103,10 +108,9 @@ def get_external_airline_schedules(
     external airline APIs (e.g., simplified JSON with selected fields).
     """
     from app.models.flight import Flight
-    from app.models.airport import Airport
     from datetime import datetime, timezone
     
-    airline = db.query(Airline).filter(Airline.code == airline_code.upper()).first()
+    airline = reference_data.airline(db, airline_code)
     if not airline:
         raise HTTPException(status_code=404, detail=f"airline '{airline_code}' not found")
     
@@ -118,12 +122,12 @@ def get_external_airline_schedules(
     
     # Apply optional filters
     if origin:
-        origin_airport = db.query(Airport).filter(Airport.code == origin.upper()).first()
+        origin_airport = reference_data.airport(db, origin)
         if origin_airport:
             query = query.filter(Flight.departure_airport_id == origin_airport.id)
     
     if destination:
-        dest_airport = db.query(Airport).filter(Airport.code == destination.upper()).first()
+        dest_airport = reference_data.airport(db, destination)
         if dest_airport:
             query = query.filter(Flight.arrival_airport_id == dest_airport.id)
     
@@ -132,8 +136,8 @@ def get_external_airline_schedules(
     # Simulate external API response format (simplified)
     results = []
     for flight in flights:
-        dep_airport = db.query(Airport).filter(Airport.id == flight.departure_airport_id).first()
-        arr_airport = db.query(Airport).filter(Airport.id == flight.arrival_airport_id).first()
+        dep_airport = reference_data.airport_by_id(db, flight.departure_airport_id)
+        arr_airport = reference_data.airport_by_id(db, flight.arrival_airport_id)
         
         results.append({
             "flight_number": flight.flight_number,
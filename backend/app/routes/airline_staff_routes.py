@@ -18,11 +18,11 @@ from app.config import get_db
 from app.models.flight import Flight
 from app.models.ticket import Ticket
 from app.models.booking import Booking
-from app.models.seat import Seat
 from app.models.airline import Airline
 from app.models.airport import Airport
 from app.models.user import User
 from app.auth.dependencies import get_current_user
+from app.services.inventory_service import get_flight_inventory, get_inventory_map
 
 router = APIRouter()
 
@@ -205,15 +205,15 @@ def get_airline_flights(
     
     flights = query.order_by(Flight.departure_time.asc()).limit(100).all()
     
+    inventory = get_inventory_map(db, [f.id for f in flights])
+    
     result = []
     for flight in flights:
         dep_airport = db.query(Airport).filter(Airport.id == flight.departure_airport_id).first()
         arr_airport = db.query(Airport).filter(Airport.id == flight.arrival_airport_id).first()
         
-        total = db.query(func.count(Seat.id)).filter(Seat.flight_id == flight.id).scalar() or 0
-        available = db.query(func.count(Seat.id)).filter(
-            Seat.flight_id == flight.id, Seat.is_available == True
-        ).scalar() or 0
+        total = inventory[flight.id]["total"]
+        available = inventory[flight.id]["available"]
         
         result.append(AirlineFlightInfo(
             id=flight.id,
@@ -315,7 +315,7 @@ def get_passenger_manifest(
             booking_status=booking.status if booking else "Unknown",
         ))
     
-    total = db.query(func.count(Seat.id)).filter(Seat.flight_id == flight.id).scalar() or 0
+    total = get_flight_inventory(db, flight.id)["total"]
     
     return FlightManifest(
         flight_id=flight.id,
@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Body
 from sqlalchemy.orm import Session
 from app.config import get_db
+from app.services.reference_data import reference_data
+from app.services.airport_index import airport_index
 from app.models.airport import Airport
 from app.models.user import User
 from typing import List
-from app.schemas.airport_schema import AirportCreate, AirportUpdate, AirportResponse
+from app.schemas.airport_schema import AirportCreate, AirportUpdate, AirportResponse, NearbyAirport
 from app.auth.dependencies import require_admin
 
 router = APIRouter()
@@ -19,10 +21,13 @@ def create_airport(
     existing = db.query(Airport).filter(Airport.code == payload.code.upper()).first()
     if existing:
         raise HTTPException(status_code=400, detail="airport code already exists")
-    ap = Airport(code=payload.code.upper(), name=payload.name, city=payload.city, country=payload.country)
+    ap = Airport(code=payload.code.upper(), name=payload.name, city=payload.city, country=payload.country,
+                 latitude=payload.latitude, longitude=payload.longitude)
     db.add(ap)
     db.commit()
+    reference_data.invalidate()
     db.refresh(ap)
+    airport_index.upsert_airport(ap)
     return ap
 
 
@@ -31,6 +36,37 @@ def list_airports(db: Session = Depends(get_db)):
     return db.query(Airport).all()
 
 
+@router.get("/autocomplete", response_model=List[AirportResponse])
+def autocomplete_airports(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db)
+):
+    """Airports whose code, city or name (or a word of them) starts with `q`.
+
+    Exact code matches rank first, then code, city and name prefixes.
+    """
+    airport_index.ensure_fresh(db)
+    return [airport._asdict() for airport in airport_index.search(q, limit)]
+
+
+@router.get("/nearby", response_model=List[NearbyAirport])
+def nearby_airports(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(150, gt=0, le=2000),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """Airports within `radius_km` of a point, nearest first. Airports
+    without coordinates are never returned."""
+    airport_index.ensure_fresh(db)
+    return [
+        {**airport._asdict(), "distance_km": round(distance, 1)}
+        for airport, distance in airport_index.nearby(lat, lon, radius_km, limit)
+    ]
+
+
 @router.get("/{airport_id}", response_model=AirportResponse)
 def get_airport(airport_id: int, db: Session = Depends(get_db)):
     ap = db.query(Airport).filter(Airport.id == airport_id).first()
@@ -53,8 +89,12 @@ def update_airport(
     ap.name = payload.name
     ap.city = payload.city
     ap.country = payload.country
+    ap.latitude = payload.latitude
+    ap.longitude = payload.longitude
     db.commit()
+    reference_data.invalidate()
     db.refresh(ap)
+    airport_index.upsert_airport(ap)
     return ap
 
 
@@ -77,8 +117,14 @@ def patch_airport(
         ap.city = data["city"]
     if "country" in data:
         ap.country = data["country"]
+    if "latitude" in data:
+        ap.latitude = data["latitude"]
+    if "longitude" in data:
+        ap.longitude = data["longitude"]
     db.commit()
+    reference_data.invalidate()
     db.refresh(ap)
+    airport_index.upsert_airport(ap)
     return ap
 
 
@@ -93,4 +139,6 @@ def delete_airport(
         raise HTTPException(status_code=404, detail="airport not found")
     db.delete(ap)
     db.commit()
+    reference_data.invalidate()
+    airport_index.remove_airport(airport_id)
     return {"message": "airport deleted"}
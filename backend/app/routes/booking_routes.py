@@ -1,17 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Request, Header
+from sqlalchemy.orm import Session, selectinload
 from app.config import get_db
-from app.schemas.booking_schema import BookingCreate, BookingResponse, TicketInfoSimplified
-from app.services.flight_service import create_booking, get_booking_by_pnr, cancel_booking
+from app.schemas.booking_schema import BookingCreate, BookingResponse, BulkBookingCreate, BulkBookingResponse
+from app.services.flight_service import create_booking, create_bookings_bulk, get_booking_by_pnr, cancel_booking
 from app.services.email_service import send_cancellation_email
+from app.services.booking_results import BulkBookingItemResult, booking_result, latest_successful_payment
+from app.services.idempotency import run_idempotent
+from app.services.inventory_service import SeatContention
 from app.models.flight import Flight
 from app.models.user import User
 from app.models.booking import Booking
 from app.schemas.booking_schema import BookingUpdate
 from app.auth.dependencies import get_current_user, require_admin
+from app.utils.streaming import STREAM_BATCH_SIZE, ndjson_response, wants_ndjson
 from fastapi import Body
-from datetime import datetime
+from fastapi.responses import ORJSONResponse
+from datetime import datetime, timedelta
 from pydantic import BaseModel
+from sqlalchemy import and_, or_
 from typing import List, Optional
 
 router = APIRouter()
@@ -88,69 +94,27 @@ def check_pnr_status(pnr: str, db: Session = Depends(get_db)):
 # ============== Existing Code ==============
 
 
-def _format_flight_seat(seat_class: str, seat_number: str) -> str:
-    """Format flight seat as 'SEAT_CLASS - SEAT_NUMBER' (e.g., 'EC - 32')."""
-    # Abbreviate seat class - handle both API tier names and DB names
-    seat_class_abbr = {
-        # API tier names (uppercase)
-        "ECONOMY": "EC",
-        "ECONOMY_FLEX": "ECF",
-        "BUSINESS": "BUS",
-        "FIRST": "FC",
-        # Database names (title case)
-        "Economy": "EC",
-        "Premium Economy": "ECF",
-        "Business": "BUS",
-        "First": "FC",
-    }.get(seat_class, seat_class[:2].upper() if seat_class else "EC")
-    
-    return f"{seat_class_abbr} - {seat_number}"
-
-
-def _ticket_to_simplified(ticket) -> TicketInfoSimplified:
-    """Convert Ticket model to simplified response format."""
-    return TicketInfoSimplified(
-        flight_seat=_format_flight_seat(ticket.seat_class or "ECONOMY", ticket.seat_number or ""),
-        passenger_name=ticket.passenger_name,
-        passenger_age=ticket.passenger_age,
-        passenger_gender=ticket.passenger_gender,
-        airline_name=ticket.airline_name,
-        flight_number=ticket.flight_number,
-        route=ticket.route,
-        departure_airport=ticket.departure_airport,
-        arrival_airport=ticket.arrival_airport,
-        departure_city=ticket.departure_city,
-        arrival_city=ticket.arrival_city,
-        departure_time=ticket.departure_time,
-        arrival_time=ticket.arrival_time,
-        seat_number=ticket.seat_number or "",
-        seat_class=ticket.seat_class or "ECONOMY",
-        payment_required=ticket.payment_required,
-        currency=ticket.currency,
-        ticket_number=ticket.ticket_number,
-        issued_at=ticket.issued_at,
-    )
-
-
 @router.post("/", response_model=BookingResponse, status_code=status.HTTP_201_CREATED)
 def create_booking_api(
     payload: BookingCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
 ):
-    """Create a new booking. Requires authentication."""
-    # transform payload passengers to expected dict format
-    passengers = []
-    for p in payload.passengers:
-        pname = p.passenger_name or ""
-        entry = {
-            "passenger_name": pname,
-            "age": p.age,
-            "gender": p.gender,
-            "seat_id": p.seat_id,  # Include seat_id if provided per passenger
-        }
-        passengers.append(entry)
-    
+    """
+    Create a new booking. Requires authentication.
+
+    Send an `Idempotency-Key` header to make retries safe: repeating the
+    request with the same key returns the first response instead of booking
+    again.
+    """
+    return run_idempotent(db, "booking", idempotency_key, current_user.id, payload.model_dump_json().encode(),
+                          lambda: _create_booking(payload, current_user, db))
+
+
+def _create_booking(payload: BookingCreate, current_user: User, db: Session) -> ORJSONResponse:
+    passengers, selected_seat_ids = _passengers_and_seats(payload)
+
     # Use the authenticated user's ID
     user_id = current_user.id
     
@@ -171,14 +135,6 @@ def create_booking_api(
     if not flight:
         raise HTTPException(status_code=400, detail=f"flight '{payload.flight_number}' not found on {payload.departure_date}")
 
-    # Get selected seat IDs from payload (either from selected_seat_ids list or individual passenger seat_id)
-    selected_seat_ids = payload.selected_seat_ids
-    if not selected_seat_ids:
-        # Try to extract from individual passengers
-        seat_ids_from_passengers = [p.get("seat_id") for p in passengers if p.get("seat_id")]
-        if len(seat_ids_from_passengers) == len(passengers):
-            selected_seat_ids = seat_ids_from_passengers
-
     try:
         result = create_booking(
             db,
@@ -191,92 +147,136 @@ def create_booking_api(
         )
         booking = result["booking"]
         total_fare = result["total_fare"]
+    except SeatContention as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc))
 
-    tickets = [_ticket_to_simplified(t) for t in booking.tickets]
-
-    return BookingResponse(
-        pnr=booking.pnr,
-        booking_reference=booking.booking_reference,
-        status=booking.status,
-        created_at=booking.created_at,
-        total_fare=total_fare,
-        tickets=tickets,
-        transaction_id=None,
-        paid_amount=0.0,
+    return ORJSONResponse(
+        booking_result(booking, total_fare=total_fare, paid_amount=0.0),
+        status_code=status.HTTP_201_CREATED,
     )
 
 
+def _passengers_and_seats(payload: BookingCreate) -> tuple[list[dict], list[int] | None]:
+    """Passenger dicts for the booking service, and the seats picked for them if any."""
+    # transform payload passengers to expected dict format
+    passengers = []
+    for p in payload.passengers:
+        pname = p.passenger_name or ""
+        entry = {
+            "passenger_name": pname,
+            "age": p.age,
+            "gender": p.gender,
+            "seat_id": p.seat_id,  # Include seat_id if provided per passenger
+        }
+        passengers.append(entry)
+
+    # Get selected seat IDs from payload (either from selected_seat_ids list or individual passenger seat_id)
+    selected_seat_ids = payload.selected_seat_ids
+    if not selected_seat_ids:
+        # Try to extract from individual passengers
+        seat_ids_from_passengers = [p.get("seat_id") for p in passengers if p.get("seat_id")]
+        if len(seat_ids_from_passengers) == len(passengers):
+            selected_seat_ids = seat_ids_from_passengers
+    return passengers, selected_seat_ids
+
+
+@router.post("/bulk", response_model=BulkBookingResponse)
+def create_bookings_bulk_api(
+    payload: BulkBookingCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Create several bookings in one request (agency/group bookings). Requires authentication.
+
+    Bookings are grouped by flight, and each flight's group is allocated and
+    written in one transaction. Every booking succeeds or fails on its own;
+    `results` reports each one by its position in `bookings`.
+    """
+    days: dict[int, datetime] = {}
+    items: list[BulkBookingItemResult] = []
+    for i, item in enumerate(payload.bookings):
+        try:
+            days[i] = datetime.strptime(item.departure_date, "%Y-%m-%d")
+        except ValueError:
+            items.append(BulkBookingItemResult(i, error="Invalid departure_date format. Use YYYY-MM-DD"))
+
+    # one query resolves every (flight_number, departure_date) pair
+    wanted = {(payload.bookings[i].flight_number, day) for i, day in days.items()}
+    flights = {}
+    if wanted:
+        rows = db.query(Flight.id, Flight.flight_number, Flight.departure_time).filter(or_(*(
+            and_(Flight.flight_number == number, Flight.departure_time >= day,
+                 Flight.departure_time < day + timedelta(days=1))
+            for number, day in wanted
+        ))).order_by(Flight.id).all()
+        for row in rows:
+            day = datetime.combine(row.departure_time.date(), datetime.min.time())
+            flights.setdefault((row.flight_number, day), row.id)
+
+    requests, positions = [], []
+    for i, day in days.items():
+        item = payload.bookings[i]
+        flight_id = flights.get((item.flight_number, day))
+        if flight_id is None:
+            items.append(BulkBookingItemResult(
+                i, error=f"flight '{item.flight_number}' not found on {item.departure_date}"))
+            continue
+        passengers, selected_seat_ids = _passengers_and_seats(item)
+        requests.append({
+            "flight_id": flight_id,
+            "departure_date": item.departure_date,
+            "passengers": passengers,
+            "seat_class": item.seat_class,
+            "selected_seat_ids": selected_seat_ids,
+        })
+        positions.append(i)
+
+    for i, outcome in zip(positions, create_bookings_bulk(db, current_user.id, requests)):
+        if outcome["booking"] is None:
+            items.append(BulkBookingItemResult(i, error=outcome["error"]))
+        else:
+            items.append(BulkBookingItemResult(i, booking_result(
+                outcome["booking"], total_fare=outcome["total_fare"], paid_amount=0.0)))
+
+    items.sort(key=lambda item: item.index)
+    created = sum(1 for item in items if item.booking is not None)
+    return ORJSONResponse({"created": created, "failed": len(items) - created, "results": items})
+
+
+def _bookings_query(db: Session, status: str | None = None):
+    """Newest bookings first, with tickets and payments loaded in batches."""
+    query = db.query(Booking).options(selectinload(Booking.tickets), selectinload(Booking.payments))
+    if status:
+        query = query.filter(Booking.status == status)
+    return query.order_by(Booking.created_at.desc())
+
+
+def _bookings_response(request: Request, db: Session, status: str | None = None):
+    if wants_ndjson(request):
+        return ndjson_response(lambda session: (
+            booking_result(b, latest_successful_payment(b))
+            for b in _bookings_query(session, status).yield_per(STREAM_BATCH_SIZE)
+        ))
+    return ORJSONResponse([booking_result(b, latest_successful_payment(b)) for b in _bookings_query(db, status)])
+
+
 @router.get("/", response_model=list[BookingResponse])
 def list_all_bookings_api(
+    request: Request,
     admin_user: User = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
-    """List all bookings (admin only)."""
-    from app.models.booking import Booking
-    
-    bookings = db.query(Booking).order_by(Booking.created_at.desc()).all()
-    
-    results = []
-    for booking in bookings:
-        # Compute total_fare from tickets
-        total_fare = sum(t.payment_required for t in booking.tickets) if booking.tickets else 0.0
-        
-        # Convert tickets to simplified format
-        tickets = [_ticket_to_simplified(t) for t in booking.tickets]
-        
-        # Get the most recent successful payment
-        successful_payment = None
-        if booking.payments:
-            successful_payment = next((p for p in sorted(booking.payments, key=lambda x: x.paid_at, reverse=True) if p.status == "Success"), None)
-        
-        results.append(BookingResponse(
-            pnr=booking.pnr,
-            booking_reference=booking.booking_reference,
-            status=booking.status,
-            created_at=booking.created_at,
-            total_fare=total_fare,
-            tickets=tickets,
-            transaction_id=successful_payment.transaction_id if successful_payment else None,
-            paid_amount=successful_payment.amount if successful_payment else None,
-        ))
-    
-    return results
+    """List all bookings (admin only). Streams NDJSON for `Accept: application/x-ndjson`."""
+    return _bookings_response(request, db)
 
 
 @router.get("/successful", response_model=list[BookingResponse])
-def list_successful_bookings_api(db: Session = Depends(get_db)):
-    """Retrieve all successful (Confirmed) bookings."""
-    from app.models.booking import Booking
-    
-    bookings = db.query(Booking).filter(Booking.status == "Confirmed").order_by(Booking.created_at.desc()).all()
-    
-    results = []
-    for booking in bookings:
-        # Compute total_fare from tickets
-        total_fare = sum(t.payment_required for t in booking.tickets) if booking.tickets else 0.0
-        
-        # Convert tickets to simplified format
-        tickets = [_ticket_to_simplified(t) for t in booking.tickets]
-        
-        # Get the most recent successful payment
-        successful_payment = None
-        if booking.payments:
-            successful_payment = next((p for p in sorted(booking.payments, key=lambda x: x.paid_at, reverse=True) if p.status == "Success"), None)
-        
-        results.append(BookingResponse(
-            pnr=booking.pnr,
-            booking_reference=booking.booking_reference,
-            status=booking.status,
-            created_at=booking.created_at,
-            total_fare=total_fare,
-            tickets=tickets,
-            transaction_id=successful_payment.transaction_id if successful_payment else None,
-            paid_amount=successful_payment.amount if successful_payment else None,
-        ))
-    
-    return results
+def list_successful_bookings_api(request: Request, db: Session = Depends(get_db)):
+    """Retrieve all successful (Confirmed) bookings. Streams NDJSON for `Accept: application/x-ndjson`."""
+    return _bookings_response(request, db, status="Confirmed")
 
 
 @router.get("/{pnr}", response_model=BookingResponse)
@@ -285,27 +285,7 @@ def get_booking_api(pnr: str, db: Session = Depends(get_db)):
     if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
 
-    # Compute total_fare from tickets
-    total_fare = sum(t.payment_required for t in booking.tickets) if booking.tickets else 0.0
-
-    # Convert tickets to simplified format
-    tickets = [_ticket_to_simplified(t) for t in booking.tickets]
-
-    # Get the most recent successful payment
-    successful_payment = None
-    if booking.payments:
-        successful_payment = next((p for p in sorted(booking.payments, key=lambda x: x.paid_at, reverse=True) if p.status == "Success"), None)
-
-    return BookingResponse(
-        pnr=booking.pnr,
-        booking_reference=booking.booking_reference,
-        status=booking.status,
-        created_at=booking.created_at,
-        total_fare=total_fare,
-        tickets=tickets,
-        transaction_id=successful_payment.transaction_id if successful_payment else None,
-        paid_amount=successful_payment.amount if successful_payment else None,
-    )
+    return ORJSONResponse(booking_result(booking, latest_successful_payment(booking)))
 
 
 @router.delete("/{pnr}")
@@ -339,7 +319,10 @@ def cancel_booking_api(
     ]
     
     # Cancel the booking
-    booking = cancel_booking(db, pnr)
+    try:
+        booking = cancel_booking(db, pnr)
+    except SeatContention as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
     
     # Send cancellation email in background
     cancellation_data = {
@@ -371,19 +354,7 @@ def patch_booking_api(
     db.commit()
     db.refresh(booking)
 
-    total_fare = sum(t.payment_required for t in booking.tickets) if booking.tickets else 0.0
-    tickets = [_ticket_to_simplified(t) for t in booking.tickets]
-
-    return BookingResponse(
-        pnr=booking.pnr,
-        booking_reference=booking.booking_reference,
-        status=booking.status,
-        created_at=booking.created_at,
-        total_fare=total_fare,
-        tickets=tickets,
-        transaction_id=None,
-        paid_amount=None,
-    )
+    return ORJSONResponse(booking_result(booking))
 
 
 @router.get("/{pnr}/receipt/pdf")
@@ -1,22 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.orm import Session
 from datetime import datetime
 from sqlalchemy import func, case
-from app.models.airport import Airport
-from app.models.airline import Airline
-from app.models.seat import Seat
-from app.models.aircraft import Aircraft
+from app.models.seat_inventory import FlightSeatInventory
 from app.config import get_db
 from app.schemas.flight_schema import FlightResponse
-from app.services.flight_service import search_flights
+from app.services.flight_service import search_flights, next_search_cursor, search_connections, get_fare_calendar
+from app.services.flight_service import stream_search_flights, search_facets, search_flights_batch
+from app.services.connection_index import connection_index
+from app.services.flight_locks import flight_locks
+from app.services.reference_data import reference_data
 from app.services.flight_service import create_flight
-from app.services.pricing_engine import compute_dynamic_price
-from app.schemas.flight_schema import FlightCreate, FlightResponse
+from app.services.inventory_service import get_flight_inventory
+from app.services.fare_service import current_prices, refresh_current_prices
+from app.schemas.flight_schema import FlightCreate
 from fastapi import Body, Path
 from app.models.flight import Flight
 from app.services.flight_service import get_booking_by_pnr
 from app.services.flight_service import cancel_booking
-from app.schemas.flight_schema import FlightUpdate
+from app.services.flight_service import invalidate_flight_cache, invalidate_route_cache, get_search_cache_stats
+from app.schemas.flight_schema import FlightUpdate, ItineraryResponse, FareCalendarDay, SearchFacets
+from app.schemas.flight_schema import BatchSearchRequest, BatchSearchResult, TripItinerary, TripSearchRequest
+from app.services.trip_service import search_trip
+from app.utils.streaming import STREAM_BATCH_SIZE, ndjson_response, wants_ndjson
 
 router = APIRouter()
 
@@ -36,10 +43,10 @@ def get_flight_stats(db: Session = Depends(get_db)):
         func.sum(case((Flight.departure_time >= now, 1), else_=0)).label('upcoming')
     ).first()
     
-    # Combined query for seat stats
+    # Seat totals from the inventory counters
     seat_stats = db.query(
-        func.count(Seat.id).label('total'),
-        func.sum(case((Seat.is_available == True, 1), else_=0)).label('available')
+        func.sum(FlightSeatInventory.total_seats).label('total'),
+        func.sum(FlightSeatInventory.available_seats).label('available')
     ).first()
     
     total_flights = stats.total or 0
@@ -56,29 +63,79 @@ def get_flight_stats(db: Session = Depends(get_db)):
     }
 
 
+@router.get("/cache/stats")
+def get_search_cache_stats_api():
+    """Hit/miss/eviction counters and occupancy of the flight search cache."""
+    return get_search_cache_stats()
+
+
+@router.get("/locks/stats")
+def get_flight_lock_stats_api():
+    """Acquisition, contention and wait-time counters of the per-flight application locks."""
+    return flight_locks.stats()
+
+
 @router.get("/", response_model=list[FlightResponse])
 def list_flights_api(
+    request: Request,
     limit: int | None = Query(50, ge=1, le=100),  # Reduced default for performance
+    cursor: str | None = Query(None, max_length=512),
     db: Session = Depends(get_db)
 ):
-    """Return all flights (optionally limited). Default limit is 50 for performance."""
-    flights = search_flights(db, limit=limit)
-    return flights
+    """Return all flights by departure time (optionally limited). Default limit is 50 for performance.
+
+    When more flights follow, the `X-Next-Cursor` header holds the `cursor`
+    for the next page. With `Accept: application/x-ndjson` every flight is
+    streamed, one per line (capped only by an explicit `limit`).
+    """
+    try:
+        if wants_ndjson(request):
+            return ndjson_response(lambda session: stream_search_flights(
+                session, limit=_explicit_limit(request, limit), cursor=cursor, batch_size=STREAM_BATCH_SIZE,
+            ))
+        flights = search_flights(db, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _search_response(flights, None, limit)
 
 
 @router.get("/search", response_model=list[FlightResponse])
 def search_flights_api(
+    request: Request,
     origin: str | None = Query(None, min_length=3, max_length=10),
     destination: str | None = Query(None, min_length=3, max_length=10),
     date: str | None = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$"),
-    sort_by: str | None = Query(None, pattern="^(price|duration)$"),
+    sort_by: str | None = Query(None, pattern="^(price|duration|best)$"),
     limit: int | None = Query(30, ge=1, le=100),  # Reduced for performance
     days_flex: int | None = Query(0, ge=0, le=7),  # Reduced max flex
     tier: str | None = Query("ECONOMY", pattern="^(ECONOMY|BUSINESS|FIRST|all|ALL)$"),
     page: int | None = Query(None, ge=1),
     page_size: int | None = Query(None, ge=1, le=50),  # Reduced max page size
+    cursor: str | None = Query(None, max_length=512),
+    min_price: float | None = Query(None, ge=0),
+    max_price: float | None = Query(None, ge=0),
+    max_duration: int | None = Query(None, ge=1, description="minutes"),
+    airline: list[str] | None = Query(None, description="airline code; repeat for any of several"),
+    time_of_day: list[str] | None = Query(None, description="early_morning, morning, afternoon or evening; repeatable"),
+    available_class: list[str] | None = Query(None, description="ECONOMY, BUSINESS or FIRST with seats left; repeatable"),
+    prefer_time: str | None = Query(None, pattern="^(early_morning|morning|afternoon|evening)$",
+                                    description="preferred departure time of day for sort_by=best"),
+    origin_radius_km: float | None = Query(None, gt=0, le=500, description="also depart from airports this close to origin"),
+    destination_radius_km: float | None = Query(None, gt=0, le=500, description="also arrive at airports this close to destination"),
     db: Session = Depends(get_db)
 ):
+    """Search flights. Pages with `page`/`page_size`, or with `cursor`: pass the
+    `X-Next-Cursor` header of the previous response (same filters and sort).
+    `sort_by=price`, `min_price` and `max_price` use the current fare in `tier`.
+    `airline`, `time_of_day` and `available_class` match any of their values;
+    `/flights/search/facets` counts the flights behind each value.
+    `sort_by=best` ranks on fare, duration and closeness to `prefer_time`;
+    it pages with `page`/`page_size` only. `origin_radius_km` and
+    `destination_radius_km` widen the route to nearby airports.
+
+    With `Accept: application/x-ndjson` every match is streamed in sort
+    order, one per line, starting after `cursor` if given; `page`/`page_size`
+    are ignored and only an explicit `limit` caps it."""
     # Normalize codes
     if origin:
         origin = origin.upper()
@@ -91,39 +148,214 @@ def search_flights_api(
             datetime.strptime(date, "%Y-%m-%d")
         except ValueError:
             raise HTTPException(status_code=400, detail="date must be YYYY-MM-DD")
+    facets = _facet_filters(airline, time_of_day, available_class)
+
+    try:
+        if wants_ndjson(request):
+            return ndjson_response(lambda session: stream_search_flights(
+                session, origin=origin, destination=destination, date=date, sort_by=sort_by,
+                limit=_explicit_limit(request, limit), days_flex=days_flex or 0, tier=(tier or "ECONOMY"),
+                cursor=cursor, min_price=min_price, max_price=max_price, max_duration=max_duration,
+                prefer_time=prefer_time, origin_radius_km=origin_radius_km,
+                destination_radius_km=destination_radius_km, batch_size=STREAM_BATCH_SIZE, **facets,
+            ))
+        # FIXED: store_history=False to prevent DB writes on every search
+        flights = search_flights(
+            db, origin=origin, destination=destination, date=date, 
+            sort_by=sort_by, limit=limit, days_flex=days_flex or 0, 
+            tier=(tier or "ECONOMY"), store_history=False, 
+            page=page, page_size=page_size, cursor=cursor,
+            min_price=min_price, max_price=max_price, max_duration=max_duration,
+            prefer_time=prefer_time, origin_radius_km=origin_radius_km,
+            destination_radius_km=destination_radius_km, **facets,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return _search_response(flights, sort_by, page_size if (page_size and (page or cursor)) else limit)
+
 
-    # FIXED: store_history=False to prevent DB writes on every search
-    flights = search_flights(
-        db, origin=origin, destination=destination, date=date, 
-        sort_by=sort_by, limit=limit, days_flex=days_flex or 0, 
-        tier=(tier or "ECONOMY"), store_history=False, 
-        page=page, page_size=page_size
+@router.get("/search/facets", response_model=SearchFacets)
+def search_facets_api(
+    origin: str | None = Query(None, min_length=3, max_length=10),
+    destination: str | None = Query(None, min_length=3, max_length=10),
+    date: str | None = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    days_flex: int | None = Query(0, ge=0, le=7),
+    tier: str | None = Query("ECONOMY", pattern="^(ECONOMY|BUSINESS|FIRST|all|ALL)$"),
+    min_price: float | None = Query(None, ge=0),
+    max_price: float | None = Query(None, ge=0),
+    max_duration: int | None = Query(None, ge=1, description="minutes"),
+    airline: list[str] | None = Query(None),
+    time_of_day: list[str] | None = Query(None),
+    available_class: list[str] | None = Query(None),
+    origin_radius_km: float | None = Query(None, gt=0, le=500),
+    destination_radius_km: float | None = Query(None, gt=0, le=500),
+    db: Session = Depends(get_db)
+):
+    """Flight counts per airline, time of day, fare range and seat class for
+    the `/flights/search` filters. Each facet is counted with the other
+    facets' selections applied, so it shows what selecting a value would add."""
+    try:
+        return search_facets(
+            db, origin=origin.upper() if origin else None, destination=destination.upper() if destination else None,
+            date=date, days_flex=days_flex or 0, tier=(tier or "ECONOMY"), min_price=min_price,
+            max_price=max_price, max_duration=max_duration, origin_radius_km=origin_radius_km,
+            destination_radius_km=destination_radius_km, **_facet_filters(airline, time_of_day, available_class),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _facet_filters(airline: list[str] | None, time_of_day: list[str] | None,
+                   available_class: list[str] | None) -> dict:
+    """Facet query parameters as `search_flights` keyword arguments, normalized."""
+    return {
+        "airlines": sorted({a.upper() for a in airline}) if airline else None,
+        "times_of_day": sorted({t.lower() for t in time_of_day}) if time_of_day else None,
+        "available_classes": sorted({c.upper() for c in available_class}) if available_class else None,
+    }
+
+
+@router.post("/search/batch", response_model=list[BatchSearchResult])
+def search_batch_api(payload: BatchSearchRequest, db: Session = Depends(get_db)):
+    """Several route searches in one call, e.g. for destination cards and
+    partner widgets. Each result matches `/flights/search` with the same
+    route, date, `days_flex` and `limit` (and the shared `sort_by` and
+    `tier`); the routes not already cached are fetched with one query."""
+    queries = []
+    for q in payload.queries:
+        if q.date:
+            try:
+                datetime.strptime(q.date, "%Y-%m-%d")
+            except ValueError:
+                raise HTTPException(status_code=400, detail="date must be YYYY-MM-DD")
+        queries.append(dict(origin=q.origin.upper(), destination=q.destination.upper(), date=q.date,
+                            days_flex=q.days_flex, limit=q.limit))
+    try:
+        results = search_flights_batch(db, queries, sort_by=payload.sort_by, tier=payload.tier)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return ORJSONResponse([
+        {"origin": q["origin"], "destination": q["destination"], "date": q["date"], "flights": flights}
+        for q, flights in zip(queries, results)
+    ])
+
+
+@router.post("/search/trip", response_model=list[TripItinerary])
+def search_trip_api(payload: TripSearchRequest):
+    """Round-trip or multi-city itineraries: one flight per leg, ranked by
+    total fare or total flight time. Legs are searched in parallel, each
+    through the `/flights/search` cache."""
+    legs = []
+    for leg in payload.legs:
+        try:
+            datetime.strptime(leg.date, "%Y-%m-%d")
+        except ValueError:
+            raise HTTPException(status_code=400, detail="date must be YYYY-MM-DD")
+        legs.append(dict(origin=leg.origin.upper(), destination=leg.destination.upper(), date=leg.date))
+    try:
+        itineraries = search_trip(legs, sort_by=payload.sort_by, limit=payload.limit, tier=payload.tier,
+                                  min_connection_minutes=payload.min_connection_minutes)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return ORJSONResponse(itineraries)
+
+
+@router.get("/search/connections", response_model=list[ItineraryResponse])
+def search_connections_api(
+    origin: str = Query(..., min_length=3, max_length=10),
+    destination: str = Query(..., min_length=3, max_length=10),
+    date: str = Query(..., pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    days_flex: int = Query(0, ge=0, le=3),
+    min_layover: int = Query(45, ge=0, le=24 * 60, description="minutes"),
+    max_layover: int = Query(360, ge=0, le=24 * 60, description="minutes"),
+    sort_by: str = Query("price", pattern="^(price|duration)$"),
+    limit: int = Query(20, ge=1, le=50),
+    tier: str = Query("ECONOMY", pattern="^(ECONOMY|BUSINESS|FIRST|all|ALL)$"),
+    db: Session = Depends(get_db)
+):
+    """One-stop connecting itineraries, ranked by total price or total duration."""
+    origin, destination = origin.upper(), destination.upper()
+    if origin == destination:
+        raise HTTPException(status_code=400, detail="origin and destination must differ")
+    if min_layover > max_layover:
+        raise HTTPException(status_code=400, detail="min_layover must not exceed max_layover")
+    try:
+        datetime.strptime(date, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="date must be YYYY-MM-DD")
+
+    return search_connections(
+        db, origin, destination, date, days_flex=days_flex,
+        min_layover_minutes=min_layover, max_layover_minutes=max_layover,
+        sort_by=sort_by, limit=limit, tier=tier.upper(),
     )
 
-    return flights or []
 
+@router.get("/fare-calendar", response_model=list[FareCalendarDay])
+def fare_calendar_api(
+    origin: str = Query(..., min_length=3, max_length=10),
+    destination: str = Query(..., min_length=3, max_length=10),
+    start: str | None = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    days: int = Query(30, ge=1, le=60),
+    tier: str = Query("ECONOMY", pattern="^(ECONOMY|BUSINESS|FIRST)$"),
+    db: Session = Depends(get_db)
+):
+    """Cheapest fare and seats available per day for a route, from `start` (default today)."""
+    if start:
+        try:
+            start_date = datetime.strptime(start, "%Y-%m-%d").date()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="start must be YYYY-MM-DD")
+    else:
+        start_date = datetime.utcnow().date()
+
+    return get_fare_calendar(db, origin.upper(), destination.upper(), start_date, days=days, tier=tier)
+
+
+def _explicit_limit(request: Request, limit: int | None) -> int | None:
+    """`limit` if the client passed it, else None (the default page size doesn't cap a stream)."""
+    return limit if "limit" in request.query_params else None
+
+
+def _search_response(flights: list[dict], sort_by: str | None, page_size: int | None) -> ORJSONResponse:
+    """Search results written straight to JSON.
+
+    They are server-built `FlightResponse`-shaped dicts, so validating them
+    against the `response_model` again would only cost time. The model still
+    documents the endpoint.
+    """
+    next_cursor = next_search_cursor(flights, sort_by, page_size)
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return ORJSONResponse(flights or [], headers=headers)
+
+
+
+def _stored_fare(flight: Flight, inventory: dict) -> float:
+    """The flight's stored economy fare, priced live only if not materialized yet."""
+    return current_prices([flight], {flight.id: inventory}, "ECONOMY", datetime.utcnow())[0]
 
 
 @router.post("/admin", response_model=FlightResponse, status_code=201)
 def create_flight_api(payload: FlightCreate, db: Session = Depends(get_db)):
     # resolve friendly identifiers to internal IDs
     al_val = payload.airline_code
-    al = db.query(Airline).filter((Airline.code == al_val.upper()) | (Airline.name == al_val)).first()
+    al = reference_data.airline(db, al_val)
     if not al:
         raise HTTPException(status_code=400, detail=f"airline '{al_val}' not found")
 
     ac_val = payload.aircraft_model
-    ac = db.query(Aircraft).filter(Aircraft.model == ac_val).first()
+    ac = reference_data.aircraft(db, ac_val)
     if not ac:
         raise HTTPException(status_code=400, detail=f"aircraft model '{ac_val}' not found")
 
     dep_val = payload.departure_airport_code
-    dep_ap = db.query(Airport).filter((Airport.code == dep_val.upper()) | (Airport.name == dep_val)).first()
+    dep_ap = reference_data.airport(db, dep_val)
     if not dep_ap:
         raise HTTPException(status_code=400, detail=f"departure airport '{dep_val}' not found")
 
     arr_val = payload.arrival_airport_code
-    arr_ap = db.query(Airport).filter((Airport.code == arr_val.upper()) | (Airport.name == arr_val)).first()
+    arr_ap = reference_data.airport(db, arr_val)
     if not arr_ap:
         raise HTTPException(status_code=400, detail=f"arrival airport '{arr_val}' not found")
 
@@ -142,25 +374,18 @@ def create_flight_api(payload: FlightCreate, db: Session = Depends(get_db)):
 
     # map flight to response model
     # compute seats_left
-    seats_left = db.query(func.count(Seat.id)).filter(Seat.flight_id == flight.id, Seat.is_available == True).scalar() or 0
+    inventory = get_flight_inventory(db, flight.id)
+    seats_left = inventory["available"]
     # we return a minimal FlightResponse mapping
-    dep = db.query(Airport).filter(Airport.id == flight.departure_airport_id).first()
-    arr = db.query(Airport).filter(Airport.id == flight.arrival_airport_id).first()
-    airline = db.query(Airline).filter(Airline.id == flight.airline_id).first()
-    # compute dynamic price (economy)
-    total_seats = db.query(func.count(Seat.id)).filter(Seat.flight_id == flight.id).scalar() or 0
-    booked_seats = max(total_seats - seats_left, 0)
-    demand_level = getattr(flight, 'demand_level', 'medium') or 'medium'
-    try:
-        current_price = compute_dynamic_price(flight.base_price, flight.departure_time, total_seats, booked_seats, demand_level, tier="ECONOMY")
-    except Exception:
-        current_price = float(flight.base_price or 0.0)
+    dep, arr, airline = dep_ap, arr_ap, al
+    # the economy fare create_flight stored, as search shows it
+    current_price = _stored_fare(flight, inventory)
 
     return FlightResponse(
         id=flight.id,
         airline=airline.name if airline else "",
         flight_number=flight.flight_number,
-        aircraft_model=(db.query(Aircraft).filter(Aircraft.id == flight.aircraft_id).first().model if db.query(Aircraft).filter(Aircraft.id == flight.aircraft_id).first() else None),
+        aircraft_model=ac.model,
         source=dep.code if dep else "",
         destination=arr.code if arr else "",
         departure_time=flight.departure_time,
@@ -174,42 +399,21 @@ def create_flight_api(payload: FlightCreate, db: Session = Depends(get_db)):
 
 @router.get("/{flight_id}", response_model=FlightResponse)
 def get_flight(flight_id: int = Path(..., ge=1), db: Session = Depends(get_db)):
-    """Get single flight by ID - optimized with eager loading."""
-    f = (
-        db.query(Flight)
-        .options(
-            joinedload(Flight.airline),
-            joinedload(Flight.aircraft),
-            joinedload(Flight.departure_airport),
-            joinedload(Flight.arrival_airport),
-        )
-        .filter(Flight.id == flight_id)
-        .first()
-    )
+    """Get single flight by ID; airports, airline and aircraft come from the reference-data cache."""
+    f = db.get(Flight, flight_id)
     if not f:
         raise HTTPException(status_code=404, detail="flight not found")
-    
-    # Use eager-loaded relationships
-    dep = f.departure_airport
-    arr = f.arrival_airport
-    airline = f.airline
-    aircraft = f.aircraft
-    
-    # Single query for seat stats
-    seat_stats = db.query(
-        func.count(Seat.id).label('total'),
-        func.sum(case((Seat.is_available == True, 1), else_=0)).label('available')
-    ).filter(Seat.flight_id == f.id).first()
-    
-    total_seats = seat_stats.total or 0
-    seats_left = seat_stats.available or 0
-    booked_seats = max(total_seats - seats_left, 0)
-    demand_level = getattr(f, 'demand_level', 'medium') or 'medium'
-    
-    try:
-        current_price = compute_dynamic_price(f.base_price, f.departure_time, total_seats, booked_seats, demand_level, tier="ECONOMY")
-    except Exception:
-        current_price = float(f.base_price or 0.0)
+
+    dep = reference_data.airport_by_id(db, f.departure_airport_id)
+    arr = reference_data.airport_by_id(db, f.arrival_airport_id)
+    airline = reference_data.airline_by_id(db, f.airline_id)
+    aircraft = reference_data.aircraft_by_id(db, f.aircraft_id)
+
+    # Seat counts from the inventory counters
+    inventory = get_flight_inventory(db, f.id)
+    seats_left = inventory["available"]
+    # the stored economy fare: the price search sorts, filters and shows
+    current_price = _stored_fare(f, inventory)
 
     return FlightResponse(
         id=f.id,
@@ -247,7 +451,7 @@ def update_flight(flight_id: int, payload: FlightUpdate = Body(...), db: Session
     # map friendly airline -> airline_id
     if "airline" in payload_data and payload_data.get("airline"):
         val = payload_data.get("airline")
-        al = db.query(Airline).filter((Airline.code == val.upper()) | (Airline.name == val)).first()
+        al = reference_data.airline(db, val)
         if not al:
             raise HTTPException(status_code=400, detail=f"airline '{val}' not found")
         f.airline_id = al.id
@@ -255,7 +459,7 @@ def update_flight(flight_id: int, payload: FlightUpdate = Body(...), db: Session
     # map aircraft_model -> aircraft_id
     if "aircraft_model" in payload_data and payload_data.get("aircraft_model"):
         am = payload_data.get("aircraft_model")
-        ac = db.query(Aircraft).filter(Aircraft.model == am).first()
+        ac = reference_data.aircraft(db, am)
         if not ac:
             raise HTTPException(status_code=400, detail=f"aircraft model '{am}' not found")
         f.aircraft_id = ac.id
@@ -264,28 +468,28 @@ def update_flight(flight_id: int, payload: FlightUpdate = Body(...), db: Session
     # support both `source` (code/name) and `departure_airport_code`
     if "source" in payload_data and payload_data.get("source"):
         sval = payload_data.get("source")
-        ap = db.query(Airport).filter((Airport.code == sval.upper()) | (Airport.name == sval)).first()
+        ap = reference_data.airport(db, sval)
         if not ap:
             raise HTTPException(status_code=400, detail=f"source airport '{sval}' not found")
         f.departure_airport_id = ap.id
 
     if "departure_airport_code" in payload_data and payload_data.get("departure_airport_code"):
         dcode = payload_data.get("departure_airport_code")
-        apd = db.query(Airport).filter((Airport.code == dcode.upper()) | (Airport.name == dcode)).first()
+        apd = reference_data.airport(db, dcode)
         if not apd:
             raise HTTPException(status_code=400, detail=f"departure airport '{dcode}' not found")
         f.departure_airport_id = apd.id
 
     if "destination" in payload_data and payload_data.get("destination"):
         dval = payload_data.get("destination")
-        ap2 = db.query(Airport).filter((Airport.code == dval.upper()) | (Airport.name == dval)).first()
+        ap2 = reference_data.airport(db, dval)
         if not ap2:
             raise HTTPException(status_code=400, detail=f"destination airport '{dval}' not found")
         f.arrival_airport_id = ap2.id
 
     if "arrival_airport_code" in payload_data and payload_data.get("arrival_airport_code"):
         acode = payload_data.get("arrival_airport_code")
-        apa = db.query(Airport).filter((Airport.code == acode.upper()) | (Airport.name == acode)).first()
+        apa = reference_data.airport(db, acode)
         if not apa:
             raise HTTPException(status_code=400, detail=f"arrival airport '{acode}' not found")
         f.arrival_airport_id = apa.id
@@ -308,20 +512,23 @@ def update_flight(flight_id: int, payload: FlightUpdate = Body(...), db: Session
     if "base_price" in payload_data and payload_data.get("base_price") is not None:
         f.base_price = payload_data.get("base_price")
 
+    f.refresh_duration()
+    refresh_current_prices(db, [f.id])
     db.commit()
     db.refresh(f)
-    dep = db.query(Airport).filter(Airport.id == f.departure_airport_id).first()
-    arr = db.query(Airport).filter(Airport.id == f.arrival_airport_id).first()
-    airline = db.query(Airline).filter(Airline.id == f.airline_id).first()
-    seats_left = db.query(func.count(Seat.id)).filter(Seat.flight_id == f.id, Seat.is_available == True).scalar() or 0
-    aircraft = db.query(Aircraft).filter(Aircraft.id == f.aircraft_id).first()
-    total_seats = db.query(func.count(Seat.id)).filter(Seat.flight_id == f.id).scalar() or 0
-    booked_seats = max(total_seats - seats_left, 0)
-    demand_level = getattr(f, 'demand_level', 'medium') or 'medium'
-    try:
-        current_price = compute_dynamic_price(f.base_price, f.departure_time, total_seats, booked_seats, demand_level, tier="ECONOMY")
-    except Exception:
-        current_price = float(f.base_price or 0.0)
+    dep = reference_data.airport_by_id(db, f.departure_airport_id)
+    arr = reference_data.airport_by_id(db, f.arrival_airport_id)
+
+    # drop cached searches holding this flight and any it may now appear in
+    invalidate_flight_cache([f.id])
+    invalidate_route_cache(dep.code if dep else None, arr.code if arr else None)
+    connection_index.upsert_flight(f)
+    airline = reference_data.airline_by_id(db, f.airline_id)
+    inventory = get_flight_inventory(db, f.id)
+    seats_left = inventory["available"]
+    aircraft = reference_data.aircraft_by_id(db, f.aircraft_id)
+    # refreshed above with the edit
+    current_price = _stored_fare(f, inventory)
 
     return FlightResponse(
         id=f.id,
@@ -345,4 +552,6 @@ def delete_flight(flight_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="flight not found")
     db.delete(f)
     db.commit()
+    invalidate_flight_cache([flight_id])
+    connection_index.remove_flight(flight_id)
     return {"message": "flight deleted"}
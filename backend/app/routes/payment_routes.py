@@ -1,60 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, Body, BackgroundTasks, Header
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 from app.config import get_db
 from app.schemas.payment_schema import PaymentCreate, PaymentResponse, PaymentUpdate
-from app.schemas.booking_schema import BookingResponse, TicketInfoSimplified
 from app.models.booking import Booking
 from app.models.user import User
 from app.services.flight_service import create_payment, get_payment_by_transaction
 from app.services.email_service import send_booking_confirmation_email
+from app.services.booking_results import booking_result
+from app.services.idempotency import run_idempotent
 from app.utils.pdf_generator import generate_ticket_pdf_from_booking
 
 router = APIRouter()
 
 
-def _format_flight_seat(seat_class: str, seat_number: str) -> str:
-    """Format flight seat as 'SEAT_CLASS - SEAT_NUMBER' (e.g., 'EC - 32')."""
-    seat_class_abbr = {
-        "ECONOMY": "EC",
-        "ECONOMY_FLEX": "ECF",
-        "BUSINESS": "BUS",
-        "FIRST": "FC",
-    }.get(seat_class.upper(), seat_class[:2].upper())
-    
-    return f"{seat_class_abbr} - {seat_number}"
-
-
-def _ticket_to_simplified(ticket) -> TicketInfoSimplified:
-    """Convert Ticket model to simplified response format."""
-    return TicketInfoSimplified(
-        flight_seat=_format_flight_seat(ticket.seat_class or "ECONOMY", ticket.seat_number or ""),
-        passenger_name=ticket.passenger_name,
-        passenger_age=ticket.passenger_age,
-        passenger_gender=ticket.passenger_gender,
-        airline_name=ticket.airline_name,
-        flight_number=ticket.flight_number,
-        route=ticket.route,
-        departure_airport=ticket.departure_airport,
-        arrival_airport=ticket.arrival_airport,
-        departure_city=ticket.departure_city,
-        arrival_city=ticket.arrival_city,
-        departure_time=ticket.departure_time,
-        arrival_time=ticket.arrival_time,
-        seat_number=ticket.seat_number or "",
-        seat_class=ticket.seat_class or "ECONOMY",
-        payment_required=ticket.payment_required,
-        currency=ticket.currency,
-        ticket_number=ticket.ticket_number,
-        issued_at=ticket.issued_at,
-    )
-
-
 @router.post("/", status_code=status.HTTP_201_CREATED)
 def create_payment_api(
     payload: PaymentCreate, 
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    idempotency_key: str | None = Header(None, alias="Idempotency-Key", max_length=255),
 ):
+    """Pay for a booking. A retry with the same `Idempotency-Key` gets the first response back."""
+    # payments are unauthenticated: keys belong to the booking being paid
+    return run_idempotent(db, "payment", idempotency_key, payload.booking_reference, payload.model_dump_json().encode(),
+                          lambda: _create_payment(payload, background_tasks, db))
+
+
+def _create_payment(payload: PaymentCreate, background_tasks: BackgroundTasks, db: Session) -> ORJSONResponse:
     # very small validation
     if payload.amount <= 0:
         raise HTTPException(status_code=400, detail="amount must be > 0")
@@ -95,9 +68,6 @@ def create_payment_api(
     # Compute total_fare from tickets
     total_fare = sum(t.payment_required for t in booking.tickets)
 
-    # Convert tickets to simplified format
-    tickets = [_ticket_to_simplified(t) for t in booking.tickets]
-    
     # Prepare booking data for email
     booking_data = {
         "pnr": booking.pnr,
@@ -126,16 +96,7 @@ def create_payment_api(
     if user and user.email:
         background_tasks.add_task(send_booking_confirmation_email, user.email, booking_data, pdf_bytes)
 
-    return BookingResponse(
-        pnr=booking.pnr,
-        booking_reference=booking.booking_reference,
-        status=booking.status,
-        created_at=booking.created_at,
-        total_fare=total_fare,
-        tickets=tickets,
-        transaction_id=tx.transaction_id,
-        paid_amount=tx.amount,
-    )
+    return ORJSONResponse(booking_result(booking, tx, total_fare=total_fare), status_code=status.HTTP_201_CREATED)
 
 
 @router.get("/{transaction_id}", response_model=PaymentResponse)
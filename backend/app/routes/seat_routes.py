@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select
 from app.config import get_db
 from app.models.seat import Seat, SEAT_POSITION_SURCHARGE
 from app.models.flight import Flight
@@ -11,13 +11,19 @@ from app.schemas.seat_schema import (
     SeatMapResponse, SeatMapRow, SeatMapSeat, SeatMapConfig
 )
 from app.services.pricing_engine import compute_dynamic_price
+from app.services.inventory_service import get_flight_inventory
+from app.utils.streaming import ndjson_response, stream_rows, wants_ndjson
 from typing import Optional
 
 router = APIRouter()
 
 
 @router.get("/", response_model=list[SeatResponse])
-def list_seats(db: Session = Depends(get_db)):
+def list_seats(request: Request, db: Session = Depends(get_db)):
+    """All seats. Streams NDJSON for `Accept: application/x-ndjson`."""
+    if wants_ndjson(request):
+        columns = [getattr(Seat, name) for name in SeatResponse.model_fields]
+        return ndjson_response(lambda session: stream_rows(session, select(*columns).order_by(Seat.id)))
     return db.query(Seat).all()
 
 
@@ -60,8 +66,9 @@ def get_seat_map(
         raise HTTPException(status_code=404, detail="No seats found for this flight")
     
     # Compute current dynamic price for the flight
-    total_seats = db.query(func.count(Seat.id)).filter(Seat.flight_id == flight_id).scalar() or 0
-    booked_seats = db.query(func.count(Seat.id)).filter(Seat.flight_id == flight_id, Seat.is_available == False).scalar() or 0
+    inventory = get_flight_inventory(db, flight_id)
+    total_seats = inventory["total"]
+    booked_seats = max(total_seats - inventory["available"], 0)
     demand_level = getattr(flight, 'demand_level', 'medium') or 'medium'
     
     # Get seat class for pricing (use the filter or default to Economy)
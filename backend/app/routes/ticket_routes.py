@@ -1,14 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from app.config import get_db
 from app.models.ticket import Ticket
 from app.schemas.ticket_schema import TicketResponse
+from app.utils.streaming import ndjson_response, stream_rows, wants_ndjson
 
 router = APIRouter()
 
 
 @router.get("/", response_model=list[TicketResponse])
-def list_tickets(db: Session = Depends(get_db)):
+def list_tickets(request: Request, db: Session = Depends(get_db)):
+    """All tickets. Streams NDJSON for `Accept: application/x-ndjson`."""
+    if wants_ndjson(request):
+        columns = [getattr(Ticket, name) for name in TicketResponse.model_fields]
+        return ndjson_response(lambda session: stream_rows(session, select(*columns).order_by(Ticket.id)))
     return db.query(Ticket).all()
 
 
@@ -1,6 +1,7 @@
 """User management routes with role-based access control."""
 from fastapi import APIRouter, Depends, HTTPException, Body, Query
-from sqlalchemy.orm import Session
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.orm import Session, selectinload
 from typing import Optional, List
 
 from app.config import get_db
@@ -14,22 +15,7 @@ from app.schemas.user_schema import (
 )
 from app.auth.password import hash_password
 from app.auth.dependencies import get_current_user, require_admin
-
-
-def _format_flight_seat(seat_class: str, seat_number: str) -> str:
-    """Format flight seat as 'SEAT_CLASS - SEAT_NUMBER' (e.g., 'EC - 32')."""
-    seat_class_abbr = {
-        "ECONOMY": "EC",
-        "ECONOMY_FLEX": "ECF",
-        "BUSINESS": "BUS",
-        "FIRST": "FC",
-        "Economy": "EC",
-        "Premium Economy": "ECF",
-        "Business": "BUS",
-        "First": "FC",
-    }.get(seat_class, seat_class[:2].upper() if seat_class else "EC")
-    
-    return f"{seat_class_abbr} - {seat_number}"
+from app.services.booking_results import booking_result, first_successful_payment
 
 
 router = APIRouter()
@@ -100,9 +86,12 @@ def get_my_bookings(
 ):
     """Get the current user's booking history."""
     from app.models.booking import Booking
-    from app.schemas.booking_schema import BookingResponse, TicketInfoSimplified
     
-    query = db.query(Booking).filter(Booking.user_id == current_user.id)
+    query = (
+        db.query(Booking)
+        .options(selectinload(Booking.tickets), selectinload(Booking.payments))
+        .filter(Booking.user_id == current_user.id)
+    )
     
     if status:
         query = query.filter(Booking.status == status)
@@ -110,58 +99,14 @@ def get_my_bookings(
     query = query.order_by(Booking.created_at.desc())
     bookings = query.limit(limit).all()
     
-    results = []
-    for booking in bookings:
-        total_fare = sum(t.payment_required for t in booking.tickets) if booking.tickets else 0.0
-        
-        tickets_simplified = []
-        for t in booking.tickets:
-            tickets_simplified.append(TicketInfoSimplified(
-                flight_seat=_format_flight_seat(t.seat_class or "Economy", t.seat_number or "TBA"),
-                passenger_name=t.passenger_name,
-                passenger_age=t.passenger_age,
-                passenger_gender=t.passenger_gender,
-                airline_name=t.airline_name,
-                flight_number=t.flight_number,
-                route=t.route,
-                departure_airport=t.departure_airport,
-                arrival_airport=t.arrival_airport,
-                departure_city=t.departure_city,
-                arrival_city=t.arrival_city,
-                departure_time=t.departure_time,
-                arrival_time=t.arrival_time,
-                seat_number=t.seat_number or "",
-                seat_class=t.seat_class or "Economy",
-                payment_required=t.payment_required,
-                currency=t.currency,
-                ticket_number=t.ticket_number,
-                issued_at=t.issued_at,
-            ))
-        
-        # Get payment info
-        successful_payment = None
-        for payment in booking.payments:
-            if payment.status == "Success":
-                successful_payment = payment
-                break
-        
-        results.append(BookingResponse(
-            pnr=booking.pnr,
-            booking_reference=booking.booking_reference,
-            status=booking.status,
-            created_at=booking.created_at,
-            total_fare=total_fare,
-            tickets=tickets_simplified,
-            transaction_id=successful_payment.transaction_id if successful_payment else None,
-            paid_amount=successful_payment.amount if successful_payment else None,
-        ))
-    
-    return {
+    results = [booking_result(b, first_successful_payment(b), missing_seat="TBA") for b in bookings]
+
+    return ORJSONResponse({
         "user_id": current_user.id,
         "user_name": current_user.full_name,
         "total_bookings": len(results),
         "bookings": results
-    }
+    })
 
 
 # ============== Admin Endpoints ==============
@@ -354,13 +299,16 @@ def get_user_bookings(
 ):
     """Get booking history for a specific user (Admin only)."""
     from app.models.booking import Booking
-    from app.schemas.booking_schema import BookingResponse, TicketInfoSimplified
     
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    query = db.query(Booking).filter(Booking.user_id == user_id)
+    query = (
+        db.query(Booking)
+        .options(selectinload(Booking.tickets), selectinload(Booking.payments))
+        .filter(Booking.user_id == user_id)
+    )
     
     if status:
         query = query.filter(Booking.status == status)
@@ -368,54 +316,11 @@ def get_user_bookings(
     query = query.order_by(Booking.created_at.desc())
     bookings = query.limit(limit).all()
     
-    results = []
-    for booking in bookings:
-        total_fare = sum(t.payment_required for t in booking.tickets) if booking.tickets else 0.0
-        
-        tickets_simplified = []
-        for t in booking.tickets:
-            tickets_simplified.append(TicketInfoSimplified(
-                flight_seat=f"{t.seat_class[:2].upper() if t.seat_class else 'EC'} - {t.seat_number or 'TBA'}",
-                passenger_name=t.passenger_name,
-                passenger_age=t.passenger_age,
-                passenger_gender=t.passenger_gender,
-                airline_name=t.airline_name,
-                flight_number=t.flight_number,
-                route=t.route,
-                departure_airport=t.departure_airport,
-                arrival_airport=t.arrival_airport,
-                departure_city=t.departure_city,
-                arrival_city=t.arrival_city,
-                departure_time=t.departure_time,
-                arrival_time=t.arrival_time,
-                seat_number=t.seat_number or "",
-                seat_class=t.seat_class or "ECONOMY",
-                payment_required=t.payment_required,
-                currency=t.currency,
-                ticket_number=t.ticket_number,
-                issued_at=t.issued_at,
-            ))
-        
-        successful_payment = None
-        for payment in booking.payments:
-            if payment.status == "Success":
-                successful_payment = payment
-                break
-        
-        results.append(BookingResponse(
-            pnr=booking.pnr,
-            booking_reference=booking.booking_reference,
-            status=booking.status,
-            created_at=booking.created_at,
-            total_fare=total_fare,
-            tickets=tickets_simplified,
-            transaction_id=successful_payment.transaction_id if successful_payment else None,
-            paid_amount=successful_payment.amount if successful_payment else None,
-        ))
-    
-    return {
+    results = [booking_result(b, first_successful_payment(b), missing_seat="TBA") for b in bookings]
+
+    return ORJSONResponse({
         "user_id": user_id,
         "user_name": user.full_name,
         "total_bookings": len(results),
         "bookings": results
-    }
+    })
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional
 
 
@@ -7,6 +7,8 @@ class AirportCreate(BaseModel):
     name: str
     city: Optional[str] = None
     country: Optional[str] = None
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
 
 
 class AirportUpdate(BaseModel):
@@ -14,6 +16,8 @@ class AirportUpdate(BaseModel):
     name: Optional[str] = None
     city: Optional[str] = None
     country: Optional[str] = None
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
 
 
 class AirportResponse(BaseModel):
@@ -22,6 +26,8 @@ class AirportResponse(BaseModel):
     name: str
     city: Optional[str]
     country: Optional[str]
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
 
     model_config = ConfigDict(from_attributes=True, json_schema_extra={
             "example": {
@@ -29,6 +35,12 @@ class AirportResponse(BaseModel):
                 "code": "DEL",
                 "name": "Indira Gandhi Intl",
                 "city": "Delhi",
-                "country": "India"
+                "country": "India",
+                "latitude": 28.5562,
+                "longitude": 77.1000
             }
         })
+
+
+class NearbyAirport(AirportResponse):
+    distance_km: float
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, root_validator, ConfigDict
+from pydantic import BaseModel, root_validator, ConfigDict, Field
 from typing import Optional, List
 from datetime import datetime
 
@@ -91,9 +91,28 @@ class BookingResponse(BaseModel):
     # Payment info (returned after successful payment)
     transaction_id: Optional[str] = None
     paid_amount: Optional[float] = None
+    # End of the seat hold while payment is pending
+    expires_at: Optional[datetime] = None
 
     model_config = ConfigDict(from_attributes=True)
 
 
+class BulkBookingCreate(BaseModel):
+    """Several bookings for the authenticated user (e.g. an agency's group), on one or more flights."""
+    bookings: List[BookingCreate] = Field(..., min_length=1, max_length=100)
+
+
+class BulkBookingItem(BaseModel):
+    index: int  # position in the request's `bookings`
+    booking: Optional[BookingResponse] = None
+    error: Optional[str] = None
+
+
+class BulkBookingResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[BulkBookingItem]
+
+
 class BookingUpdate(BaseModel):
     status: Optional[str] = None
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, ConfigDict
-from datetime import datetime
+from pydantic import BaseModel, ConfigDict, Field
+from datetime import date, datetime
 from typing import Optional
 
 
@@ -51,3 +51,96 @@ class FlightResponse(BaseModel):
     seats_by_class: dict[str, int] | None = None
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class ItineraryResponse(BaseModel):
+    """One-stop itinerary: two legs connecting at `via`."""
+    legs: list[FlightResponse]
+    via: str
+    layover_minutes: int
+    total_duration_minutes: int
+    total_price: float
+    seats_left: int
+
+
+class FareCalendarDay(BaseModel):
+    date: date
+    # Lowest current fare that day among flights with seats left in the tier
+    min_price: float | None = None
+    flight_id: int | None = None
+    flights: int
+    seats_available: int
+
+
+class FacetValue(BaseModel):
+    value: str | None
+    label: str | None = None
+    count: int
+
+
+class TimeOfDayFacet(BaseModel):
+    value: str
+    start_hour: int
+    end_hour: int  # exclusive
+    count: int
+
+
+class PriceRangeFacet(BaseModel):
+    min: float
+    max: float  # exclusive
+    count: int
+
+
+class SearchFacets(BaseModel):
+    """Flight counts per facet value. Each facet applies the other facets'
+    selections but not its own; `total` applies them all."""
+    total: int
+    airlines: list[FacetValue]
+    time_of_day: list[TimeOfDayFacet]
+    price_ranges: list[PriceRangeFacet]
+    seat_classes: list[FacetValue]
+
+
+class RouteQuery(BaseModel):
+    origin: str = Field(..., min_length=3, max_length=10)
+    destination: str = Field(..., min_length=3, max_length=10)
+    date: str | None = Field(None, pattern=r"^\d{4}-\d{2}-\d{2}$")
+    days_flex: int = Field(0, ge=0, le=7)
+    limit: int = Field(30, ge=1, le=100)
+
+
+class BatchSearchRequest(BaseModel):
+    """Several route searches answered together (e.g. one per destination card)."""
+    queries: list[RouteQuery] = Field(..., min_length=1, max_length=25)
+    sort_by: str | None = Field(None, pattern="^(price|duration)$")
+    tier: str = Field("ECONOMY", pattern="^(ECONOMY|BUSINESS|FIRST|all|ALL)$")
+
+
+class BatchSearchResult(BaseModel):
+    origin: str
+    destination: str
+    date: str | None = None
+    flights: list[FlightResponse]
+
+
+class TripLeg(BaseModel):
+    origin: str = Field(..., min_length=3, max_length=10)
+    destination: str = Field(..., min_length=3, max_length=10)
+    date: str = Field(..., pattern=r"^\d{4}-\d{2}-\d{2}$")
+
+
+class TripSearchRequest(BaseModel):
+    """A round trip (two legs) or multi-city trip, legs in travel order."""
+    legs: list[TripLeg] = Field(..., min_length=1, max_length=6)
+    sort_by: str = Field("price", pattern="^(price|duration)$")
+    limit: int = Field(10, ge=1, le=50)
+    tier: str = Field("ECONOMY", pattern="^(ECONOMY|BUSINESS|FIRST|all|ALL)$")
+    min_connection_minutes: int = Field(60, ge=0, le=24 * 60)
+
+
+class TripItinerary(BaseModel):
+    """One flight per leg of a trip."""
+    legs: list[FlightResponse]
+    total_price: float
+    total_duration_minutes: int
+    seats_left: int
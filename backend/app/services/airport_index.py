@@ -0,0 +1,193 @@
+"""
+In-memory prefix index for airport autocomplete.
+
+Every airport contributes a few lower-cased keys (its code, and each word of
+its city and name, plus the full city and name) to one sorted list of
+(key, kind, airport_id). A prefix query is two bisects over that list; matches are
+ranked by which field matched (exact code, code prefix, city, name) and the
+best `limit` are returned. No query runs per keystroke.
+
+The same index answers nearby-airport queries: airports with coordinates are
+kept as arrays of radians and `nearby` computes every haversine distance in
+one vectorized numpy pass.
+
+The index is built on first use, updated in place by `upsert_airport` and
+`remove_airport` from the airport admin routes, and rebuilt after
+`REFERENCE_DATA_MAX_AGE_SECONDS` to pick up edits made by other workers.
+"""
+import bisect
+import heapq
+import os
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models.airport import Airport
+from app.utils.cache import SingleFlight
+
+
+AirportEntry = namedtuple("AirportEntry", "id code name city country latitude longitude")
+
+EARTH_RADIUS_KM = 6371.0088
+
+# match kind -> rank (lower is better)
+_EXACT_CODE, _CODE, _CITY, _NAME = 0, 1, 2, 3
+
+
+class AirportIndex:
+    """Airports searchable by code, city and name prefix."""
+
+    def __init__(self, max_age_seconds: float = 300.0):
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.RLock()
+        self._airports: dict[int, AirportEntry] = {}
+        self._keys: list[tuple[str, int, int]] = []  # (key, kind, airport_id), sorted
+        # (airport ids, [[lat, lon], ...] in radians) of airports with coordinates;
+        # None until the first nearby query after a change
+        self._points: tuple[np.ndarray, np.ndarray] | None = None
+        self._built_at: float | None = None
+        self._rebuilds = SingleFlight()
+        self.builds = 0
+
+    # -- maintenance -------------------------------------------------------
+
+    def rebuild(self, db: Session) -> int:
+        """Reload every airport. Returns the number indexed."""
+        rows = db.query(Airport.id, Airport.code, Airport.name, Airport.city, Airport.country,
+                        Airport.latitude, Airport.longitude).all()
+        airports = {r.id: AirportEntry(*r) for r in rows}
+        keys = sorted(key for entry in airports.values() for key in self._keys_for(entry))
+        with self._lock:
+            self._airports, self._keys = airports, keys
+            self._points = None
+            self._built_at = time.monotonic()
+            self.builds += 1
+        return len(airports)
+
+    def ensure_fresh(self, db: Session) -> None:
+        with self._lock:
+            built_at = self._built_at
+        if built_at is None or time.monotonic() - built_at > self.max_age_seconds:
+            self._rebuilds.do("rebuild", lambda: self.rebuild(db))
+
+    def upsert_airport(self, airport: Airport) -> None:
+        """Add `airport`, or re-key it after its code, city or name changed."""
+        entry = AirportEntry(airport.id, airport.code, airport.name, airport.city, airport.country,
+                             airport.latitude, airport.longitude)
+        with self._lock:
+            if self._built_at is None:
+                return  # picked up by the first build
+            self._remove(entry.id)
+            self._airports[entry.id] = entry
+            self._points = None
+            for key in self._keys_for(entry):
+                bisect.insort(self._keys, key)
+
+    def remove_airport(self, airport_id: int) -> None:
+        with self._lock:
+            self._remove(airport_id)
+            self._points = None
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._built_at = None
+
+    def _remove(self, airport_id: int) -> None:
+        entry = self._airports.pop(airport_id, None)
+        if entry is None:
+            return
+        for key in self._keys_for(entry):
+            i = bisect.bisect_left(self._keys, key)
+            if i < len(self._keys) and self._keys[i] == key:
+                del self._keys[i]
+
+    @staticmethod
+    def _keys_for(entry: AirportEntry) -> set[tuple[str, int, int]]:
+        keys = set()
+        if entry.code:
+            keys.add((entry.code.lower(), _CODE, entry.id))
+        for kind, text in ((_CITY, entry.city), (_NAME, entry.name)):
+            if not text:
+                continue
+            text = text.lower()
+            keys.add((text, kind, entry.id))
+            for word in text.replace("-", " ").split():
+                keys.add((word, kind, entry.id))
+        return keys
+
+    # -- queries -----------------------------------------------------------
+
+    def search(self, prefix: str, limit: int = 10) -> list[AirportEntry]:
+        """Best `limit` airports whose code, city or name (or a word of them)
+        starts with `prefix`, case-insensitively."""
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return []
+        best: dict[int, int] = {}
+        with self._lock:
+            lo = bisect.bisect_left(self._keys, (prefix,))
+            hi = bisect.bisect_left(self._keys, (prefix + "\uffff",), lo)
+            for key, kind, airport_id in self._keys[lo:hi]:
+                if kind == _CODE and key == prefix:
+                    kind = _EXACT_CODE
+                if airport_id not in best or kind < best[airport_id]:
+                    best[airport_id] = kind
+            airports = self._airports
+            ranked = heapq.nsmallest(
+                limit, best.items(), key=lambda item: (item[1], airports[item[0]].code or "", item[0]),
+            )
+            return [airports[airport_id] for airport_id, _ in ranked]
+
+    def nearby(self, latitude: float, longitude: float, radius_km: float,
+               limit: int | None = None) -> list[tuple[AirportEntry, float]]:
+        """Airports within `radius_km` of a point as (airport, distance in km), nearest first."""
+        with self._lock:
+            ids, points = self._coordinates()
+            airports = self._airports
+        if not len(ids):
+            return []
+        lat, lon = np.radians(latitude), np.radians(longitude)
+        # haversine against every airport at once
+        a = (np.sin((points[:, 0] - lat) / 2) ** 2
+             + np.cos(lat) * np.cos(points[:, 0]) * np.sin((points[:, 1] - lon) / 2) ** 2)
+        distances = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+        hits = np.flatnonzero(distances <= radius_km)
+        hits = hits[np.argsort(distances[hits], kind="stable")][:limit]
+        return [(airports[int(ids[i])], float(distances[i])) for i in hits]
+
+    def within(self, airport_id: int, radius_km: float) -> list[int]:
+        """Ids of the airports within `radius_km` of `airport_id`, itself first.
+
+        An airport without coordinates only matches itself.
+        """
+        with self._lock:
+            entry = self._airports.get(airport_id)
+        if entry is None or entry.latitude is None or entry.longitude is None:
+            return [airport_id]
+        others = [a.id for a, _ in self.nearby(entry.latitude, entry.longitude, radius_km) if a.id != airport_id]
+        return [airport_id, *others]
+
+    def _coordinates(self) -> tuple[np.ndarray, np.ndarray]:
+        if self._points is None:
+            located = [a for a in self._airports.values() if a.latitude is not None and a.longitude is not None]
+            self._points = (
+                np.array([a.id for a in located], dtype=np.int64),
+                np.radians(np.array([(a.latitude, a.longitude) for a in located], dtype=float).reshape(-1, 2)),
+            )
+        return self._points
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "airports": len(self._airports),
+                "located": sum(a.latitude is not None and a.longitude is not None for a in self._airports.values()),
+                "keys": len(self._keys),
+                "builds": self.builds,
+                "age_seconds": None if self._built_at is None else round(time.monotonic() - self._built_at, 1),
+            }
+
+
+airport_index = AirportIndex(max_age_seconds=float(os.getenv("REFERENCE_DATA_MAX_AGE_SECONDS", "300")))
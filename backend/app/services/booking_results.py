@@ -0,0 +1,142 @@
+"""
+Booking and ticket results for the booking, payment and my-bookings routes.
+
+These used to be built as `BookingResponse` / `TicketInfoSimplified` pydantic
+models in each route (validated once there and again by `response_model`).
+They are now slotted dataclasses built straight from the ORM rows and written
+out by `ORJSONResponse`, which serializes dataclasses natively: one small
+object per ticket and booking, no validation of data the server produced.
+Field order and names match `BookingResponse`, so the JSON is unchanged.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+
+
+_SEAT_CLASS_ABBR = {
+    # API tier names
+    "ECONOMY": "EC",
+    "ECONOMY_FLEX": "ECF",
+    "BUSINESS": "BUS",
+    "FIRST": "FC",
+    # Database names
+    "Economy": "EC",
+    "Premium Economy": "ECF",
+    "Business": "BUS",
+    "First": "FC",
+}
+
+
+def format_flight_seat(seat_class: str, seat_number: str) -> str:
+    """Format flight seat as 'SEAT_CLASS - SEAT_NUMBER' (e.g., 'EC - 32')."""
+    abbr = _SEAT_CLASS_ABBR.get(seat_class) or _SEAT_CLASS_ABBR.get(seat_class.upper(), seat_class[:2].upper())
+    return f"{abbr} - {seat_number}"
+
+
+@dataclass(slots=True)
+class TicketResult:
+    """`TicketInfoSimplified` as a slotted object."""
+    flight_seat: str
+    passenger_name: str
+    passenger_age: int | None
+    passenger_gender: str | None
+    airline_name: str
+    flight_number: str
+    route: str
+    departure_airport: str
+    arrival_airport: str
+    departure_city: str
+    arrival_city: str
+    departure_time: datetime
+    arrival_time: datetime
+    seat_number: str
+    seat_class: str
+    payment_required: float
+    currency: str
+    ticket_number: str | None = None
+    issued_at: datetime | None = None
+
+
+@dataclass(slots=True)
+class BookingResult:
+    """`BookingResponse` as a slotted object."""
+    pnr: str | None
+    booking_reference: str | None
+    status: str
+    created_at: datetime
+    total_fare: float
+    tickets: list[TicketResult]
+    transaction_id: str | None = None
+    paid_amount: float | None = None
+    expires_at: datetime | None = None
+
+
+@dataclass(slots=True)
+class BulkBookingItemResult:
+    """`BulkBookingItem` as a slotted object."""
+    index: int
+    booking: BookingResult | None = None
+    error: str | None = None
+
+
+def ticket_result(ticket, missing_seat: str = "") -> TicketResult:
+    """`ticket` as a result; `missing_seat` stands in for an unassigned seat in `flight_seat`."""
+    seat_class = ticket.seat_class or "ECONOMY"
+    seat_number = ticket.seat_number or ""
+    return TicketResult(
+        format_flight_seat(seat_class, seat_number or missing_seat),
+        ticket.passenger_name,
+        ticket.passenger_age,
+        ticket.passenger_gender,
+        ticket.airline_name,
+        ticket.flight_number,
+        ticket.route,
+        ticket.departure_airport,
+        ticket.arrival_airport,
+        ticket.departure_city,
+        ticket.arrival_city,
+        ticket.departure_time,
+        ticket.arrival_time,
+        seat_number,
+        seat_class,
+        float(ticket.payment_required),
+        ticket.currency,
+        ticket.ticket_number,
+        ticket.issued_at,
+    )
+
+
+def latest_successful_payment(booking):
+    """The most recent payment with status "Success", or None (booking routes)."""
+    successful = [p for p in booking.payments if p.status == "Success"]
+    return max(successful, key=lambda p: p.paid_at) if successful else None
+
+
+def first_successful_payment(booking):
+    """The first payment with status "Success" in `booking.payments`, or None (user routes)."""
+    return next((p for p in booking.payments if p.status == "Success"), None)
+
+
+def booking_result(booking, payment=None, total_fare: float | None = None,
+                   paid_amount: float | None = None, missing_seat: str = "") -> BookingResult:
+    """`booking` with its tickets; `payment` fills transaction_id and paid_amount.
+
+    `total_fare` defaults to the sum of the tickets' fares. `missing_seat` is
+    shown in `flight_seat` for tickets without a seat; the user routes have
+    always said "TBA" there.
+    """
+    tickets = [ticket_result(t, missing_seat) for t in booking.tickets]
+    if total_fare is None:
+        total_fare = sum(t.payment_required for t in tickets)
+    if payment is not None:
+        paid_amount = payment.amount
+    return BookingResult(
+        booking.pnr,
+        booking.booking_reference,
+        booking.status,
+        booking.created_at,
+        float(total_fare),
+        tickets,
+        payment.transaction_id if payment is not None else None,
+        float(paid_amount) if paid_amount is not None else None,
+        booking.expires_at,
+    )
@@ -0,0 +1,197 @@
+"""
+In-memory index of upcoming flights for connecting-itinerary search.
+
+Flights are kept per (departure airport, arrival airport) route as lists
+sorted by departure time, so a one-stop search is a bisect over the first
+leg's route and, for each first leg, a bisect over the layover window on the
+second leg's route. No self-join on `flights` runs per request.
+
+The index only holds schedule data (airports and times); prices and seat
+counts are read fresh for the candidate legs. It is built on first use,
+updated in place by `upsert_flight`/`remove_flight` when flights are created,
+edited or deleted through this process, and rebuilt after
+`CONNECTION_INDEX_MAX_AGE_SECONDS` to pick up changes made elsewhere (other
+workers, the seeding script).
+"""
+import bisect
+import heapq
+import os
+import threading
+import time
+from collections import defaultdict, namedtuple
+from datetime import datetime, timedelta
+from typing import Any, Callable, Iterator
+
+from sqlalchemy.orm import Session
+
+from app.models.flight import Flight
+from app.utils.cache import SingleFlight
+
+
+Leg = namedtuple("Leg", "id departure_airport_id arrival_airport_id departure_time arrival_time")
+
+
+class ConnectionIndex:
+    """Upcoming flights keyed by route and sorted by departure time."""
+
+    def __init__(self, max_age_seconds: float = 300.0, history_hours: int = 24):
+        self.max_age_seconds = max_age_seconds
+        # flights that departed up to this long ago are still indexed
+        self.history_hours = history_hours
+        self._lock = threading.RLock()
+        self._legs: dict[int, Leg] = {}
+        self._routes: dict[tuple[int, int], list[tuple[datetime, int]]] = defaultdict(list)
+        self._destinations: dict[int, set[int]] = defaultdict(set)
+        self._built_at: float | None = None
+        self._rebuilds = SingleFlight()
+        self.builds = 0
+
+    # -- maintenance -------------------------------------------------------
+
+    def rebuild(self, db: Session) -> int:
+        """Reload every upcoming flight. Returns the number indexed."""
+        since = datetime.utcnow() - timedelta(hours=self.history_hours)
+        rows = (
+            db.query(Flight.id, Flight.departure_airport_id, Flight.arrival_airport_id,
+                     Flight.departure_time, Flight.arrival_time)
+            .filter(Flight.departure_time >= since)
+            .all()
+        )
+        legs: dict[int, Leg] = {}
+        routes: dict[tuple[int, int], list[tuple[datetime, int]]] = defaultdict(list)
+        destinations: dict[int, set[int]] = defaultdict(set)
+        for row in rows:
+            leg = Leg(*row)
+            if not self._indexable(leg):
+                continue
+            legs[leg.id] = leg
+            routes[(leg.departure_airport_id, leg.arrival_airport_id)].append((leg.departure_time, leg.id))
+            destinations[leg.departure_airport_id].add(leg.arrival_airport_id)
+        for entries in routes.values():
+            entries.sort()
+
+        with self._lock:
+            self._legs, self._routes, self._destinations = legs, routes, destinations
+            self._built_at = time.monotonic()
+            self.builds += 1
+        return len(legs)
+
+    def ensure_fresh(self, db: Session) -> None:
+        with self._lock:
+            built_at = self._built_at
+        if built_at is None or time.monotonic() - built_at > self.max_age_seconds:
+            # concurrent requests wait for one rebuild instead of each running one
+            self._rebuilds.do("rebuild", lambda: self.rebuild(db))
+
+    def upsert_flight(self, flight: Flight) -> None:
+        """Add `flight`, or move it if its airports or times changed."""
+        leg = Leg(flight.id, flight.departure_airport_id, flight.arrival_airport_id,
+                  flight.departure_time, flight.arrival_time)
+        with self._lock:
+            if self._built_at is None:
+                return  # picked up by the first build
+            self._remove(flight.id)
+            if self._indexable(leg):
+                self._legs[leg.id] = leg
+                bisect.insort(self._routes[(leg.departure_airport_id, leg.arrival_airport_id)], (leg.departure_time, leg.id))
+                self._destinations[leg.departure_airport_id].add(leg.arrival_airport_id)
+
+    def remove_flight(self, flight_id: int) -> None:
+        with self._lock:
+            self._remove(flight_id)
+
+    def invalidate(self) -> None:
+        """Force a rebuild on next use."""
+        with self._lock:
+            self._built_at = None
+
+    def _remove(self, flight_id: int) -> None:
+        leg = self._legs.pop(flight_id, None)
+        if leg is None:
+            return
+        entries = self._routes.get((leg.departure_airport_id, leg.arrival_airport_id), [])
+        i = bisect.bisect_left(entries, (leg.departure_time, leg.id))
+        if i < len(entries) and entries[i][1] == leg.id:
+            del entries[i]
+
+    @staticmethod
+    def _indexable(leg: Leg) -> bool:
+        return None not in leg and leg.arrival_time > leg.departure_time
+
+    # -- queries -----------------------------------------------------------
+
+    def connection_legs(self, origin_id: int, destination_id: int, start: datetime, end: datetime,
+                        min_layover: timedelta, max_layover: timedelta) -> set[int]:
+        """Ids of every leg `connections()` can pair with the same arguments.
+
+        One bisect per connecting airport and leg instead of walking the
+        pairs, so callers can load fares and seats before ranking.
+        """
+        leg_ids: set[int] = set()
+        with self._lock:
+            for via in self._destinations.get(origin_id, ()):
+                if via in (origin_id, destination_id):
+                    continue
+                second_route = self._routes.get((via, destination_id))
+                if not second_route:
+                    continue
+                first_legs = self._window(self._routes.get((origin_id, via), []), start, end)
+                if not first_legs:
+                    continue
+                leg_ids.update(leg.id for leg in first_legs)
+                arrivals = [leg.arrival_time for leg in first_legs]
+                leg_ids.update(leg.id for leg in self._window(
+                    second_route, min(arrivals) + min_layover, max(arrivals) + max_layover + timedelta(microseconds=1),
+                ))
+        return leg_ids
+
+    def connections(self, origin_id: int, destination_id: int, start: datetime, end: datetime,
+                    min_layover: timedelta, max_layover: timedelta,
+                    key: Callable[[Leg, Leg], Any] | None = None, limit: int | None = None) -> list[tuple[Leg, Leg]]:
+        """One-stop (first leg, second leg) pairs from origin to destination.
+
+        The first leg departs in [start, end); the second leaves the connecting
+        airport between `min_layover` and `max_layover` after the first lands.
+        With `key`, returns the `limit` pairs with the smallest key(leg1, leg2),
+        best first, skipping pairs whose key is None; only those are kept
+        while scanning, so busy routes rank every pair in bounded memory.
+        """
+        with self._lock:
+            pairs = self._pairs(origin_id, destination_id, start, end, min_layover, max_layover)
+            if key is None:
+                return list(pairs)
+            ranked = ((k, leg1, leg2) for leg1, leg2 in pairs if (k := key(leg1, leg2)) is not None)
+            best = heapq.nsmallest(limit, ranked) if limit is not None else sorted(ranked)
+        return [(leg1, leg2) for _, leg1, leg2 in best]
+
+    def _pairs(self, origin_id: int, destination_id: int, start: datetime, end: datetime,
+               min_layover: timedelta, max_layover: timedelta) -> Iterator[tuple[Leg, Leg]]:
+        # caller must hold self._lock
+        for via in self._destinations.get(origin_id, ()):
+            if via in (origin_id, destination_id):
+                continue
+            second_route = self._routes.get((via, destination_id))
+            if not second_route:
+                continue
+            for leg1 in self._window(self._routes.get((origin_id, via), []), start, end):
+                window = self._window(second_route, leg1.arrival_time + min_layover,
+                                      leg1.arrival_time + max_layover + timedelta(microseconds=1))
+                for leg2 in window:
+                    yield leg1, leg2
+
+    def _window(self, entries: list[tuple[datetime, int]], start: datetime, end: datetime) -> list[Leg]:
+        lo = bisect.bisect_left(entries, (start, -1))
+        hi = bisect.bisect_left(entries, (end, -1))
+        return [self._legs[fid] for _, fid in entries[lo:hi]]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "flights": len(self._legs),
+                "routes": sum(1 for entries in self._routes.values() if entries),
+                "builds": self.builds,
+                "age_seconds": None if self._built_at is None else round(time.monotonic() - self._built_at, 1),
+            }
+
+
+connection_index = ConnectionIndex(max_age_seconds=float(os.getenv("CONNECTION_INDEX_MAX_AGE_SECONDS", "300")))
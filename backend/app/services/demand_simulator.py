@@ -1,18 +1,24 @@
 import random
 from datetime import datetime, timezone, timedelta
-from typing import List, Dict
+from typing import List
 
 from sqlalchemy.orm import Session
-from sqlalchemy import func, case
 
 from app.models.flight import Flight
 from app.models.seat import Seat
+from app.services.fare_service import TIME_SENSITIVE_HOURS, refresh_current_prices
+from app.services.flight_locks import flight_locks
+from app.services.flight_service import invalidate_flight_cache
+from app.services.inventory_service import adjust_available, get_inventory_map
 
 
 def run_demand_simulation_once(db: Session, within_hours: int = 168) -> int:
     """Run one iteration of demand simulation for upcoming flights within `within_hours`.
 
     OPTIMIZED: Uses batched updates instead of per-flight commits.
+    Seats are picked and taken under the simulated flights' locks (row locks
+    or `flight_locks`), so a booking committing meanwhile can't lose its seat;
+    prices are refreshed after the locks are released.
     Returns number of flights updated.
     """
     now = datetime.now(timezone.utc)
@@ -28,29 +34,10 @@ def run_demand_simulation_once(db: Session, within_hours: int = 168) -> int:
         Flight.departure_time <= cutoff
     ).all()
     
-    if not flights:
-        return 0
-    
     flight_ids = [f.id for f in flights]
     
-    # Get total seats per flight
-    total_query = db.query(
-        Seat.flight_id,
-        func.count(Seat.id).label('total')
-    ).filter(Seat.flight_id.in_(flight_ids)).group_by(Seat.flight_id).all()
-    
-    total_seats_map: Dict[int, int] = {r.flight_id: r.total for r in total_query}
-    
-    # Get available seats per flight
-    avail_query = db.query(
-        Seat.flight_id,
-        func.count(Seat.id).label('available')
-    ).filter(
-        Seat.flight_id.in_(flight_ids),
-        Seat.is_available == True
-    ).group_by(Seat.flight_id).all()
-    
-    avail_seats_map: Dict[int, int] = {r.flight_id: r.available for r in avail_query}
+    # Seat counts come from the inventory counters (one query)
+    inventory = get_inventory_map(db, flight_ids)
     
     # Base rate according to demand_level
     base_rate_map = {
@@ -60,11 +47,13 @@ def run_demand_simulation_once(db: Session, within_hours: int = 168) -> int:
         "extreme": 10,
     }
     
-    all_seat_ids_to_book = []
+    seat_changes = {}
+    changed_flight_ids = []
+    to_book_by_flight = {}
     
     for flight in flights:
-        total_seats = total_seats_map.get(flight.id, 0)
-        available = avail_seats_map.get(flight.id, 0)
+        total_seats = inventory[flight.id]["total"]
+        available = inventory[flight.id]["available"]
         
         if total_seats == 0 or available == 0:
             continue
@@ -82,25 +71,45 @@ def run_demand_simulation_once(db: Session, within_hours: int = 168) -> int:
         to_book = min(new_bookings, available)
         
         if to_book > 0:
-            # Get seat IDs to book
-            seat_ids = [s.id for s in db.query(Seat.id).filter(
-                Seat.flight_id == flight.id,
-                Seat.is_available == True
-            ).limit(to_book).all()]
-            all_seat_ids_to_book.extend(seat_ids)
+            to_book_by_flight[flight.id] = to_book
         
         # Check if demand level should escalate
         remaining_pct = (available - to_book) / total_seats if total_seats > 0 else 0
         if remaining_pct < 0.2 and (flight.demand_level or "").lower() not in ("high", "extreme"):
             flight.demand_level = "high"
+            changed_flight_ids.append(flight.id)
     
-    # Batch update all seats in one query
-    if all_seat_ids_to_book:
-        db.query(Seat).filter(Seat.id.in_(all_seat_ids_to_book)).update(
-            {"is_available": False}, synchronize_session=False
-        )
-    
-    # Single commit for all changes
+    with flight_locks.hold(*to_book_by_flight):
+        for flight_id, to_book in to_book_by_flight.items():
+            # Get seat IDs to book
+            seats = db.query(Seat.id, Seat.seat_class).filter(
+                Seat.flight_id == flight_id,
+                Seat.is_available == True
+            ).limit(to_book).with_for_update(skip_locked=True).all()
+            by_class = {}
+            for seat in seats:
+                by_class.setdefault(seat.seat_class, []).append(seat.id)
+            # Count only the seats this UPDATE took: a booking may have claimed some since the read
+            for seat_class, seat_ids in by_class.items():
+                taken = db.query(Seat).filter(Seat.id.in_(seat_ids), Seat.is_available == True).update(
+                    {"is_available": False}, synchronize_session=False
+                )
+                if taken:
+                    seat_changes[(flight_id, seat_class)] = -taken
+            changed_flight_ids.append(flight_id)
+
+        adjust_available(db, seat_changes)
+        db.commit()
+
+    # Re-price the simulated flights, and every flight whose time multiplier
+    # may have stepped since the last run; outside the locks, as this touches
+    # every flight in the window
+    changed_flight_ids.extend(refresh_current_prices(
+        db, departing_within=timedelta(hours=max(within_hours, TIME_SENSITIVE_HOURS + 24)), now=now,
+    ))
     db.commit()
+
+    # Seats and prices moved on these flights; drop their cached searches
+    invalidate_flight_cache(changed_flight_ids)
     
     return len(flights)
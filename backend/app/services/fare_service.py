@@ -0,0 +1,152 @@
+"""
+Materialized current fares.
+
+Each flight stores its current dynamic fare per tier (`Flight.price_economy`,
+`price_business`, `price_first`) so search can sort, filter and paginate on
+the price users actually see in indexed SQL instead of pricing every
+matching flight in Python.
+
+Stored fares are recomputed with the pricing engine whenever an input
+changes: bookings and cancellations (seat counts), the demand simulator (seat
+counts, demand level) and flight create/edit (base fare, times). The time
+multiplier also steps up as departure approaches, so the simulator refreshes
+every flight departing within `TIME_SENSITIVE_HOURS` on each run.
+"""
+from datetime import datetime, timedelta
+from typing import Iterable
+
+from sqlalchemy import bindparam
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
+
+from app.models.flight import Flight
+from app.services.inventory_service import get_inventory_map
+from app.services.pricing_engine import compute_dynamic_price, compute_dynamic_prices
+
+
+# API tier -> Flight attribute holding its current fare
+TIER_PRICE_COLUMNS = {"ECONOMY": "price_economy", "BUSINESS": "price_business", "FIRST": "price_first"}
+
+# Stored fare columns, for queries that read them next to other flight fields
+PRICE_COLUMNS = (Flight.price_economy, Flight.price_business, Flight.price_first)
+
+# Beyond this many hours before departure the time multiplier no longer changes
+TIME_SENSITIVE_HOURS = 720
+
+_CHUNK = 500
+
+
+def price_tier(tier: str | None) -> str:
+    """Materialized tier for a search tier (tier="all" sorts on ECONOMY)."""
+    tier = (tier or "ECONOMY").upper()
+    return tier if tier in TIER_PRICE_COLUMNS else "ECONOMY"
+
+
+def price_column(tier: str | None):
+    """Flight column holding the current fare for `tier`."""
+    return getattr(Flight, TIER_PRICE_COLUMNS[price_tier(tier)])
+
+
+def price_flights(rows, inventory: dict, tier: str, now: datetime) -> list[float]:
+    """Fares for `rows` (objects with id, base_price, departure_time,
+    demand_level) computed in one batch pricing call, all against the same `now`."""
+    stats = [inventory[r.id] for r in rows]
+    args = (
+        [r.base_price for r in rows],
+        [r.departure_time for r in rows],
+        [st["total"] for st in stats],
+        [max(st["total"] - st["available"], 0) for st in stats],
+        [r.demand_level or "medium" for r in rows],
+    )
+    try:
+        return compute_dynamic_prices(*args, tiers=tier, now=now)
+    except ValueError:
+        # a bad row fails the whole batch; price row by row, falling back to the base fare
+        prices = []
+        for base_fare, departure_time, total_seats, booked_seats, demand_level in zip(*args):
+            try:
+                prices.append(compute_dynamic_price(base_fare, departure_time, total_seats, booked_seats,
+                                                    demand_level, tier=tier, now=now))
+            except Exception:
+                prices.append(float(base_fare or 0.0))
+        return prices
+
+
+def current_prices(rows, inventory: dict, tier: str, now: datetime) -> list[float]:
+    """Stored fares for `rows` in `tier`; rows not yet materialized are priced live.
+
+    `rows` must carry the tier's price column as well as the `price_flights` fields.
+    """
+    column = TIER_PRICE_COLUMNS[price_tier(tier)]
+    prices = [getattr(r, column) for r in rows]
+    missing = [i for i, price in enumerate(prices) if price is None]
+    if missing:
+        live = price_flights([rows[i] for i in missing], inventory, price_tier(tier), now)
+        for i, price in zip(missing, live):
+            prices[i] = price
+    return prices
+
+
+def refresh_current_prices(db: Session, flight_ids: Iterable[int] | None = None,
+                           departing_within: timedelta | None = None, now: datetime | None = None) -> list[int]:
+    """Recompute stored fares from the pricing engine and seat counters.
+
+    Refreshes `flight_ids`, or every flight when None; `departing_within`
+    limits that to flights departing between now and now + departing_within.
+    Only rows whose fares moved are written. Does not commit: call it inside
+    the transaction that changed the inputs. Returns the ids that changed.
+    """
+    now = now or datetime.utcnow()
+    # pending demand level / fare / schedule edits must be priced too
+    db.flush()
+    query = db.query(Flight.id, Flight.base_price, Flight.departure_time, Flight.demand_level, *PRICE_COLUMNS)
+    if departing_within is not None:
+        query = query.filter(Flight.departure_time >= now, Flight.departure_time < now + departing_within)
+
+    if flight_ids is None:
+        rows = query.all()
+    else:
+        ids = list(set(flight_ids))
+        rows = []
+        for i in range(0, len(ids), _CHUNK):
+            rows.extend(query.filter(Flight.id.in_(ids[i:i + _CHUNK])).all())
+
+    table = Flight.__table__
+    statement = table.update().where(table.c.id == bindparam("_id"))
+    changed: list[int] = []
+    for i in range(0, len(rows), _CHUNK):
+        chunk = rows[i:i + _CHUNK]
+        inventory = get_inventory_map(db, [r.id for r in chunk])
+        fares = {column: price_flights(chunk, inventory, tier, now) for tier, column in TIER_PRICE_COLUMNS.items()}
+        updates = []
+        for j, row in enumerate(chunk):
+            values = {column: fares[column][j] for column in TIER_PRICE_COLUMNS.values()}
+            if any(getattr(row, column) != value for column, value in values.items()):
+                updates.append({"_id": row.id, **values})
+        if updates:
+            db.execute(statement, updates)
+            _sync_loaded_flights(db, updates)
+            changed.extend(u["_id"] for u in updates)
+    return changed
+
+
+def _sync_loaded_flights(db: Session, updates: list[dict]) -> None:
+    # Flight objects already in the session would otherwise keep the old fares
+    # (sessions don't expire on commit)
+    for values in updates:
+        flight = db.identity_map.get(identity_key(Flight, values["_id"]))
+        if flight is None:
+            continue
+        for column in TIER_PRICE_COLUMNS.values():
+            set_committed_value(flight, column, values[column])
+
+
+def ensure_current_prices(db: Session) -> int:
+    """Materialize fares for flights that have none yet (e.g. created by an
+    older release). Commits; returns the number of flights priced."""
+    flight_ids = [r[0] for r in db.query(Flight.id).filter(Flight.price_economy.is_(None)).all()]
+    if flight_ids:
+        refresh_current_prices(db, flight_ids)
+        db.commit()
+    return len(flight_ids)
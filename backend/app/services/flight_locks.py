@@ -0,0 +1,138 @@
+"""
+Per-flight locks held in the application process.
+
+PostgreSQL and MySQL serialize writers to one flight's seats with row locks
+(`with_for_update()`). SQLite has none: FOR UPDATE compiles to nothing, so a
+cancellation's check-then-release or the simulator's pick-then-take can
+interleave with a booking on the same flight, and the only arbitration left
+is SQLite's database-wide write lock, which surfaces as "database is locked"
+errors that `transaction_retry` sleeps on.
+
+Where the database has no row locks, booking, cancellation and the demand
+simulator take `flight_locks.hold(flight_id, ...)` around their read-modify-
+write of a flight's seats instead. Flights map onto a fixed number of
+stripes (`FLIGHT_LOCK_STRIPES`), so memory stays constant however many
+flights exist; two flights sharing a stripe just serialize. Several flights
+are locked in stripe order, so callers can't deadlock each other.
+
+Each stripe counts acquisitions, how many had to wait and for how long;
+`stats()` sums them for the /flights/locks/stats endpoint. The locks only
+coordinate threads of one process: run a single worker on SQLite.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from app.config import engine
+from app.services.inventory_service import SeatContention
+
+
+class FlightLockTimeout(SeatContention):
+    """A flight lock wasn't acquired within the manager's timeout.
+
+    Like losing a race for seats, repeating the request may succeed: routes
+    answer it with 409, and bulk bookings report it per booking.
+    """
+
+
+class _Stripe:
+    __slots__ = ("lock", "acquired", "contended", "wait_seconds", "max_wait_seconds", "timeouts")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # updated only while `lock` is held
+        self.acquired = 0
+        self.contended = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+
+
+class StripedLockManager:
+    """Mutual exclusion per flight id over `stripes` locks."""
+
+    def __init__(self, stripes: int = 64, timeout_seconds: float = 10.0, enabled: bool = True):
+        if stripes < 1:
+            raise ValueError("stripes must be at least 1")
+        self.timeout_seconds = timeout_seconds
+        self.enabled = enabled
+        self._stripes = [_Stripe() for _ in range(stripes)]
+        self._timeouts_lock = threading.Lock()
+
+    def stripe_of(self, flight_id: int) -> int:
+        return hash(flight_id) % len(self._stripes)
+
+    @contextmanager
+    def hold(self, *flight_ids: int | None) -> Iterator[None]:
+        """Hold the locks of `flight_ids` for the block; a no-op when disabled.
+
+        Raises FlightLockTimeout if one of them isn't free within the timeout.
+        """
+        if not self.enabled:
+            yield
+            return
+        indexes = sorted({self.stripe_of(fid) for fid in flight_ids if fid is not None})
+        held: list[_Stripe] = []
+        try:
+            for index in indexes:
+                stripe = self._stripes[index]
+                self._acquire(stripe)
+                held.append(stripe)
+            yield
+        finally:
+            for stripe in reversed(held):
+                stripe.lock.release()
+
+    def _acquire(self, stripe: _Stripe) -> None:
+        if stripe.lock.acquire(blocking=False):
+            stripe.acquired += 1
+            return
+        started = time.perf_counter()
+        if not stripe.lock.acquire(timeout=self.timeout_seconds):
+            with self._timeouts_lock:
+                stripe.timeouts += 1
+            raise FlightLockTimeout("This flight is busy right now; please try again")
+        waited = time.perf_counter() - started
+        stripe.acquired += 1
+        stripe.contended += 1
+        stripe.wait_seconds += waited
+        stripe.max_wait_seconds = max(stripe.max_wait_seconds, waited)
+
+    def stats(self) -> dict:
+        stripes = self._stripes
+        acquired = sum(s.acquired for s in stripes)
+        contended = sum(s.contended for s in stripes)
+        waited = sum(s.wait_seconds for s in stripes)
+        return {
+            "enabled": self.enabled,
+            "stripes": len(stripes),
+            "held": sum(1 for s in stripes if s.lock.locked()),
+            "acquisitions": acquired,
+            "contended": contended,
+            "contention_rate": round(contended / acquired, 4) if acquired else 0.0,
+            "wait_seconds_total": round(waited, 6),
+            "wait_seconds_avg": round(waited / contended, 6) if contended else 0.0,
+            "wait_seconds_max": round(max(s.max_wait_seconds for s in stripes), 6),
+            "timeouts": sum(s.timeouts for s in stripes),
+        }
+
+    def reset_stats(self) -> None:
+        for stripe in self._stripes:
+            stripe.acquired = stripe.contended = stripe.timeouts = 0
+            stripe.wait_seconds = stripe.max_wait_seconds = 0.0
+
+
+def _needs_app_locks(mode: str) -> bool:
+    # "auto": only where FOR UPDATE doesn't lock rows
+    if mode == "auto":
+        return engine.dialect.name == "sqlite"
+    return mode == "on"
+
+
+flight_locks = StripedLockManager(
+    stripes=int(os.getenv("FLIGHT_LOCK_STRIPES", "64")),
+    timeout_seconds=float(os.getenv("FLIGHT_LOCK_TIMEOUT_SECONDS", "10")),
+    enabled=_needs_app_locks(os.getenv("FLIGHT_LOCKS", "auto").lower()),
+)
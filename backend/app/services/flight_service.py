@@ -1,10 +1,14 @@
-from sqlalchemy.orm import Session, joinedload, selectinload
-from sqlalchemy import func, case, literal
+from sqlalchemy.orm import Session, aliased, joinedload, selectinload
+from sqlalchemy import func, case, literal, and_, or_, bindparam, select, exists, update, insert, delete
 from sqlalchemy.exc import IntegrityError
-from datetime import datetime, timedelta
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+import os
 import secrets
 import uuid
+from typing import Iterator
 
+from app.config import SessionLocal
 from app.models.flight import Flight
 from app.models.airport import Airport
 from app.models.airline import Airline
@@ -15,210 +19,898 @@ from app.models.payment import Payment
 from app.models.user import User
 from app.models.aircraft import Aircraft
 from app.models.aircraft_seat_template import AircraftSeatTemplate
+from app.models.seat_inventory import FlightSeatInventory
 from app.services.pricing_engine import compute_dynamic_price
+from app.services.fare_service import (
+    PRICE_COLUMNS, current_prices, price_column, price_tier, refresh_current_prices,
+)
+from app.services.airport_index import airport_index
+from app.services.connection_index import connection_index
+from app.services.flight_locks import flight_locks
+from app.services.ranking import top_k
+from app.services.search_facets import (
+    TIME_OF_DAY_BUCKETS, Candidate, facet_counts, time_of_day, time_of_day_clause,
+)
+from app.services.reference_data import reference_data
+from app.services.inventory_service import (
+    DB_CLASS_TO_TIER, adjust_available, claim_seats, get_flight_inventory, get_inventory_map, rebuild_seat_inventory,
+    seat_deltas, seats_by_tier,
+)
+from app.utils.cache import CacheLoader, create_cache
+from app.utils.pagination import decode_cursor, encode_cursor
+
+
+# Bounded LRU cache for search results (in-process, or a SQLite file shared by
+# all workers; see app.utils.cache.create_cache). Entries are tagged with the
+# flights they contain and the route they were searched on so bookings,
+# payments, the demand simulator and admin edits can drop exactly the
+# affected results.
+_search_cache = create_cache(
+    os.getenv("SEARCH_CACHE_BACKEND", "auto"),
+    namespace="search",
+    max_entries=int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1024")),
+    max_bytes=int(os.getenv("SEARCH_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+    ttl_seconds=float(os.getenv("SEARCH_CACHE_TTL_SECONDS", "60")),
+    # expired results are still served for this long while one refresh runs
+    stale_seconds=float(os.getenv("SEARCH_CACHE_STALE_SECONDS", "30")),
+)
+_search_loader = CacheLoader(_search_cache)
+
+
+def _make_cache_key(origin, destination, date, sort_by, days_flex, page, page_size, tier, after=None,
+                    min_price=None, max_price=None, max_duration=None, airlines=None, times_of_day=None,
+                    available_classes=None, prefer_time=None, origin_radius_km=None, destination_radius_km=None):
+    after = f"{after['v']}:{after['id']}" if after else ""
+    facets = "|".join(",".join(sorted(v)) if v else "" for v in (airlines, times_of_day, available_classes))
+    if origin_radius_km:
+        origin = f"{origin}~{origin_radius_km:g}"
+    if destination_radius_km:
+        destination = f"{destination}~{destination_radius_km:g}"
+    return (f"{origin}|{destination}|{date}|{sort_by}|{days_flex}|{page}|{page_size}|{tier}|{after}"
+            f"|{min_price}|{max_price}|{max_duration}|{facets}|{prefer_time or ''}")
+
+
+def _flight_tag(flight_id: int) -> str:
+    return f"flight:{flight_id}"
+
+
+def _route_tag(origin: str | None, destination: str | None) -> str:
+    return f"route:{origin or '*'}:{destination or '*'}"
+
+
+def _route_tags(db: Session, origin: str | None, destination: str | None,
+                origin_radius_km: float | None = None, destination_radius_km: float | None = None) -> list[str]:
+    """Route tags for a search; a radius search is tagged with every airport pair it covers.
+
+    A flight created or moved at any airport inside the radius then drops the
+    cached result through `invalidate_route_cache`, not only one at the
+    searched airports.
+    """
+    return [_route_tag(o, d) for o in _radius_codes(db, origin, origin_radius_km)
+            for d in _radius_codes(db, destination, destination_radius_km)]
 
 
-_cache: dict = {}
-_CACHE_TTL_SECONDS = 60
+def _radius_codes(db: Session, code: str | None, radius_km: float | None) -> list[str | None]:
+    if code is None or not radius_km:
+        return [code]
+    ids = _airport_ids(db, code, radius_km)
+    if ids is None:
+        return [code]
+    airports = (reference_data.airport_by_id(db, airport_id) for airport_id in ids)
+    return [code, *(a.code for a in airports if a is not None and a.code != code)]
 
 
-def _make_cache_key(origin, destination, date, sort_by, days_flex, page, page_size, tier):
-    return f"{origin}|{destination}|{date}|{sort_by}|{days_flex}|{page}|{page_size}|{tier}"
+def invalidate_flight_cache(flight_ids) -> int:
+    """Drop cached search results containing any of `flight_ids`."""
+    return _search_cache.invalidate_tags(_flight_tag(fid) for fid in set(flight_ids) if fid is not None)
 
 
-def _get_cached(key: str):
-    entry = _cache.get(key)
-    if not entry:
-        return None
-    ts, value = entry
-    import time
-    if time.time() - ts > _CACHE_TTL_SECONDS:
-        del _cache[key]
-        return None
-    return value
+def invalidate_route_cache(origin: str | None, destination: str | None) -> int:
+    """Drop cached searches that could include a flight on origin -> destination.
+
+    Used when a flight is created or moved to another route, since such a flight
+    is not yet tagged on any cached result.
+    """
+    tags = {_route_tag(origin, destination), _route_tag(origin, None), _route_tag(None, destination), _route_tag(None, None)}
+    return _search_cache.invalidate_tags(tags)
+
+
+def get_search_cache_stats() -> dict:
+    return _search_loader.stats()
+
+
+# sort_by -> column the results are ordered on; Flight.id breaks ties.
+# "price" sorts on the searched tier's stored fare (see _sort_column).
+_SORT_COLUMNS = {
+    None: Flight.departure_time,
+    "price": Flight.price_economy,
+    "duration": Flight.duration_minutes,
+}
+
+# Orders computed in Python from the candidates rather than by SQL; they page
+# with page/page_size or limit, not cursors (see _rank_best)
+_RANKED_SORTS = {"best"}
+
+
+def _check_sort(sort_by: str | None, prefer_time: str | None = None) -> None:
+    if sort_by not in _SORT_COLUMNS and sort_by not in _RANKED_SORTS:
+        raise ValueError(f"unsupported sort_by: {sort_by}")
+    if prefer_time is not None and prefer_time not in TIME_OF_DAY_BUCKETS:
+        raise ValueError(f"unknown prefer_time: {prefer_time}")
+
+
+def _sort_column(sort_by: str | None, tier: str | None):
+    if sort_by == "price":
+        return price_column(tier)
+    return _SORT_COLUMNS[sort_by]
 
 
-def _set_cached(key: str, value):
-    import time
-    _cache[key] = (time.time(), value)
+def _sort_value(flight: dict, sort_by: str | None):
+    """Value of the sort column for a formatted search result."""
+    if sort_by == "price":
+        return flight["current_price"]
+    if sort_by == "duration":
+        return Flight.compute_duration_minutes(flight["departure_time"], flight["arrival_time"])
+    return flight["departure_time"].isoformat()
+
+
+def _decode_search_cursor(cursor: str, sort_by: str | None) -> dict:
+    if sort_by in _RANKED_SORTS:
+        raise ValueError(f"sort_by={sort_by} pages with page/page_size, not cursor")
+    after = decode_cursor(cursor)
+    if after.get("s") != sort_by or "v" not in after or not isinstance(after.get("id"), int):
+        raise ValueError("cursor does not match this search")
+    if sort_by is None:
+        try:
+            after["v"] = datetime.fromisoformat(after["v"])
+        except (TypeError, ValueError):
+            raise ValueError("invalid cursor")
+    return after
 
 
-def search_flights(db: Session, origin: str | None = None, destination: str | None = None, date: str | None = None, sort_by: str | None = None, limit: int | None = None, days_flex: int = 0, tier: str = "ECONOMY", store_history: bool = False, page: int | None = None, page_size: int | None = None):
+def next_search_cursor(results: list[dict], sort_by: str | None, page_size: int | None) -> str | None:
+    """Opaque cursor for the page after `results`, or None on the last page.
+
+    Pass it back as `cursor` to `search_flights` with the same filters and sort.
+    """
+    if not results or not page_size or len(results) < page_size or sort_by in _RANKED_SORTS:
+        return None
+    last = results[-1]
+    return encode_cursor({"s": sort_by, "v": _sort_value(last, sort_by), "id": last["id"]})
+
+
+def search_flights(db: Session, origin: str | None = None, destination: str | None = None, date: str | None = None, sort_by: str | None = None, limit: int | None = None, days_flex: int = 0, tier: str = "ECONOMY", store_history: bool = False, page: int | None = None, page_size: int | None = None, cursor: str | None = None, min_price: float | None = None, max_price: float | None = None, max_duration: int | None = None, airlines: list[str] | None = None, times_of_day: list[str] | None = None, available_classes: list[str] | None = None, prefer_time: str | None = None, origin_radius_km: float | None = None, destination_radius_km: float | None = None):
     """Search flights with optional filters. Returns list of dicts matching `FlightResponse` schema.
-    
-    OPTIMIZED: Uses eager loading and batch queries to eliminate N+1 problem.
+
+    Reads only the response columns, seat counters included, with one Core
+    `select()` (`_search_select`); no `Flight` entities are loaded.
 
     origin/destination: airport codes (e.g., 'DEL')
+    origin_radius_km/destination_radius_km: also match airports within this
+        distance of origin/destination (see `AirportIndex.within`)
     date: YYYY-MM-DD or None
-    sort_by: 'price' or 'duration' or None
+    sort_by: 'price' (current fare in `tier`) or 'duration' or None (departure time),
+        or 'best': ranked by `ranking.top_k` on fare, duration and `prefer_time`
+    prefer_time: with sort_by='best', the `TIME_OF_DAY_BUCKETS` name departures
+        are preferred in
+    min_price/max_price: inclusive bounds on the current fare in `tier`
+    max_duration: longest flight time to include, in minutes
+    airlines: airline codes (any of)
+    times_of_day: `TIME_OF_DAY_BUCKETS` names the departure falls in (any of)
+    available_classes: tiers that must have a seat left (any of)
+    cursor: `next_search_cursor` of the previous page; continues after its last
+        row (keyset pagination) instead of skipping rows with OFFSET
+
+    Results are cached; identical concurrent searches share one computation and
+    expired entries are served stale while a single background refresh runs.
     """
-    # Check cache first
-    cache_key = _make_cache_key(origin, destination, date, sort_by, days_flex or 0, page or 0, page_size or (limit or 0), tier or "ECONOMY")
-    cached = _get_cached(cache_key)
-    if cached is not None:
-        return cached
-
-    # Build optimized query with eager loading of relationships
-    query = (
-        db.query(Flight)
-        .options(
-            joinedload(Flight.airline),
-            joinedload(Flight.aircraft),
-            joinedload(Flight.departure_airport),
-            joinedload(Flight.arrival_airport),
-        )
+    _check_sort(sort_by, prefer_time)
+    _check_facet_values(times_of_day, available_classes)
+    after = _decode_search_cursor(cursor, sort_by) if cursor else None
+    if after:
+        page = None
+    if sort_by not in _RANKED_SORTS:
+        prefer_time = None
+
+    cache_key = _make_cache_key(origin, destination, date, sort_by, days_flex or 0, page or 0, page_size or (limit or 0), tier or "ECONOMY", after,
+                                min_price, max_price, max_duration, airlines, times_of_day, available_classes, prefer_time,
+                                origin_radius_km, destination_radius_km)
+    params = dict(origin=origin, destination=destination, date=date, sort_by=sort_by, limit=limit,
+                  days_flex=days_flex, tier=tier, page=page, page_size=page_size, after=after,
+                  min_price=min_price, max_price=max_price, max_duration=max_duration,
+                  airlines=airlines, times_of_day=times_of_day, available_classes=available_classes,
+                  prefer_time=prefer_time, origin_radius_km=origin_radius_km,
+                  destination_radius_km=destination_radius_km)
+
+    def compute():
+        return _search_flights_tagged(db, **params)
+
+    def refresh():
+        # runs on a background thread, so it must not share the request's session
+        session = SessionLocal()
+        try:
+            return _search_flights_tagged(session, **params)
+        finally:
+            session.close()
+
+    return _search_loader.get_or_compute(cache_key, compute, refresh=refresh)
+
+
+def _search_flights_tagged(db: Session, origin, destination, **params) -> tuple[list[dict], list[str] | None]:
+    """Run the search and return (results, cache tags). Empty results are not cached."""
+    formatted = _search_flights_uncached(db, origin=origin, destination=destination, **params)
+    if not formatted:
+        return formatted, None
+    tags = [_flight_tag(f["id"]) for f in formatted]
+    tags.extend(_route_tags(db, origin, destination, params.get("origin_radius_km"),
+                            params.get("destination_radius_km")))
+    return formatted, tags
+
+
+_DepartureAirport = aliased(Airport, name="departure_airport")
+_ArrivalAirport = aliased(Airport, name="arrival_airport")
+
+
+def _seat_count(column, seat_class: str | None = None):
+    """Correlated SUM over the flight's seat counters (optionally one class)."""
+    statement = select(func.sum(column)).where(FlightSeatInventory.flight_id == Flight.id)
+    if seat_class:
+        statement = statement.where(FlightSeatInventory.seat_class == seat_class)
+    return statement.scalar_subquery()
+
+
+# Exactly the columns a search result needs, with seat counts folded in
+_SEARCH_FLIGHT_COLUMNS = (
+    Flight.id, Flight.airline_id, Flight.flight_number, Flight.departure_time, Flight.arrival_time,
+    Flight.base_price, Flight.demand_level, *PRICE_COLUMNS,
+    Airline.name.label("airline"),
+    Aircraft.model.label("aircraft_model"),
+    _DepartureAirport.code.label("source"),
+    _ArrivalAirport.code.label("destination"),
+)
+_SEARCH_COLUMNS = (
+    *_SEARCH_FLIGHT_COLUMNS,
+    _seat_count(FlightSeatInventory.total_seats).label("total_seats"),
+    _seat_count(FlightSeatInventory.available_seats).label("available_seats"),
+    *(_seat_count(FlightSeatInventory.available_seats, seat_class).label(f"available_{tier.lower()}")
+      for seat_class, tier in DB_CLASS_TO_TIER.items()),
+)
+
+
+def _search_select(columns=_SEARCH_COLUMNS):
+    """Core SELECT of `columns` over flights, for the caller to filter and order."""
+    return (
+        select(*columns)
+        .select_from(Flight)
+        .outerjoin(Airline, Airline.id == Flight.airline_id)
+        .outerjoin(Aircraft, Aircraft.id == Flight.aircraft_id)
+        .outerjoin(_DepartureAirport, _DepartureAirport.id == Flight.departure_airport_id)
+        .outerjoin(_ArrivalAirport, _ArrivalAirport.id == Flight.arrival_airport_id)
     )
 
-    # filter by related airport codes using relationship `has` to avoid
-    # joining the Airport table multiple times (which can cause ambiguous
-    # aliases and SQL errors).
-    if origin:
-        query = query.filter(Flight.departure_airport.has(Airport.code == origin))
 
-    if destination:
-        query = query.filter(Flight.arrival_airport.has(Airport.code == destination))
+def _load_search_rows(db: Session, statement) -> tuple[list, dict]:
+    """Run a `_search_select()` statement; returns (rows, {flight_id: seat stats}).
 
-    if date:
-        # Match any departure_time within the calendar date range (00:00:00 <= dt < next day)
-        try:
-            d_obj = datetime.strptime(date, "%Y-%m-%d")
-        except Exception:
-            # if parsing fails, leave filter as-is (route already validates format)
-            d_obj = None
-
-        if d_obj:
-            # expand range by days_flex
-            start = d_obj - timedelta(days=abs(int(days_flex)))
-            end = d_obj + timedelta(days=abs(int(days_flex)) + 1)
-            query = query.filter(Flight.departure_time >= start, Flight.departure_time < end)
-
-    # Apply sorting
-    if sort_by == "price":
-        query = query.order_by(Flight.base_price.asc())
-    elif sort_by == "duration":
-        # SQLite doesn't support direct datetime subtraction in SQLAlchemy
-        # in a portable way; use julianday difference to compute duration
-        query = query.order_by((func.julianday(Flight.arrival_time) - func.julianday(Flight.departure_time)).asc())
-
-    # Pagination: support page/page_size OR limit
-    if page and page_size:
+    Stats are {"total", "available", "by_tier"}. Flights without counter rows
+    fall back to aggregating their seats, like `get_inventory_map`.
+    """
+    rows = db.execute(statement).all()
+    return rows, _search_inventory(db, rows)
+
+
+def _search_inventory(db: Session, rows) -> dict:
+    inventory = {}
+    missing = []
+    for row in rows:
+        if row.total_seats is None:
+            missing.append(row.id)
+            continue
+        inventory[row.id] = {
+            "total": row.total_seats,
+            "available": row.available_seats,
+            "by_tier": {tier: getattr(row, f"available_{tier.lower()}") or 0 for tier in DB_CLASS_TO_TIER.values()},
+        }
+    if missing:
+        for flight_id, stats in get_inventory_map(db, missing).items():
+            inventory[flight_id] = {"total": stats["total"], "available": stats["available"],
+                                    "by_tier": seats_by_tier(stats)}
+    return inventory
+
+
+def _search_flights_uncached(db: Session, origin: str | None = None, destination: str | None = None, date: str | None = None, sort_by: str | None = None, limit: int | None = None, days_flex: int = 0, tier: str = "ECONOMY", page: int | None = None, page_size: int | None = None, after: dict | None = None, min_price: float | None = None, max_price: float | None = None, max_duration: int | None = None, airlines: list[str] | None = None, times_of_day: list[str] | None = None, available_classes: list[str] | None = None, prefer_time: str | None = None, origin_radius_km: float | None = None, destination_radius_km: float | None = None) -> list[dict]:
+    ranked = sort_by in _RANKED_SORTS
+    query = _search_statement(db, origin=origin, destination=destination, date=date,
+                              sort_by=None if ranked else sort_by,
+                              days_flex=days_flex, tier=tier, after=after, min_price=min_price,
+                              max_price=max_price, max_duration=max_duration, airlines=airlines,
+                              times_of_day=times_of_day, available_classes=available_classes,
+                              origin_radius_km=origin_radius_km, destination_radius_km=destination_radius_km)
+    if query is None:
+        return []
+
+    if ranked:
+        if page and page_size:
+            offset, count = max(0, (page - 1) * page_size), page_size
+        else:
+            offset, count = 0, limit
+        best = _rank_best(db, query, tier, offset + count if count else None, prefer_time)[offset:]
+        return _load_ranked(db, [s.flight_id for s in best], tier)
+
+    # Pagination: cursor (keyset), page/page_size (offset) OR limit
+    if after:
+        if page_size or limit:
+            query = query.limit(page_size or limit)
+    elif page and page_size:
         offset = max(0, (page - 1) * page_size)
         query = query.offset(offset).limit(page_size)
     elif limit:
         query = query.limit(limit)
 
-    flights = query.all()
-    
-    if not flights:
+    rows, inventory = _load_search_rows(db, query)
+    if not rows:
         return []
+    return _format_search_results(rows, inventory, tier)
 
-    # OPTIMIZATION: Batch fetch all seat statistics in 2 queries instead of N*7 queries
-    flight_ids = [f.id for f in flights]
-    
-    # Query 1: Get total and available seats per flight in one query
-    seat_stats = (
-        db.query(
-            Seat.flight_id,
-            func.count(Seat.id).label('total'),
-            func.sum(case((Seat.is_available == True, 1), else_=0)).label('available')
+
+def stream_search_flights(db: Session, origin: str | None = None, destination: str | None = None, date: str | None = None, sort_by: str | None = None, limit: int | None = None, days_flex: int = 0, tier: str = "ECONOMY", cursor: str | None = None, min_price: float | None = None, max_price: float | None = None, max_duration: int | None = None, airlines: list[str] | None = None, times_of_day: list[str] | None = None, available_classes: list[str] | None = None, prefer_time: str | None = None, origin_radius_km: float | None = None, destination_radius_km: float | None = None, batch_size: int = 500) -> Iterator[dict]:
+    """Every search result for the filters, in sort order, without loading them all.
+
+    Same filters, sort and result shape as `search_flights`, but uncached:
+    rows are read `batch_size` at a time from a server-side cursor and
+    formatted a batch at a time. `cursor` starts after a previous page's
+    last row; `limit` caps the total (None streams everything). sort_by='best'
+    ranks every candidate first, then loads and formats them a batch at a time.
+    """
+    _check_sort(sort_by, prefer_time)
+    _check_facet_values(times_of_day, available_classes)
+    after = _decode_search_cursor(cursor, sort_by) if cursor else None
+    ranked = sort_by in _RANKED_SORTS
+    query = _search_statement(db, origin=origin, destination=destination, date=date,
+                              sort_by=None if ranked else sort_by,
+                              days_flex=days_flex, tier=tier, after=after, min_price=min_price,
+                              max_price=max_price, max_duration=max_duration, airlines=airlines,
+                              times_of_day=times_of_day, available_classes=available_classes,
+                              origin_radius_km=origin_radius_km, destination_radius_km=destination_radius_km)
+    if query is None:
+        return
+    if ranked:
+        flight_ids = [s.flight_id for s in _rank_best(db, query, tier, limit, prefer_time)]
+        for start in range(0, len(flight_ids), batch_size):
+            yield from _load_ranked(db, flight_ids[start:start + batch_size], tier)
+        return
+    if limit:
+        query = query.limit(limit)
+
+    result = db.execute(query.execution_options(yield_per=batch_size))
+    for rows in result.partitions():
+        inventory = _search_inventory(db, rows)
+        yield from _format_search_results(rows, inventory, tier)
+
+
+def search_flights_batch(db: Session, queries: list[dict], sort_by: str | None = None,
+                         tier: str = "ECONOMY") -> list[list[dict]]:
+    """Search several routes at once; returns one result list per query, in order.
+
+    Each query is a dict of origin, destination and optionally date, days_flex
+    and limit, answered exactly as `search_flights` would with those
+    arguments and the shared `sort_by` and `tier` -- and through the same
+    cache entries. Cache misses are answered together: one flight query over
+    all their routes and dates, fanned back out per query, and one seat-count
+    aggregate for the flights kept.
+    """
+    if sort_by not in _SORT_COLUMNS:
+        raise ValueError(f"unsupported sort_by: {sort_by}")
+    tier = tier or "ECONOMY"
+    queries = [
+        dict(origin=q["origin"], destination=q["destination"], date=q.get("date"),
+             days_flex=q.get("days_flex") or 0, limit=q.get("limit"))
+        for q in queries
+    ]
+    keys = [
+        _make_cache_key(q["origin"], q["destination"], q["date"], sort_by, q["days_flex"], 0, q["limit"] or 0, tier)
+        for q in queries
+    ]
+    by_key = dict(zip(keys, queries))
+
+    def compute(missing: list[str]) -> dict:
+        results = _search_batch_uncached(db, [by_key[key] for key in missing], sort_by, tier)
+        computed = {}
+        for key, formatted in zip(missing, results):
+            query = by_key[key]
+            tags = None
+            if formatted:
+                tags = [_flight_tag(f["id"]) for f in formatted]
+                tags.append(_route_tag(query["origin"], query["destination"]))
+            computed[key] = (formatted, tags)
+        return computed
+
+    values = _search_loader.get_many_or_compute(keys, compute)
+    return [values[key] for key in keys]
+
+
+def _search_batch_uncached(db: Session, queries: list[dict], sort_by: str | None, tier: str) -> list[list[dict]]:
+    # route -> [(query index, date window, limit)]; unknown airports match nothing
+    routes: dict[tuple[int, int], list] = {}
+    conditions = []
+    for i, q in enumerate(queries):
+        origin_id = reference_data.airport_id(db, q["origin"])
+        destination_id = reference_data.airport_id(db, q["destination"])
+        if origin_id is None or destination_id is None:
+            continue
+        window = _date_window(q["date"], q["days_flex"])
+        routes.setdefault((origin_id, destination_id), []).append((i, window, q["limit"]))
+        condition = [Flight.departure_airport_id == origin_id, Flight.arrival_airport_id == destination_id]
+        if window:
+            condition += [Flight.departure_time >= window[0], Flight.departure_time < window[1]]
+        conditions.append(and_(*condition))
+
+    matched: list[list] = [[] for _ in queries]
+    if conditions:
+        sort_column = _sort_column(sort_by, tier)
+        statement = (
+            _search_select((*_SEARCH_FLIGHT_COLUMNS, Flight.departure_airport_id, Flight.arrival_airport_id))
+            .where(or_(*conditions))
+            .order_by(sort_column.asc(), Flight.id.asc())
         )
-        .filter(Seat.flight_id.in_(flight_ids))
-        .group_by(Seat.flight_id)
-        .all()
+        for row in db.execute(statement):
+            for i, window, limit in routes[(row.departure_airport_id, row.arrival_airport_id)]:
+                if window and not (window[0] <= row.departure_time < window[1]):
+                    continue
+                if limit is None or len(matched[i]) < limit:
+                    matched[i].append(row)
+
+    counts = get_inventory_map(db, {row.id for rows in matched for row in rows})
+    inventory = {
+        flight_id: {"total": stats["total"], "available": stats["available"], "by_tier": seats_by_tier(stats)}
+        for flight_id, stats in counts.items()
+    }
+    return [_format_search_results(rows, inventory, tier) if rows else [] for rows in matched]
+
+
+def _rank_best(db: Session, query, tier: str, k: int | None, prefer_time: str | None) -> list:
+    """The `k` best flights of a `_search_statement` (all when k is None), best first.
+
+    Only what scoring needs is read for the candidates: the stored fare (the
+    pricing engine's dynamic fare, materialized; unpriced flights are priced
+    live), duration and departure time. The route/date filters stay on the
+    route/date index.
+    """
+    column = price_column(tier)
+    candidates = db.execute(query.with_only_columns(
+        Flight.id, Flight.base_price, Flight.demand_level, Flight.departure_time, Flight.arrival_time,
+        Flight.duration_minutes, column,
+    ).order_by(None)).all()
+    if not candidates:
+        return []
+    missing = [r.id for r in candidates if getattr(r, column.key) is None]
+    inventory = get_inventory_map(db, missing) if missing else {}
+    fares = current_prices(candidates, inventory, price_tier(tier), datetime.utcnow())
+    scored = (
+        (r.id, float(fare),
+         r.duration_minutes or Flight.compute_duration_minutes(r.departure_time, r.arrival_time),
+         r.departure_time)
+        for r, fare in zip(candidates, fares)
     )
-    seat_stats_map = {s.flight_id: {'total': s.total, 'available': s.available or 0} for s in seat_stats}
-    
-    # Query 2: Get seats by class per flight in one query
-    class_stats = (
-        db.query(
-            Seat.flight_id,
-            Seat.seat_class,
-            func.sum(case((Seat.is_available == True, 1), else_=0)).label('available')
+    return top_k(scored, len(candidates) if k is None else k, prefer_time)
+
+
+def _load_ranked(db: Session, flight_ids: list[int], tier: str) -> list[dict]:
+    """Formatted search results for `flight_ids`, in that order."""
+    if not flight_ids:
+        return []
+    rows, inventory = _load_search_rows(db, _search_select().where(Flight.id.in_(flight_ids)))
+    by_id = {row.id: row for row in rows}
+    return _format_search_results([by_id[i] for i in flight_ids if i in by_id], inventory, tier)
+
+
+def _search_statement(db: Session, origin: str | None, destination: str | None, date: str | None,
+                      sort_by: str | None, days_flex: int, tier: str, after: dict | None,
+                      min_price: float | None, max_price: float | None, max_duration: int | None,
+                      airlines: list[str] | None = None, times_of_day: list[str] | None = None,
+                      available_classes: list[str] | None = None, origin_radius_km: float | None = None,
+                      destination_radius_km: float | None = None):
+    """The filtered, ordered search select, before paging; None when nothing can match
+    (an unknown airport, or none of `airlines` known)."""
+    # Lean projection: plain row tuples instead of ORM entities with eager loads
+    query = _search_select()
+
+    # resolve airport codes (and radii) to ids up front so the route filter is
+    # a plain indexed equality or IN rather than a correlated EXISTS per flight
+    if origin:
+        origin_ids = _airport_ids(db, origin, origin_radius_km)
+        if origin_ids is None:
+            return None
+        query = query.where(Flight.departure_airport_id.in_(origin_ids) if len(origin_ids) > 1
+                            else Flight.departure_airport_id == origin_ids[0])
+
+    if destination:
+        destination_ids = _airport_ids(db, destination, destination_radius_km)
+        if destination_ids is None:
+            return None
+        query = query.where(Flight.arrival_airport_id.in_(destination_ids) if len(destination_ids) > 1
+                            else Flight.arrival_airport_id == destination_ids[0])
+
+    window = _date_window(date, days_flex)
+    if window:
+        query = query.where(Flight.departure_time >= window[0], Flight.departure_time < window[1])
+
+    # Price bounds apply to the stored fare, so they filter in SQL before paging
+    if min_price is not None:
+        query = query.where(price_column(tier) >= min_price)
+    if max_price is not None:
+        query = query.where(price_column(tier) <= max_price)
+    if max_duration is not None:
+        query = query.where(Flight.duration_minutes <= max_duration)
+
+    # Facet filters: any of the selected values within a facet
+    if airlines:
+        airline_ids = _airline_ids(db, airlines)
+        if not airline_ids:
+            return None
+        query = query.where(Flight.airline_id.in_(airline_ids))
+    if times_of_day:
+        clause = time_of_day_clause(Flight.departure_time, times_of_day, window)
+        if clause is not None:
+            query = query.where(clause)
+    if available_classes:
+        query = query.where(exists().where(
+            FlightSeatInventory.flight_id == Flight.id,
+            FlightSeatInventory.seat_class.in_(_TIER_TO_DB_CLASS[t] for t in available_classes),
+            FlightSeatInventory.available_seats > 0,
+        ))
+
+    # Apply sorting; id makes the order total so keyset pages are stable
+    sort_column = _sort_column(sort_by, tier)
+    query = query.order_by(sort_column.asc(), Flight.id.asc())
+
+    # Keyset continuation after a cursor's last row
+    if after:
+        query = query.where(or_(
+            sort_column > after["v"],
+            and_(sort_column == after["v"], Flight.id > after["id"]),
+        ))
+    return query
+
+
+def _date_window(date: str | None, days_flex: int = 0) -> tuple[datetime, datetime] | None:
+    """[start, end) of departure times for `date` ± `days_flex` days, or None without a date."""
+    if not date:
+        return None
+    try:
+        d_obj = datetime.strptime(date, "%Y-%m-%d")
+    except ValueError:
+        # if parsing fails, leave filter as-is (route already validates format)
+        return None
+    flex = abs(int(days_flex or 0))
+    return d_obj - timedelta(days=flex), d_obj + timedelta(days=flex + 1)
+
+
+def _airport_ids(db: Session, code: str, radius_km: float | None) -> list[int] | None:
+    """Id of the airport `code` plus those within `radius_km` of it; None if it is unknown."""
+    airport_id = reference_data.airport_id(db, code)
+    if airport_id is None or not radius_km:
+        return None if airport_id is None else [airport_id]
+    airport_index.ensure_fresh(db)
+    return airport_index.within(airport_id, radius_km)
+
+
+def _airline_ids(db: Session, codes: list[str]) -> set[int]:
+    """Ids of the known airlines among `codes` (codes or names)."""
+    airlines = (reference_data.airline(db, code) for code in codes)
+    return {a.id for a in airlines if a is not None}
+
+
+_TIER_TO_DB_CLASS = {tier: seat_class for seat_class, tier in DB_CLASS_TO_TIER.items()}
+
+
+def _format_search_results(flights: list, inventory: dict, tier: str | None) -> list[dict]:
+    """Build `FlightResponse`-shaped dicts for `_search_select()` rows.
+
+    Fares are the stored current fares (the values search sorts and filters
+    on); flights without them are priced in one batch.
+    """
+    now = datetime.utcnow()
+    if tier and tier.lower() == "all":
+        tiers = ["ECONOMY", "BUSINESS", "FIRST"]
+        prices = {t: current_prices(flights, inventory, t, now) for t in tiers}
+        price_maps = [{t: prices[t][i] for t in tiers} for i in range(len(flights))]
+        fares = prices["ECONOMY"]
+    else:
+        fares = current_prices(flights, inventory, price_tier(tier), now)
+        price_maps = [None] * len(flights)
+
+    return [
+        _format_search_result(flight, inventory[flight.id], current_price, price_map)
+        for flight, current_price, price_map in zip(flights, fares, price_maps)
+    ]
+
+
+def _format_search_result(row, stats: dict, current_price: float, price_map: dict | None = None) -> dict:
+    # every `FlightResponse` field, in its order: routes write these dicts out as-is
+    return {
+        "id": row.id,
+        "airline": row.airline,
+        "airline_name": None,
+        "source": row.source,
+        "destination": row.destination,
+        "departure_airport_code": None,
+        "arrival_airport_code": None,
+        "departure_city": None,
+        "arrival_city": None,
+        "flight_number": row.flight_number,
+        "aircraft_model": row.aircraft_model,
+        "departure_time": row.departure_time,
+        "arrival_time": row.arrival_time,
+        "base_price": float(row.base_price),
+        "current_price": float(current_price),
+        "dynamic_price": None,
+        "price_map": price_map,
+        "seats_left": stats['available'],
+        "seats_by_class": stats['by_tier'],
+    }
+
+
+def search_facets(db: Session, origin: str | None = None, destination: str | None = None, date: str | None = None,
+                  days_flex: int = 0, tier: str = "ECONOMY", min_price: float | None = None,
+                  max_price: float | None = None, max_duration: int | None = None,
+                  airlines: list[str] | None = None, times_of_day: list[str] | None = None,
+                  available_classes: list[str] | None = None, origin_radius_km: float | None = None,
+                  destination_radius_km: float | None = None) -> dict:
+    """Facet counts for a search: flights per airline, time of day, fare range and
+    seat class with seats left.
+
+    Takes the same filters as `search_flights`. The candidate flights (route,
+    date and duration filters) are loaded in one query and counted in one
+    pass; each facet's counts apply the other facets' selections but not its
+    own (see `app.services.search_facets`). Cached like search results.
+    """
+    _check_facet_values(times_of_day, available_classes)
+    cache_key = "facets|" + _make_cache_key(origin, destination, date, None, days_flex or 0, 0, 0, tier or "ECONOMY",
+                                            None, min_price, max_price, max_duration, airlines, times_of_day,
+                                            available_classes, None, origin_radius_km, destination_radius_km)
+    params = dict(origin=origin, destination=destination, date=date, days_flex=days_flex, tier=tier,
+                  min_price=min_price, max_price=max_price, max_duration=max_duration,
+                  airlines=airlines, times_of_day=times_of_day, available_classes=available_classes,
+                  origin_radius_km=origin_radius_km, destination_radius_km=destination_radius_km)
+
+    def refresh():
+        session = SessionLocal()
+        try:
+            return _search_facets_tagged(session, **params)
+        finally:
+            session.close()
+
+    return _search_loader.get_or_compute(cache_key, lambda: _search_facets_tagged(db, **params), refresh=refresh)
+
+
+def _search_facets_tagged(db: Session, origin, destination, date, days_flex, tier, min_price, max_price,
+                          max_duration, airlines, times_of_day, available_classes, origin_radius_km=None,
+                          destination_radius_km=None) -> tuple[dict, list[str] | None]:
+    query = _search_statement(db, origin=origin, destination=destination, date=date, sort_by=None,
+                              days_flex=days_flex, tier=tier, after=None, min_price=None, max_price=None,
+                              max_duration=max_duration, origin_radius_km=origin_radius_km,
+                              destination_radius_km=destination_radius_km)
+    rows, inventory = _load_search_rows(db, query) if query is not None else ([], {})
+    fares = current_prices(rows, inventory, price_tier(tier), datetime.utcnow())
+    candidates = [
+        Candidate(
+            row.airline_id,
+            time_of_day(row.departure_time),
+            fare,
+            frozenset(t for t, left in inventory[row.id]["by_tier"].items() if left > 0),
         )
-        .filter(Seat.flight_id.in_(flight_ids))
-        .group_by(Seat.flight_id, Seat.seat_class)
-        .all()
+        for row, fare in zip(rows, fares)
+    ]
+    counts = facet_counts(
+        candidates,
+        airline_ids=_airline_ids(db, airlines) if airlines else None,
+        times_of_day=set(times_of_day) if times_of_day else None,
+        min_price=min_price,
+        max_price=max_price,
+        available_classes=set(available_classes) if available_classes else None,
     )
-    
-    # Build class stats map: {flight_id: {class_name: count}}
-    class_stats_map = {}
-    class_mapping = {"Economy": "ECONOMY", "Business": "BUSINESS", "First": "FIRST"}
-    for stat in class_stats:
-        if stat.flight_id not in class_stats_map:
-            class_stats_map[stat.flight_id] = {"ECONOMY": 0, "BUSINESS": 0, "FIRST": 0}
-        api_class = class_mapping.get(stat.seat_class, "ECONOMY")
-        class_stats_map[stat.flight_id][api_class] = stat.available or 0
-
-    formatted = []
-    for flight in flights:
-        # Use eager-loaded relationships (no additional queries!)
-        airline = flight.airline
-        dep = flight.departure_airport
-        arr = flight.arrival_airport
-        aircraft = flight.aircraft
-        
-        # Use pre-fetched seat statistics
-        stats = seat_stats_map.get(flight.id, {'total': 0, 'available': 0})
-        total_seats = stats['total']
-        seats_left = stats['available']
-        booked_seats = max(total_seats - seats_left, 0)
-        
-        # Use pre-fetched class statistics
-        seats_by_class = class_stats_map.get(flight.id, {"ECONOMY": 0, "BUSINESS": 0, "FIRST": 0})
 
-        # determine demand level (fallback to medium)
-        demand_level = getattr(flight, 'demand_level', 'medium') or 'medium'
+    airline_facets = []
+    for airline_id, count in counts["airlines"].items():
+        airline = reference_data.airline_by_id(db, airline_id)
+        airline_facets.append({"value": airline.code if airline else None,
+                               "label": airline.name if airline else None, "count": count})
+    airline_facets.sort(key=lambda a: (-a["count"], a["value"] or ""))
+
+    facets = {
+        "total": counts["total"],
+        "airlines": airline_facets,
+        "time_of_day": [
+            {"value": name, "start_hour": TIME_OF_DAY_BUCKETS[name][0], "end_hour": TIME_OF_DAY_BUCKETS[name][1],
+             "count": count}
+            for name, count in counts["time_of_day"].items()
+        ],
+        "price_ranges": [{"min": low, "max": high, "count": count} for low, high, count in counts["price_ranges"]],
+        "seat_classes": [{"value": tier_name, "count": count} for tier_name, count in counts["seat_classes"].items()],
+    }
+    if not rows:
+        return facets, None
+    tags = [_flight_tag(row.id) for row in rows]
+    tags.extend(_route_tags(db, origin, destination, origin_radius_km, destination_radius_km))
+    return facets, tags
+
+
+def _check_facet_values(times_of_day: list[str] | None, available_classes: list[str] | None) -> None:
+    unknown = set(times_of_day or ()) - TIME_OF_DAY_BUCKETS.keys()
+    if unknown:
+        raise ValueError(f"unsupported times_of_day: {', '.join(sorted(unknown))}")
+    unknown = set(available_classes or ()) - _TIER_TO_DB_CLASS.keys()
+    if unknown:
+        raise ValueError(f"unsupported available_classes: {', '.join(sorted(unknown))}")
+
+
+def search_connections(db: Session, origin: str, destination: str, date: str, days_flex: int = 0,
+                       min_layover_minutes: int = 45, max_layover_minutes: int = 360,
+                       sort_by: str = "price", limit: int = 20, tier: str = "ECONOMY") -> list[dict]:
+    """One-stop itineraries from `origin` to `destination` whose first leg departs on `date` (± days_flex).
+
+    Legs come from the in-memory connection index; each itinerary is
+    {"legs": [leg1, leg2], "via", "layover_minutes", "total_duration_minutes",
+    "total_price", "seats_left"} with legs shaped like search results.
+    Itineraries with a sold-out leg are skipped. Ranked by total price or
+    total duration (sort_by="duration"). Cached like `search_flights`.
+    """
+    cache_key = "conn|" + "|".join(str(v) for v in (
+        origin, destination, date, days_flex or 0, min_layover_minutes, max_layover_minutes, sort_by, limit, tier))
+    params = dict(origin=origin, destination=destination, date=date, days_flex=days_flex,
+                  min_layover_minutes=min_layover_minutes, max_layover_minutes=max_layover_minutes,
+                  sort_by=sort_by, limit=limit, tier=tier)
+
+    def compute():
+        return _search_connections_tagged(db, **params)
 
-        # compute dynamic price for requested tier or all tiers
+    def refresh():
+        session = SessionLocal()
         try:
-            if tier and tier.lower() == "all":
-                # compute for multiple tiers
-                tiers = ["ECONOMY", "BUSINESS", "FIRST"]
-                price_map = {}
-                for t in tiers:
-                    price_map[t] = compute_dynamic_price(
-                        base_fare=flight.base_price,
-                        departure_time=flight.departure_time,
-                        total_seats=total_seats,
-                        booked_seats=booked_seats,
-                        demand_level=demand_level,
-                        tier=t,
-                    )
-                current_price = price_map.get("ECONOMY", float(flight.base_price or 0.0))
-            else:
-                current_price = compute_dynamic_price(
-                    base_fare=flight.base_price,
-                    departure_time=flight.departure_time,
-                    total_seats=total_seats,
-                    booked_seats=booked_seats,
-                    demand_level=demand_level,
-                    tier=(tier or "ECONOMY"),
-                )
-                price_map = None
-        except Exception:
-            current_price = float(flight.base_price or 0.0)
-            price_map = None
-
-        formatted.append({
-            "id": flight.id,
-            "airline": airline.name if airline else None,
-            "flight_number": flight.flight_number,
-            "aircraft_model": aircraft.model if aircraft else None,
-            "source": dep.code if dep else None,
-            "destination": arr.code if arr else None,
-            "departure_time": flight.departure_time,
-            "arrival_time": flight.arrival_time,
-            "base_price": flight.base_price,
-            "current_price": current_price,
-            "price_map": price_map,
-            "seats_left": seats_left,
-            "seats_by_class": seats_by_class,
+            return _search_connections_tagged(session, **params)
+        finally:
+            session.close()
+
+    return _search_loader.get_or_compute(cache_key, compute, refresh=refresh)
+
+
+def _search_connections_tagged(db: Session, origin, destination, **params) -> tuple[list[dict], list[str] | None]:
+    itineraries = _search_connections_uncached(db, origin, destination, **params)
+    if not itineraries:
+        return itineraries, None
+    tags = {_flight_tag(leg["id"]) for it in itineraries for leg in it["legs"]}
+    # a new flight out of origin or into destination can create a connection
+    tags.update({_route_tag(origin, destination), _route_tag(origin, None), _route_tag(None, destination)})
+    return itineraries, sorted(tags)
+
+
+def _search_connections_uncached(db: Session, origin: str, destination: str, date: str, days_flex: int = 0,
+                                 min_layover_minutes: int = 45, max_layover_minutes: int = 360,
+                                 sort_by: str = "price", limit: int = 20, tier: str = "ECONOMY") -> list[dict]:
+    origin_id = reference_data.airport_id(db, origin)
+    destination_id = reference_data.airport_id(db, destination)
+    if origin_id is None or destination_id is None:
+        return []
+
+    day = datetime.strptime(date, "%Y-%m-%d")
+    start = day - timedelta(days=abs(int(days_flex or 0)))
+    end = day + timedelta(days=abs(int(days_flex or 0)) + 1)
+
+    connection_index.ensure_fresh(db)
+    window = (origin_id, destination_id, start, end,
+              timedelta(minutes=min_layover_minutes), timedelta(minutes=max_layover_minutes))
+    flight_ids = connection_index.connection_legs(*window)
+    if not flight_ids:
+        return []
+
+    # Read every candidate leg's stored fare and seat counters once
+    rows, inventory = _load_search_rows(db, _search_select().where(Flight.id.in_(flight_ids)))
+    fare_tier = price_tier(tier)
+    prices = dict(zip((r.id for r in rows), current_prices(rows, inventory, fare_tier, datetime.utcnow())))
+    seats = {r.id: inventory[r.id]["by_tier"][fare_tier] for r in rows}
+
+    def rank(leg1, leg2):
+        if not seats.get(leg1.id) or not seats.get(leg2.id):
+            return None  # deleted since indexed, or sold out
+        price = prices[leg1.id] + prices[leg2.id]
+        duration = leg2.arrival_time - leg1.departure_time
+        return (duration, price) if sort_by == "duration" else (price, duration)
+
+    # every pair is ranked; the index keeps only the best `limit` while scanning
+    best = connection_index.connections(*window, key=rank, limit=limit)
+    if not best:
+        return []
+
+    leg_ids = {leg.id for pair in best for leg in pair}
+    legs = [r for r in rows if r.id in leg_ids]
+    formatted = {f["id"]: f for f in _format_search_results(legs, inventory, tier)}
+
+    itineraries = []
+    for leg1, leg2 in best:
+        first, second = formatted[leg1.id], formatted[leg2.id]
+        itineraries.append({
+            "legs": [first, second],
+            "via": first["destination"],
+            "layover_minutes": int((second["departure_time"] - first["arrival_time"]).total_seconds() // 60),
+            "total_duration_minutes": int((second["arrival_time"] - first["departure_time"]).total_seconds() // 60),
+            "total_price": round(first["current_price"] + second["current_price"], 2),
+            "seats_left": min(first["seats_left"], second["seats_left"]),
         })
+    return itineraries
 
-    # Cache all search results for short TTL to reduce DB load
-    _set_cached(cache_key, formatted)
 
-    return formatted
+def get_fare_calendar(db: Session, origin: str, destination: str, start: date, days: int = 30, tier: str = "ECONOMY") -> list[dict]:
+    """Lowest dynamic fare and seat availability per day on origin -> destination.
+
+    Returns one entry per day in [start, start + days): {"date", "min_price",
+    "flight_id" (the cheapest flight), "flights", "seats_available"}, with
+    min_price/flight_id None when no flight that day has seats left in `tier`.
+    Cached per route and window; bookings, the demand simulator and flight edits
+    invalidate it through the same tags as search results.
+    """
+    cache_key = f"cal|{origin}|{destination}|{start.isoformat()}|{days}|{tier}"
+
+    def compute():
+        return _fare_calendar_tagged(db, origin, destination, start, days, tier)
+
+    def refresh():
+        session = SessionLocal()
+        try:
+            return _fare_calendar_tagged(session, origin, destination, start, days, tier)
+        finally:
+            session.close()
+
+    return _search_loader.get_or_compute(cache_key, compute, refresh=refresh)
+
+
+def _fare_calendar_tagged(db: Session, origin, destination, start, days, tier) -> tuple[list[dict], list[str]]:
+    calendar, flight_ids = _fare_calendar_uncached(db, origin, destination, start, days, tier)
+    # empty days are cached too: a new flight on the route drops the entry
+    tags = [_flight_tag(fid) for fid in flight_ids]
+    tags.append(_route_tag(origin, destination))
+    return calendar, tags
+
+
+def _fare_calendar_uncached(db: Session, origin: str, destination: str, start: date, days: int, tier: str) -> tuple[list[dict], list[int]]:
+    now = datetime.utcnow()
+    window_start = datetime.combine(start, datetime.min.time())
+    window_end = window_start + timedelta(days=days)
+    origin_id = reference_data.airport_id(db, origin)
+    destination_id = reference_data.airport_id(db, destination)
+    rows = []
+    if origin_id is not None and destination_id is not None:
+        # one pass over the route's flights in the window, plus one inventory query
+        rows = (
+            db.query(Flight.id, Flight.departure_time, Flight.base_price, Flight.demand_level, *PRICE_COLUMNS)
+            .filter(
+                Flight.departure_airport_id == origin_id,
+                Flight.arrival_airport_id == destination_id,
+                Flight.departure_time >= max(window_start, now),  # departed flights can't be booked
+                Flight.departure_time < window_end,
+            )
+            .all()
+        )
+    inventory = get_inventory_map(db, [r.id for r in rows])
+    fare_tier = price_tier(tier)
+
+    by_day = {
+        start + timedelta(days=i): {"date": start + timedelta(days=i), "min_price": None, "flight_id": None,
+                                    "flights": 0, "seats_available": 0}
+        for i in range(days)
+    }
+    prices = current_prices(rows, inventory, fare_tier, now)
+    for row, price in zip(rows, prices):
+        day = by_day[row.departure_time.date()]
+        seats = seats_by_tier(inventory[row.id])[fare_tier]
+        day["flights"] += 1
+        day["seats_available"] += seats
+        if not seats:
+            continue
+        if day["min_price"] is None or price < day["min_price"]:
+            day["min_price"], day["flight_id"] = price, row.id
+
+    return list(by_day.values()), [r.id for r in rows]
 
 
 def _generate_pnr(db: Session) -> str:
@@ -268,6 +960,7 @@ def create_flight(db: Session, airline_id: int, aircraft_id: int, flight_number:
         arrival_airport_id=arrival_airport_id,
         departure_time=departure_time,
         arrival_time=arrival_time,
+        duration_minutes=Flight.compute_duration_minutes(departure_time, arrival_time),
         base_price=base_price,
     )
     db.add(flight)
@@ -371,27 +1064,57 @@ def create_flight(db: Session, airline_id: int, aircraft_id: int, flight_number:
 
         if seats_to_create:
             db.add_all(seats_to_create)
-            db.commit()
+            db.flush()
+            rebuild_seat_inventory(db, [flight.id], commit=False)
 
+    refresh_current_prices(db, [flight.id])
+    db.commit()
     db.refresh(flight)
+    connection_index.upsert_flight(flight)
+    invalidate_route_cache(
+        flight.departure_airport.code if flight.departure_airport else None,
+        flight.arrival_airport.code if flight.arrival_airport else None,
+    )
     return flight
 
 
+# How long an unpaid booking keeps its seats
+SEAT_HOLD_MINUTES = int(os.getenv("SEAT_HOLD_MINUTES", "15"))
+# Bookings cancelled per reaper transaction
+HOLD_REAP_BATCH = int(os.getenv("HOLD_REAP_BATCH", "500"))
+_PENDING_STATUSES = ("Payment Pending", "Pending")
+
+# Booking API tier names -> database seat class names
+_BOOKING_SEAT_CLASSES = {
+    "ECONOMY": "Economy",
+    "ECONOMY_FLEX": "Premium Economy",
+    "BUSINESS": "Business",
+    "FIRST": "First",
+}
+
+
 def create_booking(db: Session, user_id: int, flight_id: int, departure_date: str, passengers: list[dict], seat_class: str | None = None, selected_seat_ids: list[int] | None = None) -> dict:
     """Create booking with dynamic price computation and concurrency-safe seat allocation.
     
-    Uses row-level locking (SELECT FOR UPDATE) to prevent race conditions when
-    multiple users try to book the same seats simultaneously.
+    Seats are claimed with compare-and-set UPDATEs (`claim_seats`), so two
+    bookings can never take the same seat and neither waits on a lock over
+    the whole flight. They stay held for SEAT_HOLD_MINUTES; unpaid after
+    that, `release_expired_holds` cancels the booking and frees them. On
+    databases without row locks the booking runs under the flight's
+    application lock (`flight_locks`).
     
     If selected_seat_ids is provided, those specific seats will be allocated.
     Otherwise, seats are auto-assigned from available inventory.
     
     Returns dict with 'booking' and 'total_fare' keys.
     """
-    from sqlalchemy import text
-    
-    # Start explicit transaction with row-level lock on flight
-    flight = db.query(Flight).filter(Flight.id == flight_id).with_for_update().first()
+    with flight_locks.hold(flight_id):
+        return _create_booking(db, user_id, flight_id, departure_date, passengers, seat_class, selected_seat_ids)
+
+
+def _create_booking(db: Session, user_id: int, flight_id: int, departure_date: str, passengers: list[dict],
+                    seat_class: str | None, selected_seat_ids: list[int] | None) -> dict:
+    flight = db.query(Flight).filter(Flight.id == flight_id).first()
     if not flight:
         raise ValueError("flight not found")
 
@@ -405,59 +1128,34 @@ def create_booking(db: Session, user_id: int, flight_id: int, departure_date: st
     except ValueError as e:
         raise ValueError(f"Invalid departure_date or mismatch: {e}")
 
-    # Map API tier names to database seat class names
-    tier_to_db_class = {
-        "ECONOMY": "Economy",
-        "ECONOMY_FLEX": "Premium Economy",
-        "BUSINESS": "Business",
-        "FIRST": "First"
-    }
-    
     # Get the requested seat class (default to Economy)
     requested_tier = (seat_class or "ECONOMY").upper()
-    db_seat_class = tier_to_db_class.get(requested_tier, "Economy")
+    db_seat_class = _BOOKING_SEAT_CLASSES.get(requested_tier, "Economy")
 
-    # Lock and count available seats with FOR UPDATE to prevent concurrent allocation
-    total_seats = db.query(func.count(Seat.id)).filter(Seat.flight_id == flight.id).scalar() or 0
-    
     num_passengers = len(passengers)
-    
-    # Handle specific seat selection vs auto-assignment
-    if selected_seat_ids and len(selected_seat_ids) == num_passengers:
-        # User selected specific seats - validate and lock them
-        allocated_seats = []
-        for seat_id in selected_seat_ids:
-            seat = db.query(Seat).filter(
-                Seat.id == seat_id,
-                Seat.flight_id == flight.id,
-                Seat.is_available == True
-            ).with_for_update().first()
-            
-            if not seat:
-                raise ValueError(f"Seat ID {seat_id} is not available or does not belong to this flight")
-            
-            # Validate seat class matches (optional - can be relaxed if needed)
-            if seat.seat_class != db_seat_class:
-                # Allow seat selection across classes but use the selected seat's class for pricing
-                pass  # We'll compute price per seat
-            
-            allocated_seats.append(seat)
-    else:
-        # Auto-assign seats from available inventory
-        available_seats = db.query(Seat).filter(
-            Seat.flight_id == flight.id, 
-            Seat.is_available == True,
-            Seat.seat_class == db_seat_class
-        ).with_for_update().all()
-        
-        available = len(available_seats)
-        if available < num_passengers:
-            raise ValueError(f"Not enough {db_seat_class} class seats available. Requested: {num_passengers}, Available: {available}")
-        
-        allocated_seats = available_seats[:num_passengers]
-    
-    all_booked = db.query(func.count(Seat.id)).filter(Seat.flight_id == flight.id, Seat.is_available == False).scalar() or 0
-    booked_seats = all_booked
+
+    # The booking row comes first: claimed seats point at it
+    booking_ref = "BKG" + uuid.uuid4().hex[:12].upper()
+    booking = Booking(user_id=user_id, pnr=None, booking_reference=booking_ref, status="Payment Pending",
+                      expires_at=datetime.utcnow() + timedelta(minutes=SEAT_HOLD_MINUTES))
+    db.add(booking)
+    db.flush()
+
+    # Specific seat selection (any class; each seat is priced by its own
+    # position) vs auto-assignment from the requested class
+    try:
+        if selected_seat_ids and len(selected_seat_ids) == num_passengers:
+            allocated_seats = claim_seats(db, flight.id, booking.id, seat_ids=selected_seat_ids)
+        else:
+            allocated_seats = claim_seats(db, flight.id, booking.id, count=num_passengers, seat_class=db_seat_class)
+    except ValueError:
+        db.rollback()
+        raise
+
+    # Seat counts for pricing come from the inventory counters
+    inventory = get_flight_inventory(db, flight.id)
+    total_seats = inventory["total"]
+    booked_seats = max(total_seats - inventory["available"], 0)
     
     demand_level = getattr(flight, 'demand_level', 'medium') or 'medium'
     tier = requested_tier
@@ -486,12 +1184,6 @@ def create_booking(db: Session, user_id: int, flight_id: int, departure_date: st
         seat_prices.append(seat_price)
         total_fare += seat_price
 
-    # Create booking
-    booking_ref = "BKG" + uuid.uuid4().hex[:12].upper()
-    booking = Booking(user_id=user_id, pnr=None, booking_reference=booking_ref, status="Payment Pending")
-    db.add(booking)
-    db.flush()
-
     airline = db.query(Airline).filter(Airline.id == flight.airline_id).first()
     dep = db.query(Airport).filter(Airport.id == flight.departure_airport_id).first()
     arr = db.query(Airport).filter(Airport.id == flight.arrival_airport_id).first()
@@ -499,10 +1191,7 @@ def create_booking(db: Session, user_id: int, flight_id: int, departure_date: st
     # Create tickets for each passenger with computed dynamic price and allocated seat
     for idx, p in enumerate(passengers):
         seat = allocated_seats[idx]
-        # Mark seat as unavailable (reserved for this booking)
-        seat.is_available = False
-        seat.booking_id = booking.id
-        
+
         # Price for this specific seat (includes surcharge)
         passenger_fare = seat_prices[idx]
         
@@ -530,16 +1219,235 @@ def create_booking(db: Session, user_id: int, flight_id: int, departure_date: st
         )
         db.add(ticket)
 
+    # keep the seat counters and stored fares in step, in the same transaction
+    adjust_available(db, seat_deltas(allocated_seats, -1))
+    refresh_current_prices(db, [flight.id])
+
     try:
         db.commit()
     except IntegrityError:
         db.rollback()
         raise
 
+    invalidate_flight_cache([flight.id])
+
     db.refresh(booking)
     return {"booking": booking, "total_fare": total_fare}
 
 
+def create_bookings_bulk(db: Session, user_id: int, requests: list[dict]) -> list[dict]:
+    """Create many bookings for `user_id`, one transaction per flight.
+
+    Each request holds flight_id, departure_date, passengers and optionally
+    seat_class and selected_seat_ids, as for `create_booking`. The bookings
+    of one flight are checked against its seat counters, inserted with one
+    multi-row INSERT, given auto-assigned seats with one claim per seat class
+    (plus one claim per booking that picked its own seats), and their tickets
+    written with one more INSERT. A booking that can't be satisfied fails on
+    its own; the others on its flight still go through.
+
+    Returns one dict per request, in order:
+    {"booking": Booking | None, "total_fare": float | None, "error": str | None}.
+    """
+    results = [{"booking": None, "total_fare": None, "error": None} for _ in requests]
+    by_flight: dict[int, list[int]] = defaultdict(list)
+    for i, request in enumerate(requests):
+        by_flight[request["flight_id"]].append(i)
+    flights = {f.id: f for f in db.query(Flight).filter(Flight.id.in_(list(by_flight))).all()}
+
+    for flight_id, indexes in by_flight.items():
+        flight = flights.get(flight_id)
+        if flight is None:
+            for i in indexes:
+                results[i]["error"] = "flight not found"
+            continue
+        try:
+            with flight_locks.hold(flight_id):
+                _book_flight_group(db, flight, user_id, {i: requests[i] for i in indexes}, results)
+        except (ValueError, IntegrityError) as exc:
+            db.rollback()
+            for i in indexes:
+                results[i] = {"booking": None, "total_fare": None, "error": results[i]["error"] or str(exc)}
+    return results
+
+
+def _book_flight_group(db: Session, flight: Flight, user_id: int, group: dict[int, dict], results: list[dict]) -> None:
+    """One flight's share of `create_bookings_bulk`; fills `results` and commits."""
+    flight_date = flight.departure_time.date()
+    valid: dict[int, dict] = {}
+    for i, request in group.items():
+        try:
+            requested_date = datetime.strptime(request["departure_date"], "%Y-%m-%d").date()
+        except ValueError:
+            results[i]["error"] = "Invalid departure_date format. Use YYYY-MM-DD"
+            continue
+        if requested_date != flight_date:
+            results[i]["error"] = f"departure_date {request['departure_date']} does not match flight departure {flight_date}"
+        elif not request["passengers"]:
+            results[i]["error"] = "at least one passenger is required"
+        else:
+            valid[i] = request
+    if not valid:
+        return
+
+    # Booking rows first, all at once: claimed seats point at them
+    # (matched back by reference: asking for RETURNING in parameter order makes some backends insert row by row)
+    expires_at = datetime.utcnow() + timedelta(minutes=SEAT_HOLD_MINUTES)
+    references = {i: "BKG" + uuid.uuid4().hex[:12].upper() for i in valid}
+    inserted = dict(db.execute(
+        insert(Booking).returning(Booking.booking_reference, Booking.id),
+        [{"user_id": user_id, "pnr": None, "booking_reference": reference,
+          "status": "Payment Pending", "expires_at": expires_at} for reference in references.values()],
+    ).all())
+    booking_ids = {i: inserted[reference] for i, reference in references.items()}
+
+    # Seat counts for pricing, read before this group's seats are taken (as in create_booking)
+    inventory = get_flight_inventory(db, flight.id)
+    seats: dict[int, list[Seat]] = {}
+    auto: dict[str, list[int]] = defaultdict(list)
+    for i, request in valid.items():
+        picked = request.get("selected_seat_ids")
+        if picked and len(picked) == len(request["passengers"]):
+            try:
+                seats[i] = claim_seats(db, flight.id, booking_ids[i], seat_ids=picked)
+            except ValueError as exc:
+                results[i]["error"] = str(exc)
+        else:
+            tier = (request.get("seat_class") or "ECONOMY").upper()
+            auto[_BOOKING_SEAT_CLASSES.get(tier, "Economy")].append(i)
+
+    # Auto-assigned bookings take what the counters say is left, in request order
+    for seat_class, indexes in auto.items():
+        left = inventory["by_class"].get(seat_class, {}).get("available", 0)
+        left -= sum(1 for picked in seats.values() for seat in picked if seat.seat_class == seat_class)
+        accepted = []
+        for i in indexes:
+            need = len(valid[i]["passengers"])
+            if need > left:
+                results[i]["error"] = (f"Not enough {seat_class} class seats available. "
+                                       f"Requested: {need}, Available: {max(left, 0)}")
+                continue
+            left -= need
+            accepted.append(i)
+        seats.update(_claim_for_group(db, flight.id, seat_class, accepted, valid, booking_ids, results))
+
+    failed = [booking_ids[i] for i in valid if results[i]["error"]]
+    if failed:
+        _release_claims(db, failed)
+        db.execute(delete(Booking).where(Booking.id.in_(failed)))
+    booked = {i: seats[i] for i in valid if not results[i]["error"]}
+    if not booked:
+        db.commit()
+        return
+
+    airline = reference_data.airline_by_id(db, flight.airline_id)
+    dep = reference_data.airport_by_id(db, flight.departure_airport_id)
+    arr = reference_data.airport_by_id(db, flight.arrival_airport_id)
+    from app.models.seat import SEAT_POSITION_SURCHARGE
+
+    total_seats = inventory["total"]
+    booked_seats = max(total_seats - inventory["available"], 0)
+    fares: dict[str, float] = {}
+    tickets = []
+    for i, allocated in booked.items():
+        tier = (valid[i].get("seat_class") or "ECONOMY").upper()
+        if tier not in fares:
+            fares[tier] = compute_dynamic_price(
+                base_fare=flight.base_price,
+                departure_time=flight.departure_time,
+                total_seats=total_seats,
+                booked_seats=booked_seats,
+                demand_level=getattr(flight, "demand_level", "medium") or "medium",
+                tier=tier,
+            )
+        total_fare = 0.0
+        for p, seat in zip(valid[i]["passengers"], allocated):
+            surcharge = round(fares[tier] * SEAT_POSITION_SURCHARGE.get(seat.seat_position or "middle", 0.0), 2)
+            total_fare += fares[tier] + surcharge
+            tickets.append({
+                "booking_id": booking_ids[i],
+                "flight_id": flight.id,
+                "seat_id": seat.id,
+                "passenger_name": p.get("passenger_name"),
+                "passenger_age": p.get("age"),
+                "passenger_gender": p.get("gender"),
+                "airline_name": airline.name if airline else "",
+                "flight_number": flight.flight_number,
+                "route": f"{dep.code if dep else ''}-{arr.code if arr else ''}",
+                "departure_airport": dep.code if dep else "",
+                "arrival_airport": arr.code if arr else "",
+                "departure_city": dep.city if dep else "",
+                "arrival_city": arr.city if arr else "",
+                "departure_time": flight.departure_time,
+                "arrival_time": flight.arrival_time,
+                "seat_number": seat.seat_number,
+                "seat_class": seat.seat_class,
+                "payment_required": fares[tier] + surcharge,
+                "currency": "INR",
+                "ticket_number": None,
+            })
+        results[i]["total_fare"] = total_fare
+    db.execute(insert(Ticket), tickets)
+
+    adjust_available(db, seat_deltas([seat for allocated in booked.values() for seat in allocated], -1))
+    refresh_current_prices(db, [flight.id])
+    db.commit()
+    invalidate_flight_cache([flight.id])
+
+    rows = db.query(Booking).options(selectinload(Booking.tickets)).filter(
+        Booking.id.in_([booking_ids[i] for i in booked])
+    ).all()
+    by_id = {b.id: b for b in rows}
+    for i in booked:
+        results[i]["booking"] = by_id[booking_ids[i]]
+
+
+def _claim_for_group(db: Session, flight_id: int, seat_class: str, indexes: list[int], requests: dict[int, dict],
+                     booking_ids: dict[int, int], results: list[dict]) -> dict[int, list[Seat]]:
+    """Auto-assign `seat_class` seats to several bookings with one claim.
+
+    The seats are claimed for the first booking and handed out with one
+    UPDATE. If other bookings took seats since the counters were read, each
+    booking claims its own seats instead and only those that don't fit fail.
+    """
+    if not indexes:
+        return {}
+    needs = [len(requests[i]["passengers"]) for i in indexes]
+    anchor = booking_ids[indexes[0]]
+    try:
+        claimed = claim_seats(db, flight_id, anchor, count=sum(needs), seat_class=seat_class)
+    except ValueError:
+        _release_claims(db, [anchor])
+    else:
+        allocated, owner, start = {}, {}, 0
+        for i, need in zip(indexes, needs):
+            allocated[i] = claimed[start:start + need]
+            owner.update({seat.id: booking_ids[i] for seat in allocated[i]})
+            start += need
+        db.execute(
+            update(Seat).where(Seat.id.in_(list(owner))).values(booking_id=case(owner, value=Seat.id)),
+            execution_options={"synchronize_session": False},
+        )
+        return allocated
+
+    allocated = {}
+    for i, need in zip(indexes, needs):
+        try:
+            allocated[i] = claim_seats(db, flight_id, booking_ids[i], count=need, seat_class=seat_class)
+        except ValueError as exc:
+            _release_claims(db, [booking_ids[i]])
+            results[i]["error"] = str(exc)
+    return allocated
+
+
+def _release_claims(db: Session, booking_ids: list[int]) -> None:
+    # seats these (failed, uncommitted) bookings claimed go back; counters were never decremented
+    db.execute(
+        update(Seat).where(Seat.booking_id.in_(booking_ids)).values(is_available=True, booking_id=None),
+        execution_options={"synchronize_session": False},
+    )
+
+
 def get_booking_by_pnr(db: Session, pnr: str) -> Booking | None:
     return db.query(Booking).filter(Booking.pnr == pnr.upper()).first()
 
@@ -549,32 +1457,90 @@ def cancel_booking(db: Session, pnr: str) -> Booking | None:
     booking = get_booking_by_pnr(db, pnr)
     if not booking:
         return None
-    
-    # Use row-level lock to prevent concurrent modifications
-    booking = db.query(Booking).filter(Booking.pnr == pnr.upper()).with_for_update().first()
-    if not booking:
-        return None
-    
-    # Release seats back to available inventory
-    for ticket in booking.tickets:
-        if ticket.seat_id:
-            seat = db.query(Seat).filter(Seat.id == ticket.seat_id).with_for_update().first()
-            if seat:
-                seat.is_available = True
-                seat.booking_id = None
-
-    booking.status = "Cancelled"
-    db.commit()
+    flight_ids = {t.flight_id for t in booking.tickets}
+
+    # Row locks where the database has them, the flights' application locks otherwise
+    with flight_locks.hold(*flight_ids):
+        booking = db.query(Booking).filter(Booking.pnr == pnr.upper()).with_for_update().populate_existing().first()
+        if not booking:
+            return None
+
+        # Release seats still held by this booking back to available inventory
+        released = []
+        for ticket in booking.tickets:
+            if ticket.seat_id:
+                seat = db.query(Seat).filter(Seat.id == ticket.seat_id).with_for_update().populate_existing().first()
+                if seat and not seat.is_available and seat.booking_id == booking.id:
+                    seat.is_available = True
+                    seat.booking_id = None
+                    released.append(seat)
+
+        adjust_available(db, seat_deltas(released, +1))
+        refresh_current_prices(db, {seat.flight_id for seat in released})
+        booking.status = "Cancelled"
+        db.commit()
+    invalidate_flight_cache(flight_ids)
     db.refresh(booking)
     return booking
 
 
+def release_expired_holds(db: Session, now: datetime | None = None, batch_size: int = HOLD_REAP_BATCH) -> int:
+    """Cancel unpaid bookings whose seat hold has lapsed and free their seats.
+
+    Pending bookings from before holds existed have no `expires_at`; they
+    are treated as expiring SEAT_HOLD_MINUTES after creation. Works in
+    batches of `batch_size` bookings, each one transaction of set-based
+    UPDATEs (bookings, seats, seat counters) instead of per-row ORM writes.
+    Returns the number of bookings cancelled.
+    """
+    now = now or datetime.utcnow()
+    expired = and_(
+        Booking.status.in_(_PENDING_STATUSES),
+        or_(
+            Booking.expires_at <= now,
+            and_(Booking.expires_at.is_(None), Booking.created_at <= now - timedelta(minutes=SEAT_HOLD_MINUTES)),
+        ),
+    )
+    cancelled = 0
+    while True:
+        ids = db.scalars(select(Booking.id).where(expired).order_by(Booking.id).limit(batch_size)).all()
+        if not ids:
+            return cancelled
+        # the condition is checked again by the UPDATE: a payment may have won the race since
+        cancelled += db.execute(
+            update(Booking).where(Booking.id.in_(ids), expired).values(status="Cancelled"),
+            execution_options={"synchronize_session": False},
+        ).rowcount
+        held = and_(
+            Seat.booking_id.in_(select(Booking.id).where(Booking.id.in_(ids), Booking.status == "Cancelled")),
+            Seat.is_available == False,
+        )
+        counts = db.execute(
+            select(Seat.flight_id, Seat.seat_class, func.count()).where(held).group_by(Seat.flight_id, Seat.seat_class)
+        ).all()
+        db.execute(
+            update(Seat).where(held).values(is_available=True, booking_id=None),
+            execution_options={"synchronize_session": False},
+        )
+        flight_ids = {flight_id for flight_id, _, _ in counts}
+        adjust_available(db, {(flight_id, seat_class): n for flight_id, seat_class, n in counts})
+        refresh_current_prices(db, flight_ids)
+        db.commit()
+        invalidate_flight_cache(flight_ids)
+        if len(ids) < batch_size:
+            return cancelled
+
+
 def create_payment(db: Session, booking_reference: str, amount: float, method: str) -> Payment:
     # lookup booking by booking_reference (booking_id removed from API)
     booking = db.query(Booking).filter(Booking.booking_reference == str(booking_reference)).first()
 
     if not booking:
         raise ValueError("booking not found")
+    if booking.status == "Cancelled":
+        raise ValueError("booking is cancelled")
+    if booking.expires_at is not None and booking.expires_at <= datetime.utcnow():
+        raise ValueError("seat hold expired; please book again")
 
     # compute required amount from booking tickets
     required = 0.0
@@ -602,25 +1568,38 @@ def create_payment(db: Session, booking_reference: str, amount: float, method: s
             db.refresh(tx)
             return tx
 
-    # amount sufficient and seats already allocated -> success
+    # Confirm in the same conditional UPDATE that ends the hold, unless the reaper got
+    # there first: a paid booking is never left pending for the reaper to cancel
+    now = datetime.utcnow()
+    pnr = _generate_pnr(db)
+    confirmed = db.execute(
+        update(Booking)
+        .where(Booking.id == booking.id, Booking.status.in_(_PENDING_STATUSES),
+               or_(Booking.expires_at.is_(None), Booking.expires_at > now))
+        .values(status="Confirmed", pnr=pnr, expires_at=None),
+        execution_options={"synchronize_session": False},
+    ).rowcount
+    if not confirmed:
+        db.rollback()
+        db.refresh(booking)
+        if booking.status == "Confirmed":
+            raise ValueError("booking is already paid")
+        raise ValueError("seat hold expired; please book again")
+
+    # amount sufficient and seats already allocated -> success, in the same transaction
     tx.status = "Success"
     db.add(tx)
-    db.commit()
-    db.refresh(tx)
-
-    # Confirm booking and issue tickets (seats already allocated during booking)
-    booking.status = "Confirmed"
-    booking.pnr = _generate_pnr(db)
-
     for t in booking.tickets:
         # Issue ticket number if not already set
         if not t.ticket_number:
             t.ticket_number = "TKT" + uuid.uuid4().hex[:12].upper()
         if not t.issued_at:
-            t.issued_at = datetime.utcnow()
+            t.issued_at = now
 
     db.commit()
+    invalidate_flight_cache(t.flight_id for t in booking.tickets)
     db.refresh(booking)
+    db.refresh(tx)
 
     return tx
 
@@ -629,6 +1608,26 @@ def get_payment_by_transaction(db: Session, transaction_id: str) -> Payment | No
     return db.query(Payment).filter(Payment.transaction_id == transaction_id).first()
 
 
+def ensure_flight_durations(db: Session) -> int:
+    """Fill `duration_minutes` for flights stored without it (e.g. created by an
+    older release). Returns the number of flights updated."""
+    rows = (
+        db.query(Flight.id, Flight.departure_time, Flight.arrival_time)
+        .filter(Flight.duration_minutes.is_(None))
+        .all()
+    )
+    if not rows:
+        return 0
+    table = Flight.__table__
+    db.execute(
+        table.update().where(table.c.id == bindparam("_id")),
+        [{"_id": r.id, "duration_minutes": Flight.compute_duration_minutes(r.departure_time, r.arrival_time)}
+         for r in rows],
+    )
+    db.commit()
+    return len(rows)
+
+
 def ensure_all_flight_seats(db: Session) -> int:
     """Ensure every flight has Seat rows created based on its aircraft capacity.
 
@@ -727,6 +1726,8 @@ def ensure_all_flight_seats(db: Session) -> int:
         for i in range(0, len(all_seats), BATCH_SIZE):
             batch = all_seats[i:i + BATCH_SIZE]
             db.execute(Seat.__table__.insert(), batch)
+        rebuild_seat_inventory(db, [f.id for f in flights_needing_seats], commit=False)
+        refresh_current_prices(db, [f.id for f in flights_needing_seats])
         db.commit()
     
     return created
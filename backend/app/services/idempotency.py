@@ -0,0 +1,159 @@
+"""
+Idempotency keys for POST endpoints that must not run twice.
+
+A client that retries `POST /bookings/` or `POST /payments/` after a timeout
+sends the same `Idempotency-Key` header again. `run_idempotent()` records
+the key before the handler runs and the handler's response after it:
+
+- a replay of a finished request gets the stored response back, byte for byte;
+- a duplicate that arrives while the first is still running is refused with
+  409 by the primary-key conflict on the insert, before any booking or
+  payment work is done;
+- reusing a key for a different request body is 422.
+
+Keys are scoped per endpoint and per caller (the user, or the booking being
+paid), so two clients picking the same key never see each other's responses.
+Responses are kept for IDEMPOTENCY_TTL_HOURS; expired rows are replaced on
+reuse and purged in bulk by `purge_expired_keys()` from a background task.
+Server errors and "try again" refusals (409, 503) are not stored, so a
+request that crashed or lost a race for seats can be retried with its key.
+"""
+import hashlib
+import os
+from datetime import datetime, timedelta
+from typing import Callable
+
+import orjson
+from fastapi import HTTPException, status
+from fastapi.responses import Response
+from sqlalchemy import delete, insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.idempotency_key import IdempotencyKey
+
+
+IDEMPOTENCY_TTL_HOURS = float(os.getenv("IDEMPOTENCY_TTL_HOURS", "24"))
+# an unfinished request older than this is taken to have died and its key is reusable
+IDEMPOTENCY_LOCK_SECONDS = float(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "60"))
+REPLAY_HEADER = "Idempotent-Replayed"
+# the same request may succeed if repeated: the key is given back, not kept
+_RETRYABLE_STATUSES = frozenset({status.HTTP_409_CONFLICT, status.HTTP_503_SERVICE_UNAVAILABLE})
+
+
+def _retryable(status_code: int) -> bool:
+    return status_code >= 500 or status_code in _RETRYABLE_STATUSES
+
+
+def _digest(*parts: str | bytes) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode() if isinstance(part, str) else part)
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def run_idempotent(db: Session, scope: str, key: str | None, caller: int | str | None, request_body: bytes,
+                   handler: Callable[[], Response]) -> Response:
+    """Run `handler` at most once per `key` within `scope` ("booking", "payment") and `caller`.
+
+    `caller` is the user id or, where there is no user, the booking reference;
+    `request_body` identifies the request the key belongs to. Without a key
+    the handler simply runs. The handler returns a JSON response or raises
+    HTTPException; client errors are stored and replayed like successes,
+    except the retryable 409 and 503.
+    """
+    if key is None:
+        return handler()
+    key_hash = _digest(scope, "" if caller is None else str(caller), key)
+    request_hash = _digest(request_body)
+
+    stored = _claim(db, key_hash, request_hash)
+    if stored is not None:
+        return stored
+
+    try:
+        response = handler()
+    except HTTPException as exc:
+        if _retryable(exc.status_code):
+            _release(db, key_hash)
+            raise
+        _store(db, key_hash, exc.status_code, orjson.dumps({"detail": exc.detail}))
+        raise
+    except Exception:
+        _release(db, key_hash)
+        raise
+    if _retryable(response.status_code):
+        _release(db, key_hash)
+    else:
+        _store(db, key_hash, response.status_code, response.body)
+    return response
+
+
+def _claim(db: Session, key_hash: str, request_hash: str) -> Response | None:
+    """Take the key for this request; returns the stored response if it is a replay."""
+    now = datetime.utcnow()
+    try:
+        db.execute(insert(IdempotencyKey).values(
+            key_hash=key_hash, request_hash=request_hash, created_at=now,
+            expires_at=now + timedelta(hours=IDEMPOTENCY_TTL_HOURS),
+        ))
+        db.commit()
+        return None
+    except IntegrityError:
+        db.rollback()
+
+    row = db.get(IdempotencyKey, key_hash, populate_existing=True)
+    if row is None:
+        # the first request failed and gave the key back in the meantime
+        return _claim(db, key_hash, request_hash)
+    if row.expires_at <= now or (
+        row.status_code is None and row.created_at <= now - timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS)
+    ):
+        # expired, or abandoned mid-request: take it over unless another retry just did
+        taken = db.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.key_hash == key_hash,
+                   IdempotencyKey.created_at == row.created_at)
+            .values(request_hash=request_hash, status_code=None, response_body=None, created_at=now,
+                    expires_at=now + timedelta(hours=IDEMPOTENCY_TTL_HOURS)),
+            execution_options={"synchronize_session": False},
+        ).rowcount
+        db.commit()
+        if taken:
+            return None
+        row = db.get(IdempotencyKey, key_hash, populate_existing=True)
+
+    if row is None or row.status_code is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                            detail="A request with this Idempotency-Key is already in progress")
+    if row.request_hash != request_hash:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                            detail="Idempotency-Key was already used for a different request")
+    return Response(row.response_body, status_code=row.status_code, media_type="application/json",
+                    headers={REPLAY_HEADER: "true"})
+
+
+def _store(db: Session, key_hash: str, status_code: int, body: bytes) -> None:
+    # the handler may have left its transaction failed (e.g. a rolled-back booking)
+    db.rollback()
+    db.execute(
+        update(IdempotencyKey).where(IdempotencyKey.key_hash == key_hash)
+        .values(status_code=status_code, response_body=body),
+        execution_options={"synchronize_session": False},
+    )
+    db.commit()
+
+
+def _release(db: Session, key_hash: str) -> None:
+    db.rollback()
+    db.execute(delete(IdempotencyKey).where(IdempotencyKey.key_hash == key_hash, IdempotencyKey.status_code.is_(None)))
+    db.commit()
+
+
+def purge_expired_keys(db: Session, now: datetime | None = None) -> int:
+    """Delete stored responses past their TTL; returns the number removed."""
+    now = now or datetime.utcnow()
+    removed = db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= now)).rowcount
+    db.commit()
+    return removed
@@ -0,0 +1,259 @@
+"""
+Seat inventory counters.
+
+`FlightSeatInventory` holds total and available seats per flight and class so
+search, flight details, seat maps, staff dashboards and the demand simulator
+can read seat counts without aggregating the `seats` table. Writers call
+`adjust_available()` inside the same transaction that flips `Seat.is_available`.
+
+Bookings take seats with `claim_seats()`, a compare-and-set on each seat row,
+so concurrent bookings on one flight never wait on a flight-wide lock.
+"""
+from collections import defaultdict
+from typing import Iterable
+
+from sqlalchemy import case, func, select, update
+from sqlalchemy.orm import Session
+
+from app.models.seat import Seat
+from app.models.seat_inventory import FlightSeatInventory
+
+
+# Database seat class -> API tier name used in search responses
+DB_CLASS_TO_TIER = {"Economy": "ECONOMY", "Business": "BUSINESS", "First": "FIRST"}
+
+
+class SeatContention(ValueError):
+    """Seats were refused only because other writers got there first.
+
+    The same request may succeed if repeated, so routes answer it with 409
+    and idempotency keys are not kept for it.
+    """
+
+
+def _empty_stats() -> dict:
+    return {"total": 0, "available": 0, "by_class": {}}
+
+
+def get_inventory_map(db: Session, flight_ids: Iterable[int]) -> dict[int, dict]:
+    """Return seat counts for `flight_ids`.
+
+    Shape: {flight_id: {"total": int, "available": int,
+                        "by_class": {seat_class: {"total": int, "available": int}}}}
+
+    Flights without counter rows (e.g. created by an older release) fall back
+    to aggregating their seats, so results are always complete.
+    """
+    flight_ids = list(set(flight_ids))
+    result: dict[int, dict] = {}
+    if not flight_ids:
+        return result
+
+    rows = (
+        db.query(
+            FlightSeatInventory.flight_id,
+            FlightSeatInventory.seat_class,
+            FlightSeatInventory.total_seats,
+            FlightSeatInventory.available_seats,
+        )
+        .filter(FlightSeatInventory.flight_id.in_(flight_ids))
+        .all()
+    )
+
+    missing = set(flight_ids) - {r.flight_id for r in rows}
+    if missing:
+        rows = list(rows) + aggregate_seats(db, missing)
+
+    for r in rows:
+        stats = result.setdefault(r.flight_id, _empty_stats())
+        stats["total"] += r.total_seats or 0
+        stats["available"] += r.available_seats or 0
+        stats["by_class"][r.seat_class] = {"total": r.total_seats or 0, "available": r.available_seats or 0}
+
+    for fid in flight_ids:
+        result.setdefault(fid, _empty_stats())
+    return result
+
+
+def get_flight_inventory(db: Session, flight_id: int) -> dict:
+    """Seat counts for a single flight (see `get_inventory_map`)."""
+    return get_inventory_map(db, [flight_id])[flight_id]
+
+
+def seats_by_tier(stats: dict) -> dict[str, int]:
+    """Available seats keyed by API tier name, as returned by flight search."""
+    by_tier = {"ECONOMY": 0, "BUSINESS": 0, "FIRST": 0}
+    for seat_class, counts in stats["by_class"].items():
+        tier = DB_CLASS_TO_TIER.get(seat_class, "ECONOMY")
+        by_tier[tier] = counts["available"]
+    return by_tier
+
+
+def adjust_available(db: Session, changes: dict[tuple[int, str], int]) -> None:
+    """Apply available-seat deltas keyed by (flight_id, seat_class).
+
+    Issues relative UPDATEs so concurrent writers don't overwrite each other.
+    Does not commit: call it inside the transaction that changes the seats.
+    """
+    table = FlightSeatInventory.__table__
+    for (flight_id, seat_class), delta in changes.items():
+        if not delta:
+            continue
+        db.execute(
+            table.update()
+            .where(table.c.flight_id == flight_id, table.c.seat_class == seat_class)
+            .values(available_seats=table.c.available_seats + delta)
+        )
+
+
+# conditional UPDATE rounds before giving up on seats other bookings keep taking first
+CLAIM_ATTEMPTS = 5
+
+
+def claim_seats(db: Session, flight_id: int, booking_id: int, count: int = 0, seat_class: str | None = None,
+                seat_ids: list[int] | None = None, attempts: int = CLAIM_ATTEMPTS) -> list[Seat]:
+    """Give free seats on `flight_id` to `booking_id`; returns the claimed `Seat` rows.
+
+    With `seat_ids` exactly those seats are claimed (all or none, in that
+    order); otherwise `count` free `seat_class` seats are. Seats are taken
+    with `UPDATE seats SET is_available = false, booking_id = ... WHERE id IN
+    (...) AND is_available`, so a seat another booking took in the meantime
+    simply isn't claimed; short counts retry with fresh candidates. Candidate
+    reads skip rows other transactions have locked where the database
+    supports it. The flight row is never locked.
+
+    Does not commit, and raises ValueError when the seats aren't there
+    (SeatContention when they kept being taken); the caller rolls back
+    whatever was claimed.
+    """
+    if seat_ids is not None:
+        seat_ids = list(dict.fromkeys(seat_ids))
+        if _claim(db, booking_id, Seat.id.in_(seat_ids), Seat.flight_id == flight_id) != len(seat_ids):
+            raise ValueError("Selected seats are not available or do not belong to this flight")
+        position = {seat_id: i for i, seat_id in enumerate(seat_ids)}
+        return sorted(_claimed(db, booking_id, seat_ids), key=lambda seat: position[seat.id])
+
+    claimed = 0
+    tried: list[int] = []
+    for _ in range(attempts):
+        candidates = db.execute(
+            select(Seat.id)
+            .where(Seat.flight_id == flight_id, Seat.seat_class == seat_class, Seat.is_available == True)
+            .order_by(Seat.id)
+            .limit(count - claimed)
+            .with_for_update(skip_locked=True)
+        ).scalars().all()
+        if len(candidates) < count - claimed:
+            available = claimed + db.query(func.count(Seat.id)).filter(
+                Seat.flight_id == flight_id, Seat.seat_class == seat_class, Seat.is_available == True,
+            ).scalar()
+            raise ValueError(f"Not enough {seat_class} class seats available. Requested: {count}, Available: {available}")
+        tried.extend(candidates)
+        claimed += _claim(db, booking_id, Seat.id.in_(candidates))
+        if claimed == count:
+            return _claimed(db, booking_id, tried)
+    raise SeatContention(f"{seat_class} seats are selling fast; please try again")
+
+
+def _claim(db: Session, booking_id: int, *where) -> int:
+    result = db.execute(
+        update(Seat)
+        .where(*where, Seat.is_available == True)
+        .values(is_available=False, booking_id=booking_id)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def _claimed(db: Session, booking_id: int, seat_ids: list[int]) -> list[Seat]:
+    # populate_existing: Seat objects already in the session still show them free
+    return (
+        db.query(Seat)
+        .filter(Seat.id.in_(seat_ids), Seat.booking_id == booking_id)
+        .order_by(Seat.id)
+        .populate_existing()
+        .all()
+    )
+
+
+def seat_deltas(seats: Iterable, delta: int) -> dict[tuple[int, str], int]:
+    """Build `adjust_available` changes for a group of Seat rows, `delta` per seat."""
+    changes: dict[tuple[int, str], int] = defaultdict(int)
+    for seat in seats:
+        changes[(seat.flight_id, seat.seat_class)] += delta
+    return changes
+
+
+def rebuild_seat_inventory(db: Session, flight_ids: Iterable[int] | None = None, commit: bool = True) -> int:
+    """Rebuild counters from the `seats` table.
+
+    Rebuilds every flight when `flight_ids` is None. Returns the number of
+    counter rows written.
+    """
+    table = FlightSeatInventory.__table__
+    delete = table.delete()
+    seats_query = (
+        select(
+            Seat.flight_id,
+            Seat.seat_class,
+            func.count(Seat.id),
+            func.coalesce(func.sum(case((Seat.is_available == True, 1), else_=0)), 0),
+        )
+        .where(Seat.flight_id.is_not(None), Seat.seat_class.is_not(None))
+        .group_by(Seat.flight_id, Seat.seat_class)
+    )
+
+    written = 0
+    if flight_ids is None:
+        db.execute(delete)
+        written = db.execute(
+            table.insert().from_select(["flight_id", "seat_class", "total_seats", "available_seats"], seats_query)
+        ).rowcount
+    else:
+        flight_ids = list(set(flight_ids))
+        # chunk to keep IN lists a reasonable size
+        for i in range(0, len(flight_ids), 500):
+            chunk = flight_ids[i:i + 500]
+            db.execute(delete.where(table.c.flight_id.in_(chunk)))
+            written += db.execute(
+                table.insert().from_select(
+                    ["flight_id", "seat_class", "total_seats", "available_seats"],
+                    seats_query.where(Seat.flight_id.in_(chunk)),
+                )
+            ).rowcount
+
+    if commit:
+        db.commit()
+    return written
+
+
+def ensure_seat_inventory(db: Session) -> int:
+    """Build counters for flights that have seats but no counter rows.
+
+    Returns the number of flights rebuilt.
+    """
+    with_counters = select(FlightSeatInventory.flight_id).distinct()
+    flight_ids = [
+        r[0] for r in db.query(Seat.flight_id)
+        .filter(Seat.flight_id.is_not(None), ~Seat.flight_id.in_(with_counters))
+        .distinct()
+        .all()
+    ]
+    if flight_ids:
+        rebuild_seat_inventory(db, flight_ids)
+    return len(flight_ids)
+
+
+def aggregate_seats(db: Session, flight_ids: Iterable[int]) -> list:
+    """Count seats per (flight_id, seat_class) straight from the `seats` table."""
+    return (
+        db.query(
+            Seat.flight_id,
+            Seat.seat_class,
+            func.count(Seat.id).label("total_seats"),
+            func.sum(case((Seat.is_available == True, 1), else_=0)).label("available_seats"),
+        )
+        .filter(Seat.flight_id.in_(list(flight_ids)))
+        .group_by(Seat.flight_id, Seat.seat_class)
+        .all()
+    )
@@ -1,5 +1,8 @@
 from datetime import datetime, timezone
 from enum import Enum
+from typing import Sequence
+
+import numpy as np
 
 
 class DemandLevel(str, Enum):
@@ -9,6 +12,21 @@ class DemandLevel(str, Enum):
     EXTREME = "extreme"
 
 
+DEMAND_MULTIPLIERS = {
+    DemandLevel.LOW: 0.95,
+    DemandLevel.MEDIUM: 1.0,
+    DemandLevel.HIGH: 1.10,
+    DemandLevel.EXTREME: 1.25,
+}
+
+TIER_MULTIPLIERS = {
+    "ECONOMY": 1.0,
+    "ECONOMY_FLEX": 1.2,
+    "BUSINESS": 1.8,
+    "FIRST": 2.5,
+}
+
+
 def inventory_multiplier(remaining_seats: int, total_seats: int) -> float:
     if total_seats == 0:
         return 1.0
@@ -49,22 +67,11 @@ def time_multiplier(departure_time: datetime, now: datetime | None = None) -> fl
 
 
 def demand_multiplier(demand_level: DemandLevel) -> float:
-    return {
-        DemandLevel.LOW: 0.95,
-        DemandLevel.MEDIUM: 1.0,
-        DemandLevel.HIGH: 1.10,
-        DemandLevel.EXTREME: 1.25,
-    }[demand_level]
+    return DEMAND_MULTIPLIERS[demand_level]
 
 
 def tier_multiplier(tier: str) -> float:
-    mapping = {
-        "ECONOMY": 1.0,
-        "ECONOMY_FLEX": 1.2,
-        "BUSINESS": 1.8,
-        "FIRST": 2.5,
-    }
-    return mapping.get(tier.upper(), 1.0)
+    return TIER_MULTIPLIERS.get(tier.upper(), 1.0)
 
 
 def compute_dynamic_price(
@@ -131,3 +138,107 @@ def compute_dynamic_price(
     price = min(price, max_price)
     
     return round(price, 2)
+
+
+def compute_dynamic_prices(
+    base_fares: Sequence[float],
+    departure_times: Sequence[datetime],
+    total_seats: Sequence[int],
+    booked_seats: Sequence[int],
+    demand_levels: Sequence[str | DemandLevel | None] | str | DemandLevel = DemandLevel.MEDIUM,
+    tiers: Sequence[str] | str = "ECONOMY",
+    now: datetime | None = None,
+) -> list[float]:
+    """
+    Batch version of `compute_dynamic_price`.
+
+    Evaluates every multiplier for all rows in one NumPy pass against a single
+    `now`; each result equals `compute_dynamic_price` for the same row.
+
+    Args:
+        base_fares, departure_times, total_seats, booked_seats: one entry per row
+        demand_levels: one per row, or a single level for every row
+        tiers: one per row, or a single tier for every row
+        now: Current time (defaults to utcnow), shared by all rows
+
+    Returns:
+        Dynamic prices rounded to 2 decimals, in row order
+
+    Raises:
+        ValueError: If any row has a negative fare or invalid seat counts
+    """
+    n = len(base_fares)
+    if n == 0:
+        return []
+    if isinstance(demand_levels, str):
+        demand_levels = [demand_levels] * n
+    if isinstance(tiers, str):
+        tiers = [tiers] * n
+
+    base = np.asarray(base_fares, dtype=np.float64)
+    total = np.asarray(total_seats, dtype=np.int64)
+    booked = np.asarray(booked_seats, dtype=np.int64)
+    if not (len(departure_times) == len(total) == len(booked) == len(demand_levels) == len(tiers) == n):
+        raise ValueError("all inputs must have the same length")
+
+    # Validation (same rules as the scalar function)
+    if (base < 0).any():
+        raise ValueError("base_fare must be non-negative")
+    if (total < 0).any():
+        raise ValueError("total_seats must be non-negative")
+    if (booked < 0).any():
+        raise ValueError("booked_seats must be non-negative")
+    if (booked > total).any():
+        raise ValueError("booked_seats cannot exceed total_seats")
+
+    # Inventory multiplier
+    remaining = np.maximum(total - booked, 0)
+    remaining_pct = np.divide(remaining, total, out=np.zeros(n), where=total > 0)
+    inv_mult = np.select(
+        [remaining_pct > 0.7, remaining_pct > 0.4, remaining_pct > 0.2],
+        [0.9, 1.0, 1.1],
+        default=1.25,
+    )
+
+    # Time multiplier from hours until departure
+    if now is None:
+        now = datetime.now(timezone.utc)
+    naive_now = now.replace(tzinfo=None)
+    seconds = np.fromiter(
+        ((_comparable_departure(d, now) - naive_now).total_seconds() for d in departure_times),
+        dtype=np.float64, count=n,
+    )
+    hours = seconds / 3600
+    t_mult = np.select([hours > 720, hours > 168, hours > 48], [1.0, 1.05, 1.15], default=1.30)
+
+    # Demand and tier multipliers (lookups per distinct value)
+    demand_lookup = {level: _demand_multiplier_for(level) for level in set(demand_levels)}
+    tier_lookup = {tier: TIER_MULTIPLIERS.get(tier.upper(), 1.0) for tier in set(tiers)}
+    d_mult = np.fromiter((demand_lookup[level] for level in demand_levels), dtype=np.float64, count=n)
+    tr_mult = np.fromiter((tier_lookup[tier] for tier in tiers), dtype=np.float64, count=n)
+
+    price = base * inv_mult * t_mult * d_mult * tr_mult
+    price = np.minimum(price, base * 10.0)
+    # no seats: base fare unchanged
+    price = np.where(total == 0, base, price)
+
+    # round() per value so results match the scalar function exactly
+    return [round(p, 2) for p in price.tolist()]
+
+
+def _comparable_departure(departure_time: datetime, now: datetime) -> datetime:
+    """Naive departure time on the same clock as naive `now` (see time_multiplier)."""
+    if departure_time.tzinfo is None:
+        return departure_time
+    if now.tzinfo is not None:
+        return departure_time.astimezone(now.tzinfo).replace(tzinfo=None)
+    return departure_time.replace(tzinfo=None)
+
+
+def _demand_multiplier_for(demand_level: str | DemandLevel | None) -> float:
+    if isinstance(demand_level, DemandLevel):
+        return DEMAND_MULTIPLIERS[demand_level]
+    try:
+        return DEMAND_MULTIPLIERS[DemandLevel(demand_level.lower())]
+    except Exception:
+        return DEMAND_MULTIPLIERS[DemandLevel.MEDIUM]
@@ -0,0 +1,66 @@
+"""
+"Best" ranking for flight search.
+
+Each candidate flight gets a score from its current fare, its block time and
+how far its departure is from the traveller's preferred time of day; lower is
+better. Fare and duration are taken relative to the cheapest and shortest
+candidates, so a flight twice the cheapest fare costs as much score as one
+twice the shortest duration would, times their weights.
+
+Only the best `k` are needed for a page, so `top_k` keeps a bounded heap
+(`heapq.nsmallest`) instead of sorting the whole candidate set, and callers
+load and format just those flights.
+"""
+import heapq
+from datetime import datetime
+from typing import Iterable, NamedTuple
+
+from app.services.search_facets import TIME_OF_DAY_BUCKETS
+
+
+BEST_WEIGHTS = {"price": 0.6, "duration": 0.3, "departure": 0.1}
+
+
+class Scored(NamedTuple):
+    score: float
+    flight_id: int
+
+
+def departure_penalty(departure_time: datetime, prefer_time: str | None) -> float:
+    """0 inside the preferred time-of-day bucket, rising to 1 twelve hours away from it."""
+    if not prefer_time:
+        return 0.0
+    start, end = TIME_OF_DAY_BUCKETS[prefer_time]
+    hour = departure_time.hour + departure_time.minute / 60
+    if start <= hour < end:
+        return 0.0
+    # circular distance in hours to the nearer edge of the bucket
+    distance = min((start - hour) % 24, (hour - end) % 24)
+    return min(distance / 12, 1.0)
+
+
+def top_k(candidates: Iterable[tuple[int, float, int | None, datetime]], k: int,
+          prefer_time: str | None = None, weights: dict | None = None) -> list[Scored]:
+    """The `k` best of `candidates` ((flight_id, fare, duration_minutes, departure_time)), best first.
+
+    Ties go to the lower flight id, so the order is total and pages are stable.
+    """
+    candidates = list(candidates)
+    if not candidates or k <= 0:
+        return []
+    weights = weights or BEST_WEIGHTS
+    cheapest = min(fare for _, fare, _, _ in candidates) or 1.0
+    durations = [d for _, _, d, _ in candidates if d]
+    shortest = min(durations) if durations else 1
+    w_price, w_duration, w_departure = weights["price"], weights["duration"], weights["departure"]
+
+    def scored():
+        for flight_id, fare, duration, departure_time in candidates:
+            score = w_price * (fare / cheapest - 1)
+            if duration:
+                score += w_duration * (duration / shortest - 1)
+            if prefer_time:
+                score += w_departure * departure_penalty(departure_time, prefer_time)
+            yield Scored(round(score, 6), flight_id)
+
+    return heapq.nsmallest(k, scored())
@@ -0,0 +1,180 @@
+"""
+In-process cache of reference data: airports, airlines and aircraft.
+
+Search, flight admin and the airline schedule feed resolve codes, names and
+models to ids many times per request. This keeps one immutable snapshot of
+the three (small) tables in memory, keyed the way callers look them up, so
+those lookups cost a dict access instead of a query.
+
+The snapshot is loaded at startup, dropped by the admin CRUD routes for
+airports, airlines and aircraft, and reloaded after
+`REFERENCE_DATA_MAX_AGE_SECONDS` to pick up edits made by other workers. A
+lookup that misses is retried against the database, so rows created
+elsewhere resolve immediately.
+"""
+import os
+import threading
+import time
+from collections import namedtuple
+
+from sqlalchemy.orm import Session
+
+from app.models.aircraft import Aircraft
+from app.models.airline import Airline
+from app.models.airport import Airport
+from app.utils.cache import SingleFlight
+
+
+AirportRef = namedtuple("AirportRef", "id code name city country")
+AirlineRef = namedtuple("AirlineRef", "id code name")
+AircraftRef = namedtuple("AircraftRef", "id model capacity economy_count premium_economy_count business_count first_count")
+
+
+class _Snapshot:
+    def __init__(self, airports: list[AirportRef], airlines: list[AirlineRef], aircraft: list[AircraftRef]):
+        self.airports = {a.id: a for a in airports}
+        self.airlines = {a.id: a for a in airlines}
+        self.aircraft = {a.id: a for a in aircraft}
+        self.airport_codes = {a.code.upper(): a for a in airports}
+        self.airline_codes = {a.code.upper(): a for a in airlines}
+        # names and models aren't unique; like `.first()`, the lowest id wins
+        self.airport_names: dict[str, AirportRef] = {}
+        for a in sorted(airports, key=lambda r: r.id):
+            self.airport_names.setdefault(a.name, a)
+        self.airline_names: dict[str, AirlineRef] = {}
+        for a in sorted(airlines, key=lambda r: r.id):
+            self.airline_names.setdefault(a.name, a)
+        self.aircraft_models: dict[str, AircraftRef] = {}
+        for a in sorted(aircraft, key=lambda r: r.id):
+            self.aircraft_models.setdefault(a.model, a)
+
+
+class ReferenceData:
+    """Airports, airlines and aircraft by id, code, name and model."""
+
+    def __init__(self, max_age_seconds: float = 300.0):
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._snapshot: _Snapshot | None = None
+        self._loaded_at: float | None = None
+        self._loads = SingleFlight()
+        self.loads = 0
+
+    # -- maintenance -------------------------------------------------------
+
+    def load(self, db: Session) -> None:
+        """Reload every airport, airline and aircraft."""
+        snapshot = _Snapshot(
+            [AirportRef(*r) for r in db.query(Airport.id, Airport.code, Airport.name, Airport.city, Airport.country)],
+            [AirlineRef(*r) for r in db.query(Airline.id, Airline.code, Airline.name)],
+            [AircraftRef(*r) for r in db.query(Aircraft.id, Aircraft.model, Aircraft.capacity, Aircraft.economy_count,
+                                               Aircraft.premium_economy_count, Aircraft.business_count,
+                                               Aircraft.first_count)],
+        )
+        with self._lock:
+            self._snapshot = snapshot
+            self._loaded_at = time.monotonic()
+            self.loads += 1
+
+    def invalidate(self) -> None:
+        """Reload on next use. Call after creating, editing or deleting reference rows."""
+        with self._lock:
+            self._loaded_at = None
+
+    def _current(self, db: Session) -> _Snapshot:
+        with self._lock:
+            snapshot, loaded_at = self._snapshot, self._loaded_at
+        if snapshot is None or loaded_at is None or time.monotonic() - loaded_at > self.max_age_seconds:
+            self._loads.do("load", lambda: self.load(db))
+            with self._lock:
+                snapshot = self._snapshot
+        return snapshot
+
+    def _lookup(self, db: Session, find, query):
+        """`find(snapshot)`, or when it misses, `query()` against the database
+        (reloading the snapshot next time if the row exists)."""
+        found = find(self._current(db))
+        if found is not None:
+            return found
+        row = query()
+        if row is None:
+            return None
+        self.invalidate()
+        return find(self._current(db))
+
+    # -- lookups -----------------------------------------------------------
+
+    def airport(self, db: Session, value: str | None) -> AirportRef | None:
+        """Airport by code (any case) or exact name."""
+        if not value:
+            return None
+        return self._lookup(
+            db,
+            lambda s: s.airport_codes.get(value.upper()) or s.airport_names.get(value),
+            lambda: db.query(Airport.id).filter((Airport.code == value.upper()) | (Airport.name == value)).first(),
+        )
+
+    def airport_id(self, db: Session, value: str | None) -> int | None:
+        airport = self.airport(db, value)
+        return airport.id if airport else None
+
+    def airport_by_id(self, db: Session, airport_id: int | None) -> AirportRef | None:
+        if airport_id is None:
+            return None
+        return self._lookup(
+            db,
+            lambda s: s.airports.get(airport_id),
+            lambda: db.query(Airport.id).filter(Airport.id == airport_id).first(),
+        )
+
+    def airline(self, db: Session, value: str | None) -> AirlineRef | None:
+        """Airline by code (any case) or exact name."""
+        if not value:
+            return None
+        return self._lookup(
+            db,
+            lambda s: s.airline_codes.get(value.upper()) or s.airline_names.get(value),
+            lambda: db.query(Airline.id).filter((Airline.code == value.upper()) | (Airline.name == value)).first(),
+        )
+
+    def airline_by_id(self, db: Session, airline_id: int | None) -> AirlineRef | None:
+        if airline_id is None:
+            return None
+        return self._lookup(
+            db,
+            lambda s: s.airlines.get(airline_id),
+            lambda: db.query(Airline.id).filter(Airline.id == airline_id).first(),
+        )
+
+    def aircraft(self, db: Session, model: str | None) -> AircraftRef | None:
+        """Aircraft by exact model name."""
+        if not model:
+            return None
+        return self._lookup(
+            db,
+            lambda s: s.aircraft_models.get(model),
+            lambda: db.query(Aircraft.id).filter(Aircraft.model == model).first(),
+        )
+
+    def aircraft_by_id(self, db: Session, aircraft_id: int | None) -> AircraftRef | None:
+        if aircraft_id is None:
+            return None
+        return self._lookup(
+            db,
+            lambda s: s.aircraft.get(aircraft_id),
+            lambda: db.query(Aircraft.id).filter(Aircraft.id == aircraft_id).first(),
+        )
+
+    def stats(self) -> dict:
+        with self._lock:
+            snapshot, loaded_at = self._snapshot, self._loaded_at
+        return {
+            "airports": len(snapshot.airports) if snapshot else 0,
+            "airlines": len(snapshot.airlines) if snapshot else 0,
+            "aircraft": len(snapshot.aircraft) if snapshot else 0,
+            "loads": self.loads,
+            "age_seconds": None if loaded_at is None else round(time.monotonic() - loaded_at, 1),
+        }
+
+
+reference_data = ReferenceData(max_age_seconds=float(os.getenv("REFERENCE_DATA_MAX_AGE_SECONDS", "300")))
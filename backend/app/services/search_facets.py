@@ -0,0 +1,134 @@
+"""
+Facet filters and counts for flight search.
+
+Besides route, date and duration, search filters on four facets: airline,
+departure time of day, fare range and seat-class availability. Within a facet
+the selected values are alternatives (OR); across facets they all apply (AND).
+
+`facet_counts` counts a search's candidate flights for every facet value in a
+single pass. Each facet is counted with the other facets' selections applied
+but not its own, so a UI can show how many flights each alternative would add.
+"""
+import math
+from datetime import datetime, timedelta
+from typing import Iterable, NamedTuple
+
+from sqlalchemy import and_, func, or_
+
+
+# name -> [start hour, end hour)
+TIME_OF_DAY_BUCKETS = {
+    "early_morning": (0, 6),
+    "morning": (6, 12),
+    "afternoon": (12, 18),
+    "evening": (18, 24),
+}
+
+SEAT_CLASS_FACETS = ("ECONOMY", "BUSINESS", "FIRST")
+
+# price buckets use the smallest of these widths that needs at most _PRICE_BUCKETS buckets
+_PRICE_STEPS = (250, 500, 1000, 2000, 2500, 5000, 10000, 20000, 50000, 100000)
+_PRICE_BUCKETS = 6
+
+
+class Candidate(NamedTuple):
+    """What facet counting needs to know about one flight."""
+    airline_id: int | None
+    time_of_day: str
+    price: float
+    available_classes: frozenset
+
+
+def time_of_day(departure_time: datetime) -> str:
+    for name, (start, end) in TIME_OF_DAY_BUCKETS.items():
+        if start <= departure_time.hour < end:
+            return name
+    raise ValueError(f"no time-of-day bucket for {departure_time!r}")
+
+
+def time_of_day_clause(column, buckets: Iterable[str], window: tuple[datetime, datetime] | None = None):
+    """SQL condition: `column`'s hour falls in one of `buckets`, or None when
+    they cover the whole day.
+
+    With a date window the condition is a set of `column` ranges (one per day
+    and run of adjacent buckets), which the route/date index serves directly;
+    without one it compares the extracted hour.
+    """
+    hours = sorted({h for b in buckets for h in range(*TIME_OF_DAY_BUCKETS[b])})
+    if len(hours) == 24:
+        return None
+    if window is None:
+        return func.extract("hour", column).in_(hours)
+
+    runs = []  # merged [start, end) hour ranges
+    for hour in hours:
+        if runs and runs[-1][1] == hour:
+            runs[-1][1] = hour + 1
+        else:
+            runs.append([hour, hour + 1])
+    start, end = window
+    day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    ranges = []
+    while day < end:
+        for first, last in runs:
+            ranges.append(and_(column >= day + timedelta(hours=first), column < day + timedelta(hours=last)))
+        day += timedelta(days=1)
+    return or_(*ranges)
+
+
+def price_buckets(prices: Iterable[float]) -> list[tuple[float, float]]:
+    """Up to `_PRICE_BUCKETS` equal-width [min, max) ranges covering `prices`, on round edges."""
+    prices = list(prices)
+    if not prices:
+        return []
+    low, high = min(prices), max(prices)
+    step = next((s for s in _PRICE_STEPS if (high // s - low // s) < _PRICE_BUCKETS), _PRICE_STEPS[-1])
+    first = math.floor(low / step) * step
+    count = int(high // step - low // step) + 1
+    return [(first + i * step, first + (i + 1) * step) for i in range(count)]
+
+
+def facet_counts(candidates: list[Candidate], airline_ids: set | None = None, times_of_day: set | None = None,
+                 min_price: float | None = None, max_price: float | None = None,
+                 available_classes: set | None = None) -> dict:
+    """Count `candidates` per facet value in one pass. A selection of None
+    doesn't filter; an empty one matches nothing.
+
+    Returns {"total", "airlines": {airline_id: n}, "time_of_day": {bucket: n},
+    "price_ranges": [(min, max, n)], "seat_classes": {tier: n}}, where
+    "total" counts the flights matching every selection.
+    """
+    buckets = price_buckets(c.price for c in candidates)
+    step_origin = buckets[0][0] if buckets else 0.0
+    step = (buckets[0][1] - buckets[0][0]) if buckets else 1.0
+
+    total = 0
+    airlines: dict = {}
+    times = dict.fromkeys(TIME_OF_DAY_BUCKETS, 0)
+    prices = [0] * len(buckets)
+    classes = dict.fromkeys(SEAT_CLASS_FACETS, 0)
+
+    for c in candidates:
+        by_airline = airline_ids is None or c.airline_id in airline_ids
+        by_time = times_of_day is None or c.time_of_day in times_of_day
+        by_price = (min_price is None or c.price >= min_price) and (max_price is None or c.price <= max_price)
+        by_class = available_classes is None or bool(c.available_classes & available_classes)
+
+        if by_time and by_price and by_class:
+            airlines[c.airline_id] = airlines.get(c.airline_id, 0) + 1
+        if by_airline and by_price and by_class:
+            times[c.time_of_day] += 1
+        if by_airline and by_time and by_class:
+            prices[min(int((c.price - step_origin) // step), len(prices) - 1)] += 1
+        if by_airline and by_time and by_price:
+            for tier in c.available_classes:
+                classes[tier] += 1
+            total += by_class
+
+    return {
+        "total": total,
+        "airlines": airlines,
+        "time_of_day": times,
+        "price_ranges": [(low, high, n) for (low, high), n in zip(buckets, prices)],
+        "seat_classes": classes,
+    }
@@ -0,0 +1,114 @@
+"""
+Round-trip and multi-city search.
+
+A trip is a list of legs (origin, destination, date). Each leg is an ordinary
+`search_flights` call, so leg results live in the search cache and trips that
+share a leg -- the outbound of several round trips, say -- reuse it. Legs are
+searched concurrently on a small shared pool, each with its own session.
+
+Itineraries pick one flight per leg, each departing at least
+`min_connection_minutes` after the previous one lands. They are built leg by
+leg keeping, for each flight of the leg, only the `limit` cheapest (or
+shortest) partial itineraries ending with it. Whether a partial can go on
+depends only on its last flight, so nothing that could still make the top
+`limit` is dropped, and the work stays linear in the number of legs instead
+of growing with the product of every leg's options.
+"""
+import heapq
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from app.config import SessionLocal
+from app.models.flight import Flight
+from app.services.fare_service import price_tier
+from app.services.flight_service import search_flights
+
+
+TRIP_SEARCH_WORKERS = int(os.getenv("TRIP_SEARCH_WORKERS", "4"))
+# flights considered per leg
+TRIP_LEG_OPTIONS = int(os.getenv("TRIP_LEG_OPTIONS", "20"))
+
+_leg_pool = ThreadPoolExecutor(max_workers=TRIP_SEARCH_WORKERS, thread_name_prefix="trip-leg")
+
+
+def search_trip(legs: list[dict], sort_by: str = "price", limit: int = 10, tier: str = "ECONOMY",
+                min_connection_minutes: int = 60) -> list[dict]:
+    """
+    Priced itineraries for a trip of one or more legs, best first.
+
+    Args:
+        legs: dicts of origin, destination and date (YYYY-MM-DD), in travel order
+        sort_by: 'price' (total fare in `tier`) or 'duration' (total flight time)
+        limit: itineraries to return
+        tier: fare tier; flights without a seat left in it are skipped
+        min_connection_minutes: shortest gap between landing and the next departure
+
+    Returns:
+        [{"legs": [flight result per leg], "total_price", "total_duration_minutes",
+          "seats_left"}]; empty when some leg has no usable flight.
+    """
+    if sort_by not in ("price", "duration"):
+        raise ValueError(f"unsupported sort_by: {sort_by}")
+    for leg in legs:
+        if leg["origin"] == leg["destination"]:
+            raise ValueError("origin and destination must differ")
+
+    futures = [_leg_pool.submit(_search_leg, leg, sort_by, tier) for leg in legs]
+    options = [future.result() for future in futures]
+    if not all(options):
+        return []
+    return _combine(options, sort_by, limit, timedelta(minutes=min_connection_minutes))
+
+
+def _search_leg(leg: dict, sort_by: str, tier: str) -> list[dict]:
+    # runs on the pool, so it must not share the request's session
+    session = SessionLocal()
+    try:
+        flights = search_flights(session, origin=leg["origin"], destination=leg["destination"], date=leg["date"],
+                                 sort_by=sort_by, limit=TRIP_LEG_OPTIONS, tier=tier)
+    finally:
+        session.close()
+    fare_tier = price_tier(tier)
+    return [f for f in flights if f["seats_by_class"][fare_tier] > 0]
+
+
+def _combine(options: list[list[dict]], sort_by: str, limit: int, min_connection: timedelta) -> list[dict]:
+    def cost(flight: dict) -> float:
+        if sort_by == "duration":
+            return Flight.compute_duration_minutes(flight["departure_time"], flight["arrival_time"])
+        return flight["current_price"]
+
+    width = max(limit, 1)
+    # (total cost, flight ids, flights) per partial itinerary; ids break ties.
+    # Partials are grouped by the flight they end with.
+    partial: dict[int | None, list[tuple]] = {None: [(0.0, (), ())]}
+    for leg_options in options:
+        extended = {}
+        for flight in leg_options:
+            earlier = (
+                (total + cost(flight), ids + (flight["id"],), chosen + (flight,))
+                for group in partial.values()
+                for total, ids, chosen in group
+                if not chosen or flight["departure_time"] >= chosen[-1]["arrival_time"] + min_connection
+            )
+            best = heapq.nsmallest(width, earlier, key=lambda p: (p[0], p[1]))
+            if best:
+                extended[flight["id"]] = best
+        if not extended:
+            return []
+        partial = extended
+
+    ranked = heapq.nsmallest(limit, (p for group in partial.values() for p in group), key=lambda p: (p[0], p[1]))
+    return [_itinerary(chosen) for _, _, chosen in ranked]
+
+
+def _itinerary(flights: tuple[dict, ...]) -> dict:
+    return {
+        "legs": list(flights),
+        "total_price": round(sum(f["current_price"] for f in flights), 2),
+        "total_duration_minutes": sum(
+            Flight.compute_duration_minutes(f["departure_time"], f["arrival_time"]) for f in flights
+        ),
+        "seats_left": min(f["seats_left"] for f in flights),
+    }
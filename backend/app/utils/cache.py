@@ -0,0 +1,672 @@
+"""
+Cache backends with TTL expiry, size limits and tag-based invalidation.
+
+Two interchangeable backends are provided:
+- `LRUCache`: in-process, fastest, but private to each worker process.
+- `SQLiteCache`: a local SQLite file shared by every worker on the host, so
+  all uvicorn workers read from and fill one cache without an external service.
+  Values are stored as JSON in a file only the app's user can open, so
+  nothing read back from it can run code in the API process.
+
+Use `create_cache()` to pick one from configuration, and wrap it in a
+`CacheLoader` to collapse concurrent misses and serve stale entries while a
+background refresh runs.
+"""
+import getpass
+import json
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from typing import Any, Callable, Iterable
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Roughly estimate the memory footprint of a cached value in bytes.
+
+    Walks dicts, lists, tuples and sets recursively and sums `sys.getsizeof`
+    of every node. Shared objects are only counted once.
+    """
+    seen: set[int] = set()
+    stack = [value]
+    total = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+    return total
+
+
+class CacheBackend(ABC):
+    """
+    Interface shared by all cache backends.
+
+    Entries expire `ttl_seconds` after they are written and may carry tags
+    (e.g. ``flight:42``) so writers can drop every entry that depends on a
+    piece of data without knowing the exact cache keys. Expired entries are
+    kept for a further `stale_seconds` so `get_stale()` can still return them.
+    """
+
+    def get(self, key: str) -> Any | None:
+        """Return the fresh value for `key`, or None."""
+        hit = self._lookup(key, allow_stale=False)
+        return hit[0] if hit else None
+
+    def get_stale(self, key: str) -> tuple[Any, bool] | None:
+        """Return (value, is_fresh) for `key`, including entries in the stale window."""
+        return self._lookup(key, allow_stale=True)
+
+    @abstractmethod
+    def _lookup(self, key: str, allow_stale: bool) -> tuple[Any, bool] | None:
+        """Return (value, is_fresh) for `key`, or None; stale entries only if `allow_stale`."""
+
+    @abstractmethod
+    def set(self, key: str, value: Any, tags: Iterable[str] = (), ttl: float | None = None) -> None:
+        """Store `value` under `key`; `ttl` overrides the backend's `ttl_seconds`."""
+
+    @abstractmethod
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """Drop every entry carrying any of `tags`. Returns the number removed."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Drop `key` if present."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Drop every entry."""
+
+    @abstractmethod
+    def stats(self) -> dict:
+        """Return counters and current occupancy for monitoring."""
+
+
+class LRUCache(CacheBackend):
+    """
+    Thread-safe in-process LRU cache bounded by entry count and estimated memory.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 32 * 1024 * 1024, ttl_seconds: float = 60,
+                 stale_seconds: float = 0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+
+        self._lock = threading.Lock()
+        # key -> (expires_at, stale_until, size, tags, value); ordered oldest -> newest use
+        self._entries: OrderedDict[str, tuple[float, float, int, frozenset, Any]] = OrderedDict()
+        self._tag_index: dict[str, set[str]] = {}
+        self._bytes = 0
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _lookup(self, key: str, allow_stale: bool) -> tuple[Any, bool] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            now = time.monotonic()
+            if entry[1] <= now:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            fresh = entry[0] > now
+            if not fresh and not allow_stale:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            if fresh:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+            return entry[4], fresh
+
+    def set(self, key: str, value: Any, tags: Iterable[str] = (), ttl: float | None = None) -> None:
+        """Store `value` under `key`, evicting least recently used entries if needed."""
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return  # would evict everything else; not worth caching
+
+        expires_at = time.monotonic() + (self.ttl_seconds if ttl is None else ttl)
+        stale_until = expires_at + self.stale_seconds
+        tag_set = frozenset(tags)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (expires_at, stale_until, size, tag_set, value)
+            self._bytes += size
+            for tag in tag_set:
+                self._tag_index.setdefault(tag, set()).add(key)
+
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """Drop every entry carrying any of `tags`. Returns the number removed."""
+        removed = 0
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tag_index.get(tag, ())):
+                    self._remove(key)
+                    removed += 1
+            self.invalidations += removed
+        return removed
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tag_index.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        """Return counters and current occupancy for monitoring."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": "memory",
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "stale_seconds": self.stale_seconds,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def _remove(self, key: str) -> None:
+        # caller must hold self._lock
+        _, _, size, tags, _ = self._entries.pop(key)
+        self._bytes -= size
+        for tag in tags:
+            keys = self._tag_index.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_index[tag]
+
+
+def _json_default(obj: Any) -> dict:
+    # datetimes and dates are tagged so they come back as themselves, not strings
+    if isinstance(obj, datetime):
+        return {"__datetime__": obj.isoformat()}
+    if isinstance(obj, date):
+        return {"__date__": obj.isoformat()}
+    raise TypeError(f"{type(obj).__name__} is not JSON serializable")
+
+
+def _json_object(obj: dict) -> Any:
+    if len(obj) == 1:
+        if "__datetime__" in obj:
+            return datetime.fromisoformat(obj["__datetime__"])
+        if "__date__" in obj:
+            return date.fromisoformat(obj["__date__"])
+    return obj
+
+
+def _dump_value(value: Any) -> bytes:
+    return orjson.dumps(value, default=_json_default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+
+
+def _load_value(blob: bytes) -> Any:
+    return json.loads(blob, object_hook=_json_object)
+
+
+def _open_private(path: str) -> None:
+    """Create `path` readable and writable by this user only, refusing files owned by others."""
+    fd = os.open(path, os.O_RDWR | os.O_CREAT | getattr(os, "O_NOFOLLOW", 0), 0o600)
+    try:
+        if hasattr(os, "getuid") and os.fstat(fd).st_uid != os.getuid():
+            raise PermissionError(f"cache file {path} is owned by another user")
+        os.fchmod(fd, 0o600)
+    finally:
+        os.close(fd)
+
+
+def _default_sqlite_path() -> str:
+    # a directory only this user can enter, not a fixed name in the shared temp dir
+    directory = os.path.join(tempfile.gettempdir(), f"flightbooker-{getpass.getuser()}")
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    info = os.lstat(directory)
+    if hasattr(os, "getuid") and (info.st_uid != os.getuid() or info.st_mode & 0o077):
+        raise PermissionError(f"cache directory {directory} is not private to this user")
+    return os.path.join(directory, "cache.sqlite3")
+
+
+class SQLiteCache(CacheBackend):
+    """
+    Cache stored in a local SQLite file so several worker processes share it.
+
+    Values are stored as JSON (datetimes and dates round-trip, tuples come
+    back as lists) in a file created with 0600 permissions; values JSON can't
+    hold are not cached. LRU order is tracked with a `last_access` timestamp.
+    Several caches can share one file by using different `namespace` values.
+    Hit/miss counters are per process, occupancy is read from the shared file.
+    """
+
+    # Only rewrite last_access when it is older than this, so hot keys do not
+    # turn every read into a write
+    _TOUCH_INTERVAL = 1.0
+
+    def __init__(self, path: str, namespace: str = "default", max_entries: int = 1024,
+                 max_bytes: int = 32 * 1024 * 1024, ttl_seconds: float = 60, stale_seconds: float = 0):
+        self.path = path
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+
+        self._local = threading.local()
+        self._counter_lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+        _open_private(path)
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries ("
+                " namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL,"
+                " size INTEGER NOT NULL, expires_at REAL NOT NULL, stale_until REAL NOT NULL,"
+                " last_access REAL NOT NULL,"
+                " PRIMARY KEY (namespace, key))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_tags ("
+                " namespace TEXT NOT NULL, tag TEXT NOT NULL, key TEXT NOT NULL,"
+                " PRIMARY KEY (namespace, tag, key))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_tags_key ON cache_tags (namespace, key)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_entries_lru ON cache_entries (namespace, last_access)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self) -> "_Transaction":
+        return _Transaction(self._conn())
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._counter_lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def _lookup(self, key: str, allow_stale: bool) -> tuple[Any, bool] | None:
+        now = time.time()
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT value, expires_at, stale_until, last_access FROM cache_entries WHERE namespace = ? AND key = ?",
+            (self.namespace, key),
+        ).fetchone()
+        if row is None:
+            self._count("misses")
+            return None
+        value, expires_at, stale_until, last_access = row
+        if stale_until <= now:
+            with self._transaction() as conn:
+                self._delete_keys(conn, [key])
+            self._count("expirations")
+            self._count("misses")
+            return None
+        fresh = expires_at > now
+        if not fresh and not allow_stale:
+            self._count("misses")
+            return None
+        if now - last_access > self._TOUCH_INTERVAL:
+            conn.execute(
+                "UPDATE cache_entries SET last_access = ? WHERE namespace = ? AND key = ?",
+                (now, self.namespace, key),
+            )
+        try:
+            value = _load_value(value)
+        except ValueError:
+            # written in another format (older versions pickled); drop it
+            with self._transaction() as conn:
+                self._delete_keys(conn, [key])
+            self._count("misses")
+            return None
+        self._count("hits" if fresh else "stale_hits")
+        return value, fresh
+
+    def set(self, key: str, value: Any, tags: Iterable[str] = (), ttl: float | None = None) -> None:
+        try:
+            blob = _dump_value(value)
+        except TypeError:
+            return  # not JSON-shaped; computed again on each miss
+        if len(blob) > self.max_bytes:
+            return
+        now = time.time()
+        expires_at = now + (self.ttl_seconds if ttl is None else ttl)
+        with self._transaction() as conn:
+            self._delete_keys(conn, [key])
+            conn.execute(
+                "INSERT INTO cache_entries (namespace, key, value, size, expires_at, stale_until, last_access)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self.namespace, key, blob, len(blob), expires_at, expires_at + self.stale_seconds, now),
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO cache_tags (namespace, tag, key) VALUES (?, ?, ?)",
+                [(self.namespace, tag, key) for tag in set(tags)],
+            )
+            self._enforce_limits(conn)
+
+    def _enforce_limits(self, conn: sqlite3.Connection) -> None:
+        count, total = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries WHERE namespace = ?",
+            (self.namespace,),
+        ).fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        victims = []
+        rows = conn.execute(
+            "SELECT key, size FROM cache_entries WHERE namespace = ? ORDER BY last_access ASC",
+            (self.namespace,),
+        )
+        for victim_key, size in rows:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            victims.append(victim_key)
+            count -= 1
+            total -= size
+        self._delete_keys(conn, victims)
+        self._count("evictions", len(victims))
+
+    def _delete_keys(self, conn: sqlite3.Connection, keys: list[str]) -> None:
+        if not keys:
+            return
+        params = [(self.namespace, k) for k in keys]
+        conn.executemany("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", params)
+        conn.executemany("DELETE FROM cache_tags WHERE namespace = ? AND key = ?", params)
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        tags = list(set(tags))
+        if not tags:
+            return 0
+        with self._transaction() as conn:
+            keys: set[str] = set()
+            # chunk to stay under SQLite's bound-parameter limit
+            for i in range(0, len(tags), 500):
+                chunk = tags[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT DISTINCT key FROM cache_tags WHERE namespace = ? AND tag IN ({placeholders})",
+                    (self.namespace, *chunk),
+                )
+                keys.update(r[0] for r in rows)
+            self._delete_keys(conn, list(keys))
+        self._count("invalidations", len(keys))
+        return len(keys)
+
+    def delete(self, key: str) -> None:
+        with self._transaction() as conn:
+            self._delete_keys(conn, [key])
+
+    def clear(self) -> None:
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+            conn.execute("DELETE FROM cache_tags WHERE namespace = ?", (self.namespace,))
+
+    def stats(self) -> dict:
+        count, total = self._conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries WHERE namespace = ?",
+            (self.namespace,),
+        ).fetchone()
+        with self._counter_lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": "sqlite",
+                "path": self.path,
+                "entries": count,
+                "bytes": total,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "stale_seconds": self.stale_seconds,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+class _Transaction:
+    """Context manager running a block in one IMMEDIATE transaction on `conn`."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """Collapse concurrent calls for the same key into a single execution."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[str, _Call] = {}
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Run `fn` unless a call for `key` is already running; then wait for its result."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+class CacheLoader:
+    """
+    Read-through front for a cache backend.
+
+    - Concurrent misses for one key run `compute` once; other callers wait
+      for that result instead of hitting the database themselves.
+    - Entries past their TTL but inside the backend's `stale_seconds` window
+      are returned immediately while a single background refresh recomputes
+      them, so callers never wait on a TTL boundary.
+    """
+
+    def __init__(self, cache: CacheBackend, refresh_workers: int = 2):
+        self.cache = cache
+        self._flight = SingleFlight()
+        self._executor = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="cache-refresh")
+        self._lock = threading.Lock()
+        self._refreshing: set[str] = set()
+        self.refreshes = 0
+        self.refresh_errors = 0
+
+    def get_or_compute(self, key: str, compute: Callable[[], tuple[Any, Iterable[str] | None]],
+                       refresh: Callable[[], tuple[Any, Iterable[str] | None]] | None = None) -> Any:
+        """
+        Return the cached value for `key`, computing it on a miss.
+
+        compute: returns (value, tags); tags of None means "do not cache value".
+        refresh: like `compute` but safe to run on a background thread (e.g. it
+            opens its own DB session). Without it stale entries are not served.
+        """
+        if refresh is not None:
+            hit = self.cache.get_stale(key)
+            if hit is not None:
+                value, fresh = hit
+                if not fresh:
+                    self._schedule_refresh(key, refresh)
+                return value
+        else:
+            value = self.cache.get(key)
+            if value is not None:
+                return value
+
+        return self._flight.do(key, lambda: self._load(key, compute))
+
+    def get_many_or_compute(self, keys: list[str],
+                            compute: Callable[[list[str]], dict[str, tuple[Any, Iterable[str] | None]]]) -> dict:
+        """
+        Return {key: value} for `keys`, computing every miss in one call.
+
+        compute: given the missing keys, returns {key: (value, tags)} for each
+            of them; tags of None means "do not cache value".
+        Fresh hits come from the cache; stale ones count as misses, since the
+        misses are loaded together anyway.
+        """
+        values = {}
+        missing = []
+        for key in dict.fromkeys(keys):
+            value = self.cache.get(key)
+            if value is None:
+                missing.append(key)
+            else:
+                values[key] = value
+        if missing:
+            for key, (value, tags) in compute(missing).items():
+                if tags is not None:
+                    self.cache.set(key, value, tags=tags)
+                values[key] = value
+        return values
+
+    def _load(self, key: str, compute: Callable[[], tuple[Any, Iterable[str] | None]]) -> Any:
+        value, tags = compute()
+        if tags is not None:
+            self.cache.set(key, value, tags=tags)
+        return value
+
+    def _schedule_refresh(self, key: str, refresh: Callable[[], tuple[Any, Iterable[str] | None]]) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        self._executor.submit(self._run_refresh, key, refresh)
+
+    def _run_refresh(self, key: str, refresh: Callable[[], tuple[Any, Iterable[str] | None]]) -> None:
+        try:
+            self._flight.do(key, lambda: self._load(key, refresh))
+            with self._lock:
+                self.refreshes += 1
+        except Exception:
+            with self._lock:
+                self.refresh_errors += 1
+            logger.exception("[Cache] Background refresh failed for %s", key)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def stats(self) -> dict:
+        stats = self.cache.stats()
+        with self._lock:
+            stats.update({
+                "coalesced": self._flight.coalesced,
+                "refreshes": self.refreshes,
+                "refresh_errors": self.refresh_errors,
+                "refreshing": len(self._refreshing),
+            })
+        return stats
+
+
+def create_cache(backend: str = "auto", namespace: str = "default", **kwargs) -> CacheBackend:
+    """
+    Build a cache backend by name.
+
+    backend: 'memory', 'sqlite', or 'auto' (sqlite when uvicorn runs several
+    workers, i.e. WEB_CONCURRENCY > 1, otherwise memory).
+    The SQLite file defaults to CACHE_SQLITE_PATH or a file in a per-user
+    0700 directory under the temp dir.
+    """
+    backend = (backend or "auto").lower()
+    if backend == "auto":
+        workers = int(os.getenv("WEB_CONCURRENCY", "1") or 1)
+        backend = "sqlite" if workers > 1 else "memory"
+
+    if backend == "sqlite":
+        path = os.getenv("CACHE_SQLITE_PATH") or _default_sqlite_path()
+        return SQLiteCache(path, namespace=namespace, **kwargs)
+    if backend == "memory":
+        return LRUCache(**kwargs)
+    raise ValueError(f"unknown cache backend '{backend}'")
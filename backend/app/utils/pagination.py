@@ -0,0 +1,36 @@
+"""
+Opaque cursor tokens for keyset pagination.
+"""
+import base64
+import json
+
+
+def encode_cursor(payload: dict) -> str:
+    """
+    Encode a cursor payload as an opaque, URL-safe token.
+
+    Args:
+        payload: JSON-serialisable position of the last row on a page
+
+    Returns:
+        Token string without base64 padding
+    """
+    raw = json.dumps(payload, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> dict:
+    """
+    Decode a token produced by `encode_cursor`.
+
+    Raises:
+        ValueError: if the token is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError("invalid cursor")
+    if not isinstance(payload, dict):
+        raise ValueError("invalid cursor")
+    return payload
@@ -0,0 +1,54 @@
+"""
+Additive schema upgrades for existing databases.
+
+`Base.metadata.create_all()` creates missing tables but never alters existing
+ones, so a column or index added to a model would be missing from a database
+created by an older release. `add_missing_columns()` adds such nullable
+columns and any missing indexes; anything else (type changes, renames, NOT
+NULL columns) still needs a manual migration.
+"""
+import logging
+
+from sqlalchemy import MetaData, inspect, text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+def add_missing_columns(engine: Engine, metadata: MetaData) -> list[str]:
+    """
+    Add nullable model columns and indexes missing from existing tables.
+
+    Run after `create_all()`. Returns "table.column" / index names created.
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    preparer = engine.dialect.identifier_preparer
+    added: list[str] = []
+
+    with engine.begin() as conn:
+        for table in metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            columns = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in columns:
+                    continue
+                if not column.nullable:
+                    logger.warning("Column %s.%s is missing and NOT NULL; add it manually", table.name, column.name)
+                    continue
+                conn.execute(text(
+                    f"ALTER TABLE {preparer.format_table(table)} "
+                    f"ADD COLUMN {preparer.format_column(column)} {column.type.compile(engine.dialect)}"
+                ))
+                added.append(f"{table.name}.{column.name}")
+
+            indexes = {ix["name"] for ix in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in indexes:
+                    index.create(conn)
+                    added.append(index.name)
+
+    for name in added:
+        logger.info("Schema upgrade: added %s", name)
+    return added
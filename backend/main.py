@@ -14,6 +14,7 @@ from app.routes.ticket_routes import router as ticket_router
 from app.routes.airline_staff_routes import router as airline_staff_router
 from app.routes.airport_authority_routes import router as airport_authority_router
 from app.config import SessionLocal
+from app.utils.schema import add_missing_columns
 import asyncio
 import logging
 import sys
@@ -42,11 +43,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 _sim_task = None
+_hold_task = None
+_idempotency_task = None
 _startup_complete = False
 
+# Seconds between sweeps for lapsed seat holds
+HOLD_REAPER_INTERVAL_SECONDS = int(os.getenv("HOLD_REAPER_INTERVAL_SECONDS", "60"))
+
 
 def _sync_run_seed_if_empty():
     """Run seed script if database is empty. Runs in thread pool."""
@@ -76,6 +83,18 @@ def _sync_run_seed_if_empty():
             db.close()
 
 
+def _sync_load_reference_data():
+    """Warm the airport/airline/aircraft lookup cache. Runs in thread pool."""
+    from app.services.reference_data import reference_data
+    db = SessionLocal()
+    try:
+        reference_data.load(db)
+    except Exception as e:
+        logging.warning(f"Could not load reference data: {e}")
+    finally:
+        db.close()
+
+
 @app.on_event("startup")
 async def create_tables_on_startup():
     """Non-blocking startup - runs heavy operations in thread pool."""
@@ -83,10 +102,12 @@ async def create_tables_on_startup():
     
     # Create tables synchronously (fast operation)
     Base.metadata.create_all(bind=engine)
+    add_missing_columns(engine, Base.metadata)
     
     # Run seeding in background thread to not block startup
     loop = asyncio.get_event_loop()
     just_seeded = await loop.run_in_executor(_executor, _sync_run_seed_if_empty)
+    await loop.run_in_executor(_executor, _sync_load_reference_data)
     
     # Skip seat reconciliation if we just seeded or run it in background
     if not just_seeded:
@@ -109,12 +130,23 @@ async def _async_ensure_seats():
 
 def _sync_ensure_seats():
     """Synchronous seat reconciliation - runs in thread pool."""
-    from app.services.flight_service import ensure_all_flight_seats
+    from app.services.flight_service import ensure_all_flight_seats, ensure_flight_durations
+    from app.services.inventory_service import ensure_seat_inventory
+    from app.services.fare_service import ensure_current_prices
     db = SessionLocal()
     try:
         created = ensure_all_flight_seats(db)
         if created:
             print(f"✅ Created seats for {created} flights")
+        rebuilt = ensure_seat_inventory(db)
+        if rebuilt:
+            print(f"✅ Built seat counters for {rebuilt} flights")
+        timed = ensure_flight_durations(db)
+        if timed:
+            print(f"✅ Stored durations for {timed} flights")
+        priced = ensure_current_prices(db)
+        if priced:
+            print(f"✅ Stored current fares for {priced} flights")
     finally:
         db.close()
 
@@ -148,6 +180,56 @@ def _sync_run_demand_sim():
         db.close()
 
 
+async def _hold_reaper_loop(interval_seconds: int = 60):
+    """Background seat-hold reaper - cancels unpaid bookings whose hold lapsed."""
+    logger = logging.getLogger("gagan.hold_reaper")
+
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            loop = asyncio.get_event_loop()
+            cancelled = await loop.run_in_executor(_executor, _sync_release_expired_holds)
+            if cancelled:
+                logger.info("[HoldReaper] Released seats of %s expired bookings", cancelled)
+        except Exception as e:
+            logger.exception("[HoldReaper] Error releasing expired holds: %s", e)
+
+
+def _sync_release_expired_holds():
+    """Synchronous hold expiry - runs in thread pool."""
+    from app.services.flight_service import release_expired_holds
+    db = SessionLocal()
+    try:
+        return release_expired_holds(db)
+    finally:
+        db.close()
+
+
+async def _idempotency_purge_loop(interval_minutes: int = 10):
+    """Background purge of stored Idempotency-Key responses past their TTL."""
+    logger = logging.getLogger("gagan.idempotency")
+
+    while True:
+        await asyncio.sleep(interval_minutes * 60)
+        try:
+            loop = asyncio.get_event_loop()
+            removed = await loop.run_in_executor(_executor, _sync_purge_idempotency_keys)
+            if removed:
+                logger.info("[Idempotency] Purged %s expired keys", removed)
+        except Exception as e:
+            logger.exception("[Idempotency] Error purging expired keys: %s", e)
+
+
+def _sync_purge_idempotency_keys():
+    """Synchronous idempotency key purge - runs in thread pool."""
+    from app.services.idempotency import purge_expired_keys
+    db = SessionLocal()
+    try:
+        return purge_expired_keys(db)
+    finally:
+        db.close()
+
+
 @app.get("/")
 def root():
     return {"message": "welcome to FlightBooker - Flight Booking"}
@@ -162,21 +244,26 @@ def health_check():
 @app.on_event("startup")
 async def start_background_tasks():
     """Launch background tasks - non-blocking."""
-    global _sim_task
+    global _sim_task, _hold_task, _idempotency_task
     if _sim_task is None:
         _sim_task = asyncio.create_task(_simulator_loop(interval_minutes=10))
         print("🔁 Started demand simulator background task (every 10 minutes)")
+    if _hold_task is None:
+        _hold_task = asyncio.create_task(_hold_reaper_loop(interval_seconds=HOLD_REAPER_INTERVAL_SECONDS))
+        print(f"🔁 Started seat hold reaper (every {HOLD_REAPER_INTERVAL_SECONDS} seconds)")
+    if _idempotency_task is None:
+        _idempotency_task = asyncio.create_task(_idempotency_purge_loop(interval_minutes=10))
 
 
 @app.on_event("shutdown")
 async def stop_background_tasks():
-    global _sim_task
-    if _sim_task:
-        _sim_task.cancel()
-        try:
-            await _sim_task
-        except asyncio.CancelledError:
-            pass
+    for task in (_sim_task, _hold_task, _idempotency_task):
+        if task:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
     _executor.shutdown(wait=False)
 
 # ============== API Routes ==============
@@ -0,0 +1,176 @@
+"""
+Benchmark concurrent seat allocation on one hot flight.
+
+Creates a throwaway SQLite database holding two identical flights, then has
+`--threads` workers book `--bookings` bookings of `--passengers` seats on
+one of them, each in its own transaction (booking row, seat allocation,
+seat counters, commit), and reports bookings per second:
+
+- locking: how `create_booking` allocated before: lock the flight row, load
+           every free seat of the class FOR UPDATE, take the first N
+- cas:     `claim_seats`, conditional `UPDATE ... WHERE id IN (...) AND
+           is_available` with retries, no flight lock
+
+It also counts seats handed to more than one booking, which must stay 0.
+SQLite ignores FOR UPDATE, so both paths rely on its single writer there;
+the locking path's cost is loading and locking the whole class per booking.
+
+Usage:
+    python scripts/bench_booking.py                  # 8 threads, 400 bookings of 2
+    python scripts/bench_booking.py --threads 16 --bookings 1000 --passengers 1
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+
+# Ensure the repository `backend` folder is on sys.path so `import app` works
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+# never run against a real database: the engine is created on first import of app.config
+_DB_DIR = tempfile.mkdtemp(prefix="bench_booking_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'bench.db')}"
+
+from sqlalchemy.exc import OperationalError
+
+from app.config import SessionLocal, Base, engine
+import app.models  # noqa: F401  (registers every table)
+from app.models.aircraft import Aircraft
+from app.models.airline import Airline
+from app.models.airport import Airport
+from app.models.booking import Booking
+from app.models.flight import Flight
+from app.models.seat import Seat
+from app.models.user import User
+from app.services.flight_service import create_flight
+from app.services.inventory_service import adjust_available, claim_seats, seat_deltas
+
+
+def populate(seats: int) -> tuple[int, list[int]]:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user = User(first_name="Bench", last_name="Agent", email="bench@example.com", password_hash="x")
+        airline = Airline(name="Bench Air", code="BA")
+        origin = Airport(code="BNA", name="Bench Origin", city="Origin", country="India")
+        destination = Airport(code="BNB", name="Bench Destination", city="Destination", country="India")
+        aircraft = Aircraft(model="Bench Hot", capacity=seats, economy_count=seats, business_count=0)
+        db.add_all([user, airline, origin, destination, aircraft])
+        db.commit()
+
+        departure = datetime.utcnow().replace(microsecond=0) + timedelta(days=10)
+        flight_ids = [
+            create_flight(db, airline.id, aircraft.id, f"BA{i}", origin.id, destination.id,
+                          departure, departure + timedelta(hours=2), 5000.0).id
+            for i in range(2)
+        ]
+        return user.id, flight_ids
+    finally:
+        db.close()
+
+
+def locking_allocate(db, flight_id: int, booking_id: int, count: int) -> list[Seat]:
+    """The previous allocation: flight row lock, then every free seat of the class locked and loaded."""
+    db.query(Flight).filter(Flight.id == flight_id).with_for_update().first()
+    free = (
+        db.query(Seat)
+        .filter(Seat.flight_id == flight_id, Seat.is_available == True, Seat.seat_class == "Economy")
+        .with_for_update()
+        .all()
+    )
+    if len(free) < count:
+        raise ValueError("Not enough Economy class seats available")
+    taken = free[:count]
+    for seat in taken:
+        seat.is_available = False
+        seat.booking_id = booking_id
+    return taken
+
+
+def cas_allocate(db, flight_id: int, booking_id: int, count: int) -> list[Seat]:
+    return claim_seats(db, flight_id, booking_id, count=count, seat_class="Economy")
+
+
+def run(allocate, user_id: int, flight_id: int, threads: int, bookings: int, passengers: int) -> dict:
+    remaining = iter(range(bookings))
+    lock = threading.Lock()
+    claims: list[int] = []
+    stats = Counter()
+
+    def worker():
+        db = SessionLocal()
+        try:
+            while True:
+                with lock:
+                    if next(remaining, None) is None:
+                        return
+                for _ in range(10):  # retry "database is locked"
+                    try:
+                        booking = Booking(user_id=user_id, booking_reference="BKG" + uuid.uuid4().hex[:12].upper(),
+                                          status="Payment Pending")
+                        db.add(booking)
+                        db.flush()
+                        seats = allocate(db, flight_id, booking.id, passengers)
+                        seat_ids = [seat.id for seat in seats]
+                        adjust_available(db, seat_deltas(seats, -1))
+                        db.commit()
+                    except OperationalError:
+                        db.rollback()
+                        stats["lock_retries"] += 1
+                        continue
+                    except ValueError:
+                        db.rollback()
+                        stats["sold_out"] += 1
+                        break
+                    with lock:
+                        claims.extend(seat_ids)
+                    stats["booked"] += 1
+                    break
+                else:
+                    stats["failed"] += 1
+        finally:
+            db.close()
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    stats["seconds"] = time.perf_counter() - started
+    stats["oversold"] = sum(n - 1 for n in Counter(claims).values() if n > 1)
+    return stats
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--bookings", type=int, default=400)
+    parser.add_argument("--passengers", type=int, default=2)
+    parser.add_argument("--seats", type=int, default=1200, help="seats on each flight")
+    args = parser.parse_args(argv)
+
+    print(f"Populating two flights of {args.seats} seats in {_DB_DIR} ...")
+    user_id, flight_ids = populate(args.seats)
+
+    rates = {}
+    for (name, allocate), flight_id in zip((("locking", locking_allocate), ("cas", cas_allocate)), flight_ids):
+        stats = run(allocate, user_id, flight_id, args.threads, args.bookings, args.passengers)
+        rates[name] = stats["booked"] / stats["seconds"]
+        print(f"  {name:<8} {stats['booked']:>5} booked  {rates[name]:>8,.0f} bookings/s  "
+              f"sold out {stats['sold_out']:>4}  lock retries {stats['lock_retries']:>4}  "
+              f"oversold seats {stats['oversold']}")
+
+    print(f"cas is {rates['cas'] / rates['locking']:.1f}x the locking throughput")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+"""
+Benchmark flight search result building: ORM entities vs the lean projection.
+
+Creates a throwaway SQLite database with one route holding `--flights`
+flights (with seat counters and stored fares), then times building every
+matching search result both ways:
+
+- orm:  `Flight` entities with four joinedloads plus a seat-counter query
+        (how `search_flights` loaded results before the lean projection)
+- lean: `_search_flights_uncached`, a Core select of only the needed columns
+        with the seat counts as correlated subqueries
+
+Usage:
+    python scripts/bench_search.py                    # 12000 flights, 5 runs
+    python scripts/bench_search.py --flights 50000 --repeat 3
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Ensure the repository `backend` folder is on sys.path so `import app` works
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+# never run against a real database: the engine is created on first import of app.config
+_DB_DIR = tempfile.mkdtemp(prefix="bench_search_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'bench.db')}"
+
+from sqlalchemy.orm import joinedload
+
+from app.config import SessionLocal, Base, engine
+import app.models  # noqa: F401  (registers every table)
+from app.models.aircraft import Aircraft
+from app.models.airline import Airline
+from app.models.airport import Airport
+from app.models.flight import Flight
+from app.models.seat_inventory import FlightSeatInventory
+from app.services.fare_service import current_prices, refresh_current_prices
+from app.services.flight_service import _search_flights_uncached
+from app.services.inventory_service import get_inventory_map, seats_by_tier
+
+
+def populate(flights: int) -> tuple[str, str]:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        airline = Airline(name="Bench Air", code="BA")
+        origin = Airport(code="BNA", name="Bench Origin", city="Origin", country="India")
+        destination = Airport(code="BNB", name="Bench Destination", city="Destination", country="India")
+        aircraft = Aircraft(model="Bench 320", capacity=180, economy_count=150, business_count=24, first_count=6)
+        db.add_all([airline, origin, destination, aircraft])
+        db.commit()
+
+        start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=10)
+        rows = []
+        for i in range(flights):
+            departure = start + timedelta(minutes=7 * i)
+            rows.append({
+                "airline_id": airline.id, "aircraft_id": aircraft.id, "flight_number": f"BA{i % 10000:04d}",
+                "departure_airport_id": origin.id, "arrival_airport_id": destination.id,
+                "departure_time": departure, "arrival_time": departure + timedelta(minutes=120),
+                "duration_minutes": 120, "base_price": 3000 + (i * 37) % 6000, "demand_level": "medium",
+            })
+        db.execute(Flight.__table__.insert(), rows)
+        flight_ids = [r[0] for r in db.query(Flight.id)]
+        counters = []
+        for fid in flight_ids:
+            for seat_class, total in (("Economy", 150), ("Business", 24), ("First", 6)):
+                counters.append({"flight_id": fid, "seat_class": seat_class, "total_seats": total,
+                                 "available_seats": total - fid % (total // 2 or 1)})
+        db.execute(FlightSeatInventory.__table__.insert(), counters)
+        refresh_current_prices(db, flight_ids)
+        db.commit()
+        return origin.code, destination.code
+    finally:
+        db.close()
+
+
+def orm_search(db, origin: str, destination: str, tier: str = "ECONOMY") -> list[dict]:
+    """The previous result path: ORM entities, eager loads, separate seat query."""
+    origin_id = db.query(Airport.id).filter(Airport.code == origin).scalar()
+    destination_id = db.query(Airport.id).filter(Airport.code == destination).scalar()
+    flights = (
+        db.query(Flight)
+        .options(
+            joinedload(Flight.airline),
+            joinedload(Flight.aircraft),
+            joinedload(Flight.departure_airport),
+            joinedload(Flight.arrival_airport),
+        )
+        .filter(Flight.departure_airport_id == origin_id, Flight.arrival_airport_id == destination_id)
+        .order_by(Flight.departure_time.asc(), Flight.id.asc())
+        .all()
+    )
+    inventory = get_inventory_map(db, [f.id for f in flights])
+    fares = current_prices(flights, inventory, tier, datetime.utcnow())
+    return [
+        {
+            "id": f.id,
+            "airline": f.airline.name if f.airline else None,
+            "flight_number": f.flight_number,
+            "aircraft_model": f.aircraft.model if f.aircraft else None,
+            "source": f.departure_airport.code if f.departure_airport else None,
+            "destination": f.arrival_airport.code if f.arrival_airport else None,
+            "departure_time": f.departure_time,
+            "arrival_time": f.arrival_time,
+            "base_price": f.base_price,
+            "current_price": fare,
+            "price_map": None,
+            "seats_left": inventory[f.id]["available"],
+            "seats_by_class": seats_by_tier(inventory[f.id]),
+        }
+        for f, fare in zip(flights, fares)
+    ]
+
+
+def lean_search(db, origin: str, destination: str) -> list[dict]:
+    return _search_flights_uncached(db, origin=origin, destination=destination)
+
+
+def bench(fn, origin: str, destination: str, repeat: int) -> tuple[float, list[dict]]:
+    best, results = float("inf"), []
+    for _ in range(repeat):
+        db = SessionLocal()  # fresh session per run, like one request
+        try:
+            started = time.perf_counter()
+            results = fn(db, origin, destination)
+            best = min(best, time.perf_counter() - started)
+        finally:
+            db.close()
+    return best, results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--flights", type=int, default=12000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print(f"Populating {args.flights} flights in {_DB_DIR} ...")
+    origin, destination = populate(args.flights)
+
+    timings = {}
+    outputs = {}
+    for name, fn in (("orm", orm_search), ("lean", lean_search)):
+        seconds, outputs[name] = bench(fn, origin, destination, args.repeat)
+        timings[name] = seconds
+        print(f"  {name:<5} {len(outputs[name]):>7} rows  {seconds * 1000:8.1f} ms  "
+              f"{len(outputs[name]) / seconds:>10,.0f} rows/s")
+
+    if outputs["orm"] != outputs["lean"]:
+        print("Results differ between the two paths!")
+        return 1
+    print(f"Identical results; lean is {timings['orm'] / timings['lean']:.1f}x faster")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""
+Reconcile the per-flight seat counters with the seats table.
+
+Usage:
+    python scripts/rebuild_seat_inventory.py            # rebuild every flight
+    python scripts/rebuild_seat_inventory.py 12 15 42   # rebuild specific flights
+    python scripts/rebuild_seat_inventory.py --check    # only report drift
+"""
+import os
+import sys
+
+# Ensure the repository `backend` folder is on sys.path so `import app` works
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from app.config import SessionLocal, Base, engine
+from app.models.seat import Seat
+from app.models.seat_inventory import FlightSeatInventory
+from app.services.inventory_service import aggregate_seats, rebuild_seat_inventory
+
+
+def find_drift(db, flight_ids=None) -> list[tuple]:
+    """Return (flight_id, seat_class, counter_available, actual_available) rows that disagree."""
+    query = db.query(FlightSeatInventory)
+    if flight_ids:
+        query = query.filter(FlightSeatInventory.flight_id.in_(flight_ids))
+    counters = {(c.flight_id, c.seat_class): c for c in query.all()}
+    if flight_ids:
+        ids = set(flight_ids)
+    else:
+        ids = {fid for fid, _ in counters}
+        ids.update(r[0] for r in db.query(Seat.flight_id).filter(Seat.flight_id.is_not(None)).distinct())
+
+    drift = []
+    actual = {(r.flight_id, r.seat_class): r for r in aggregate_seats(db, ids)} if ids else {}
+    for key in set(counters) | set(actual):
+        counter, real = counters.get(key), actual.get(key)
+        counted = (counter.total_seats, counter.available_seats) if counter else (0, 0)
+        expected = (real.total_seats, real.available_seats or 0) if real else (0, 0)
+        if counted != expected:
+            drift.append((key[0], key[1], counted[1], expected[1]))
+    return sorted(drift)
+
+
+def main(argv: list[str]) -> int:
+    check_only = "--check" in argv
+    flight_ids = [int(a) for a in argv if a != "--check"] or None
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        drift = find_drift(db, flight_ids)
+        for flight_id, seat_class, counted, actual in drift:
+            print(f"  flight {flight_id} {seat_class}: counter={counted} actual={actual}")
+        print(f"{len(drift)} counter rows out of sync")
+
+        if check_only:
+            return 1 if drift else 0
+
+        written = rebuild_seat_inventory(db, flight_ids)
+        print(f"✅ Rebuilt {written} seat counter rows")
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -16,6 +16,9 @@ from app.models.aircraft import Aircraft
 from app.models.aircraft_seat_template import AircraftSeatTemplate
 from app.models.flight import Flight
 from app.models.seat import Seat
+from app.services.inventory_service import rebuild_seat_inventory
+from app.services.fare_service import refresh_current_prices
+from app.utils.schema import add_missing_columns
 
 # SQLAlchemy for bulk operations
 from sqlalchemy.orm import Session
@@ -34,20 +37,20 @@ AIRLINES_DATA = [
 ]
 
 AIRPORTS_DATA = [
-    # (IATA Code, Name, City, Country)
+    # (IATA Code, Name, City, Country, Latitude, Longitude)
     # Metro Cities
-    ("DEL", "Indira Gandhi International Airport", "New Delhi", "India"),
-    ("BOM", "Chhatrapati Shivaji Maharaj International Airport", "Mumbai", "India"),
-    ("BLR", "Kempegowda International Airport", "Bengaluru", "India"),
-    ("MAA", "Chennai International Airport", "Chennai", "India"),
-    ("CCU", "Netaji Subhas Chandra Bose International Airport", "Kolkata", "India"),
-    ("HYD", "Rajiv Gandhi International Airport", "Hyderabad", "India"),
+    ("DEL", "Indira Gandhi International Airport", "New Delhi", "India", 28.5562, 77.1000),
+    ("BOM", "Chhatrapati Shivaji Maharaj International Airport", "Mumbai", "India", 19.0896, 72.8656),
+    ("BLR", "Kempegowda International Airport", "Bengaluru", "India", 13.1986, 77.7066),
+    ("MAA", "Chennai International Airport", "Chennai", "India", 12.9941, 80.1709),
+    ("CCU", "Netaji Subhas Chandra Bose International Airport", "Kolkata", "India", 22.6547, 88.4467),
+    ("HYD", "Rajiv Gandhi International Airport", "Hyderabad", "India", 17.2403, 78.4294),
     # Major Cities
-    ("AMD", "Sardar Vallabhbhai Patel International Airport", "Ahmedabad", "India"),
-    ("PNQ", "Pune Airport", "Pune", "India"),
-    ("LKO", "Chaudhary Charan Singh International Airport", "Lucknow", "India"),
-    ("IXC", "Chandigarh International Airport", "Chandigarh", "India"),
-    ("PAT", "Jay Prakash Narayan International Airport", "Patna", "India")
+    ("AMD", "Sardar Vallabhbhai Patel International Airport", "Ahmedabad", "India", 23.0772, 72.6347),
+    ("PNQ", "Pune Airport", "Pune", "India", 18.5822, 73.9197),
+    ("LKO", "Chaudhary Charan Singh International Airport", "Lucknow", "India", 26.7606, 80.8893),
+    ("IXC", "Chandigarh International Airport", "Chandigarh", "India", 30.6735, 76.7885),
+    ("PAT", "Jay Prakash Narayan International Airport", "Patna", "India", 25.5913, 85.0880)
 ]
 
 AIRCRAFT_DATA = [
@@ -352,6 +355,7 @@ def seed():
     
     # Create tables
     Base.metadata.create_all(bind=engine)
+    add_missing_columns(engine, Base.metadata)
     db = SessionLocal()
     
     try:
@@ -375,11 +379,14 @@ def seed():
         # =============================================
         print("\n📌 Seeding Airports...")
         airport_objs = {}
-        for code, name, city, country in AIRPORTS_DATA:
+        for code, name, city, country, latitude, longitude in AIRPORTS_DATA:
             airport = create_if_not_exists(
                 db, Airport, {"code": code}, 
-                {"name": name, "city": city, "country": country}
+                {"name": name, "city": city, "country": country, "latitude": latitude, "longitude": longitude}
             )
+            if airport.latitude is None:
+                # airports seeded before coordinates existed
+                airport.latitude, airport.longitude = latitude, longitude
             airport_objs[code] = airport
         db.commit()
         print(f"  ✓ {len(airport_objs)} airports ready")
@@ -518,6 +525,7 @@ def seed():
                         "arrival_airport_id": airport_objs[dest].id,
                         "departure_time": dep_time,
                         "arrival_time": dep_time + timedelta(minutes=duration_min),
+                        "duration_minutes": duration_min,
                         "base_price": base_price,
                         "demand_level": "medium",
                     })
@@ -616,6 +624,14 @@ def seed():
             seats_inserted += len(batch)
             print(f"  ✓ Inserted seats: {seats_inserted}/{len(seat_rows)}")
 
+        # Build the per-flight seat counters from the inserted seats
+        print(f"🔢 Building seat inventory counters...")
+        rebuild_seat_inventory(db, id_map.values())
+
+        print(f"💰 Storing current fares...")
+        refresh_current_prices(db, id_map.values())
+        db.commit()
+
         total_flights = flights_generated
         total_seats = len(seat_rows)
         elapsed = time.time() - start_time
@@ -0,0 +1,128 @@
+import os
+import sys
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+
+def _ensure_backend_path():
+    base = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if base not in sys.path:
+        sys.path.insert(0, base)
+
+
+_ensure_backend_path()
+
+from app.config import SessionLocal, Base, engine
+from app.models.aircraft import Aircraft
+from app.models.airline import Airline
+from app.models.airport import Airport
+from app.models.user import User
+from app.services.flight_service import create_flight
+
+
+def new_tag(length: int = 6) -> str:
+    """Return a short upper-case tag that keeps codes unique across test runs."""
+    return uuid.uuid4().hex[:length].upper()
+
+
+def days_from_now(days: int) -> datetime:
+    """Midnight ``days`` days from now, so fixtures can schedule by hour of day."""
+    return (datetime.utcnow() + timedelta(days=days)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+_DEFAULT = object()
+
+
+class FlightFactory:
+    """Creates flights on fresh, uniquely coded airports, airlines and aircraft.
+
+    Every flight made without an explicit ``airline`` shares one airline, and
+    flights with the same cabin layout share one aircraft, so a fixture can
+    build a whole schedule with ``make_flight(origin, destination, departure)``.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.tag = new_tag()
+        self._airline = None
+        self._aircraft = {}
+        self._count = 0
+
+    def _next(self) -> int:
+        self._count += 1
+        return self._count
+
+    def airports(self, *letters: str) -> list[Airport]:
+        """One airport per letter, coded ``<letter><tag>``."""
+        airports = [Airport(code=f"{letter}{self.tag}", name=letter, city=f"{letter} City", country="India")
+                    for letter in letters]
+        self.db.add_all(airports)
+        self.db.commit()
+        return airports
+
+    def airline(self, name: str = "Test Air") -> Airline:
+        """A new airline with a code unique to this factory."""
+        n = self._next()
+        airline = Airline(name=f"{name} {self.tag}-{n}", code=f"{self.tag[:3]}{n:02d}")
+        self.db.add(airline)
+        self.db.commit()
+        return airline
+
+    def aircraft(self, capacity: int = 6, economy: int = 4, business: int = 2) -> Aircraft:
+        """The aircraft with this cabin layout, created on first use."""
+        key = (capacity, economy, business)
+        if key not in self._aircraft:
+            aircraft = Aircraft(model=f"Test-{self.tag}-{capacity}", capacity=capacity,
+                                economy_count=economy, business_count=business)
+            self.db.add(aircraft)
+            self.db.commit()
+            self._aircraft[key] = aircraft
+        return self._aircraft[key]
+
+    def __call__(self, origin: Airport = None, destination: Airport = None, departure: datetime = None, *,
+                 duration: timedelta = timedelta(hours=2), base_price: float = 4000.0, days_ahead: int = 10,
+                 airline: Airline = None, aircraft=_DEFAULT, capacity: int = 6, economy: int = 4,
+                 business: int = 2, flight_number: str = None):
+        """Create a flight; omitted airports, airline, aircraft and departure are filled in.
+
+        Pass ``aircraft=None`` for a flight with no seat map.
+        """
+        if origin is None or destination is None:
+            origin, destination = self.airports(f"O{self._next()}", f"D{self._next()}")
+        if departure is None:
+            departure = (datetime.utcnow() + timedelta(days=days_ahead)).replace(microsecond=0)
+        if airline is None:
+            if self._airline is None:
+                self._airline = self.airline()
+            airline = self._airline
+        if aircraft is _DEFAULT:
+            aircraft = self.aircraft(capacity, economy, business)
+        return create_flight(
+            self.db, airline.id, aircraft.id if aircraft is not None else None,
+            flight_number or f"T{self._next()}{self.tag[:4]}", origin.id, destination.id,
+            departure, departure + duration, base_price,
+        )
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def make_flight(db):
+    return FlightFactory(db)
+
+
+@pytest.fixture
+def user(db):
+    user = User(first_name="Test", last_name="User", email=f"user-{uuid.uuid4().hex[:8]}@example.com",
+                password_hash="x")
+    db.add(user)
+    db.commit()
+    return user
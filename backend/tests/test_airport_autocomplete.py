@@ -0,0 +1,101 @@
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.models.airport import Airport
+from app.services.airport_index import AirportIndex, airport_index
+from app.services.flight_service import search_flights
+
+
+def _airport(id, code, name, city, latitude=None, longitude=None):
+    return SimpleNamespace(id=id, code=code, name=name, city=city, country="India",
+                           latitude=latitude, longitude=longitude)
+
+
+@pytest.fixture
+def index():
+    index = AirportIndex()
+    index._built_at = 0  # skip the DB build; airports are added incrementally
+    for airport in [
+        _airport(1, "BOM", "Chhatrapati Shivaji Maharaj Intl", "Mumbai", 19.0896, 72.8656),
+        _airport(2, "BLR", "Kempegowda Intl", "Bengaluru", 13.1986, 77.7066),
+        _airport(3, "IXB", "Bagdogra Airport", "Siliguri"),
+        _airport(4, "DEL", "Indira Gandhi Intl", "New Delhi", 28.5562, 77.1000),
+    ]:
+        index.upsert_airport(airport)
+    return index
+
+
+def _codes(results):
+    return [a.code for a in results]
+
+
+def test_ranks_exact_code_then_code_city_and_name_prefixes(index):
+    assert _codes(index.search("bom")) == ["BOM"]
+    assert _codes(index.search("B")) == ["BLR", "BOM", "IXB"]  # codes first, then the name match
+    assert _codes(index.search("ben")) == ["BLR"]
+    assert _codes(index.search("delhi")) == ["DEL"]  # any word of the city
+    assert _codes(index.search("intl", limit=2)) == ["BLR", "BOM"]
+    assert index.search("  ") == []
+
+
+def test_updates_and_deletes_are_applied_in_place(index):
+    index.upsert_airport(_airport(2, "BLR", "Kempegowda Intl", "Bangalore"))
+    assert _codes(index.search("ben")) == []
+    assert _codes(index.search("bang")) == ["BLR"]
+
+    index.remove_airport(1)
+    assert _codes(index.search("b")) == ["BLR", "IXB"]
+
+
+def test_rebuild_reads_airports_table(db):
+    tag = uuid.uuid4().hex[:5].upper()
+    db.add(Airport(code=f"Z{tag}", name=f"Autocomplete {tag} Field", city=f"Prefixville{tag}", country="India"))
+    db.commit()
+    index = AirportIndex()
+    index.ensure_fresh(db)
+    assert _codes(index.search(f"prefixville{tag}")) == [f"Z{tag}"]
+    assert index.builds == 1
+
+
+def test_nearby_uses_haversine_distances(index):
+    index.upsert_airport(_airport(5, "PNQ", "Pune Airport", "Pune", 18.5822, 73.9197))
+    index.upsert_airport(_airport(6, "HDO", "Hindon Airport", "Ghaziabad", 28.7077, 77.3587))
+
+    near_mumbai = index.nearby(19.0760, 72.8777, 200)
+    assert [(a.code, round(d)) for a, d in near_mumbai] == [("BOM", 2), ("PNQ", 123)]
+    assert index.nearby(19.0760, 72.8777, 200, limit=1)[0][0].code == "BOM"
+    assert index.nearby(0, 0, 100) == []
+
+    assert index.within(4, 50) == [4, 6]
+    assert index.within(3, 5000) == [3]  # no coordinates: only itself
+    index.remove_airport(6)
+    assert index.within(4, 50) == [4]
+
+
+def test_search_radius_includes_nearby_airports(db, make_flight):
+    tag = uuid.uuid4().hex[:5].upper()
+    # a main and a secondary airport 15 km apart, one destination far away
+    main = Airport(code=f"Y{tag}", name="Main", city="Metro", country="India", latitude=28.56, longitude=77.10)
+    second = Airport(code=f"X{tag}", name="Second", city="Metro", country="India", latitude=28.70, longitude=77.13)
+    far = Airport(code=f"V{tag}", name="Far", city="Coast", country="India", latitude=19.09, longitude=72.87)
+    db.add_all([main, second, far])
+    db.commit()
+    airport_index.invalidate()
+
+    departure = (datetime.utcnow() + timedelta(days=9)).replace(microsecond=0)
+    flights = [make_flight(origin, far, departure + timedelta(hours=i)) for i, origin in enumerate([main, second])]
+
+    def ids(**kwargs):
+        return [f["id"] for f in search_flights(db, origin=main.code, destination=far.code, **kwargs)]
+
+    assert ids() == [flights[0].id]
+    assert ids(origin_radius_km=10) == [flights[0].id]
+    assert ids(origin_radius_km=25) == [f.id for f in flights]
+    assert ids(origin_radius_km=25, destination_radius_km=5) == [f.id for f in flights]
+
+    # a new flight from the nearby airport drops the cached radius results
+    added = make_flight(second, far, departure + timedelta(hours=2))
+    assert ids(origin_radius_km=25) == [*(f.id for f in flights), added.id]
@@ -0,0 +1,50 @@
+from datetime import timedelta
+
+import pytest
+
+from app.services.flight_service import (
+    _search_flights_uncached, get_search_cache_stats, search_flights, search_flights_batch,
+)
+from conftest import days_from_now
+
+
+@pytest.fixture
+def airports(make_flight):
+    """Three airports; A->B has flights on two days, A->C on one."""
+    a, b, c = make_flight.airports("R", "S", "T")
+    day = days_from_now(25)
+    schedule = [(b, 0, 7, 4000.0), (b, 0, 12, 3500.0), (b, 0, 18, 5000.0), (b, 1, 9, 3000.0), (c, 0, 10, 2500.0)]
+    for destination, days, hour, fare in schedule:
+        make_flight(a, destination, day + timedelta(days=days, hours=hour), base_price=fare)
+    return {"a": a.code, "b": b.code, "c": c.code, "date": day.strftime("%Y-%m-%d")}
+
+
+def test_batch_matches_single_route_searches(db, airports):
+    a, b, c, date = airports["a"], airports["b"], airports["c"], airports["date"]
+    queries = [
+        dict(origin=a, destination=b, date=date, limit=2),
+        dict(origin=a, destination=b, date=date, days_flex=1),
+        dict(origin=a, destination=c),
+        dict(origin=a, destination="NOPE1"),
+    ]
+    results = search_flights_batch(db, queries, sort_by="price")
+
+    expected = [_search_flights_uncached(db, sort_by="price", **q) for q in queries]
+    assert results == expected
+    assert [len(r) for r in results] == [2, 4, 1, 0]
+
+
+def test_batch_shares_the_single_route_cache(db, airports):
+    a, b, c, date = airports["a"], airports["b"], airports["c"], airports["date"]
+    single = search_flights(db, origin=a, destination=b, date=date, limit=30)
+
+    hits = get_search_cache_stats()["hits"]
+    first, second = search_flights_batch(db, [dict(origin=a, destination=b, date=date, limit=30),
+                                              dict(origin=a, destination=c, limit=30)])
+    assert first == single
+    assert get_search_cache_stats()["hits"] == hits + 1
+
+    # the batch's miss is now cached for the single-route path too
+    hits = get_search_cache_stats()["hits"]
+    assert search_flights(db, origin=a, destination=c, limit=30) == second
+    assert get_search_cache_stats()["hits"] == hits + 1
@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.flight_service import search_flights, stream_search_flights
+from app.services.ranking import departure_penalty, top_k
+from conftest import days_from_now
+
+
+@pytest.fixture
+def route(make_flight):
+    """Five flights on a fresh route: (departure hour, minutes, base fare)."""
+    origin, destination = make_flight.airports("P", "Q")
+    day = days_from_now(20)
+    flights = [make_flight(origin, destination, day + timedelta(hours=hour), duration=timedelta(minutes=minutes),
+                           base_price=fare)
+               for hour, minutes, fare in [(3, 120, 3000.0), (8, 120, 3000.0), (10, 300, 2800.0),
+                                           (15, 120, 6000.0), (19, 90, 3200.0)]]
+    return {"origin": origin.code, "destination": destination.code, "date": day.strftime("%Y-%m-%d"),
+            "flights": flights}
+
+
+def _ids(results):
+    return [f["id"] for f in results]
+
+
+def test_top_k_scores_fare_duration_and_departure():
+    day = datetime(2030, 1, 1)
+    candidates = [
+        (1, 3000.0, 120, day.replace(hour=3)),
+        (2, 3000.0, 120, day.replace(hour=8)),
+        (3, 2800.0, 300, day.replace(hour=10)),
+        (4, 6000.0, 60, day.replace(hour=15)),
+    ]
+    assert [s.flight_id for s in top_k(candidates, 4)] == [1, 2, 4, 3]  # 1 and 2 tie: lower id first
+    assert [s.flight_id for s in top_k(candidates, 2, prefer_time="morning")] == [2, 1]
+    assert top_k(candidates, 0) == [] and top_k([], 3) == []
+
+    assert departure_penalty(day.replace(hour=9), "morning") == 0
+    assert departure_penalty(day.replace(hour=0), "morning") == 0.5
+    assert departure_penalty(day.replace(hour=23), "early_morning") == pytest.approx(1 / 12)  # wraps midnight
+
+
+def test_best_pages_are_slices_of_the_full_ranking(db, route):
+    base = dict(origin=route["origin"], destination=route["destination"], date=route["date"], sort_by="best")
+    full = _ids(search_flights(db, **base, limit=10))
+    assert sorted(full) == sorted(f.id for f in route["flights"])
+
+    pages = [_ids(search_flights(db, **base, page=p, page_size=2)) for p in (1, 2, 3)]
+    assert sum(pages, []) == full
+    assert _ids(stream_search_flights(db, **base, batch_size=2)) == full
+
+
+def test_best_prefers_requested_time_of_day(db, route):
+    base = dict(origin=route["origin"], destination=route["destination"], date=route["date"], sort_by="best")
+    flights = route["flights"]
+    # the 03:00 and 08:00 flights are otherwise identical; the earlier id wins the tie
+    default = _ids(search_flights(db, **base))
+    assert default.index(flights[0].id) < default.index(flights[1].id)
+
+    morning = _ids(search_flights(db, **base, prefer_time="morning"))
+    assert morning.index(flights[1].id) < morning.index(flights[0].id)
+    assert morning[-1] == flights[3].id  # twice the fare
+
+
+def test_best_rejects_cursor_and_unknown_preference(db, route):
+    base = dict(origin=route["origin"], destination=route["destination"], sort_by="best")
+    with pytest.raises(ValueError):
+        search_flights(db, **base, cursor="abc")
+    with pytest.raises(ValueError):
+        search_flights(db, **base, prefer_time="noon")
@@ -0,0 +1,114 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app.config import SessionLocal, engine
+from app.models.booking import Booking
+from app.models.seat import Seat
+from app.services.flight_service import create_bookings_bulk
+from app.services.inventory_service import claim_seats, get_flight_inventory
+
+
+@pytest.fixture
+def flights(make_flight):
+    """Two flights with 10 economy and 2 business seats each."""
+    origin, destination = make_flight.airports("M", "N")
+    departure = (datetime.utcnow() + timedelta(days=18)).replace(microsecond=0)
+    return [make_flight(origin, destination, departure + timedelta(hours=i), capacity=12, economy=10, business=2)
+            for i in range(2)]
+
+
+def _request(flight, passengers, **extra):
+    return {"flight_id": flight.id, "departure_date": flight.departure_time.strftime("%Y-%m-%d"),
+            "passengers": [{"passenger_name": f"P{n}"} for n in range(passengers)], **extra}
+
+
+def _available(db, flight, seat_class="Economy"):
+    return get_flight_inventory(db, flight.id)["by_class"][seat_class]["available"]
+
+
+def test_bulk_books_each_flight_and_reports_per_booking(db, flights, user):
+    first, second = flights
+    results = create_bookings_bulk(db, user.id, [
+        _request(first, 4),
+        _request(second, 3),
+        _request(first, 7),  # only 6 economy seats left on the first flight
+        _request(first, 2, seat_class="BUSINESS"),
+        _request(second, 1, departure_date="2001-01-01"),
+        _request(first, 6),
+    ])
+
+    assert [r["error"] is None for r in results] == [True, True, False, True, False, True]
+    assert results[2]["error"] == "Not enough Economy class seats available. Requested: 7, Available: 6"
+    assert results[4]["error"].startswith("departure_date 2001-01-01 does not match")
+
+    booked = [r["booking"] for r in results if r["booking"]]
+    assert all(b.status == "Payment Pending" and b.expires_at for b in booked)
+    assert [len(b.tickets) for b in booked] == [4, 3, 2, 6]
+    assert results[0]["total_fare"] == pytest.approx(sum(t.payment_required for t in booked[0].tickets))
+    seat_ids = [t.seat_id for b in booked for t in b.tickets]
+    assert len(set(seat_ids)) == len(seat_ids)
+    owners = dict(db.query(Seat.id, Seat.booking_id).filter(Seat.id.in_(seat_ids)).all())
+    assert all(owners[t.seat_id] == b.id for b in booked for t in b.tickets)
+
+    assert _available(db, first) == 0 and _available(db, first, "Business") == 0
+    assert _available(db, second) == 7
+    assert db.query(Booking).filter(Booking.user_id == user.id).count() == 4  # failed rows removed
+
+
+def test_bulk_selected_seats_fail_alone(db, flights, user):
+    flight = flights[0]
+    free = [s.id for s in db.query(Seat).filter(Seat.flight_id == flight.id, Seat.seat_class == "Economy")
+            .order_by(Seat.id).all()]
+    results = create_bookings_bulk(db, user.id, [
+        _request(flight, 2, selected_seat_ids=free[:2]),
+        _request(flight, 1, selected_seat_ids=[free[1]]),  # already picked above
+        _request(flight, 3),
+    ])
+
+    assert results[1]["error"] == "Selected seats are not available or do not belong to this flight"
+    assert [t.seat_id for t in results[0]["booking"].tickets] == free[:2]
+    assert not {t.seat_id for t in results[2]["booking"].tickets} & set(free[:2])
+    assert _available(db, flight) == 5
+
+
+def test_bulk_falls_back_when_counters_are_stale(db, flights, user):
+    flight = flights[0]
+    # another writer took 7 seats without the counters catching up yet
+    other = SessionLocal()
+    taken = Booking(user_id=user.id, booking_reference="BKG" + uuid.uuid4().hex[:12].upper())
+    other.add(taken)
+    other.flush()
+    claim_seats(other, flight.id, taken.id, count=7, seat_class="Economy")
+    other.commit()
+    other.close()
+
+    results = create_bookings_bulk(db, user.id, [_request(flight, 2), _request(flight, 2), _request(flight, 1)])
+    assert [r["error"] for r in results] == [
+        None, "Not enough Economy class seats available. Requested: 2, Available: 1", None,
+    ]
+    assert db.query(Seat).filter(Seat.flight_id == flight.id, Seat.is_available == True,
+                                 Seat.seat_class == "Economy").count() == 0
+
+
+def test_bulk_statement_count_does_not_grow_with_bookings(db, flights, user):
+    def statements(flight, bookings):
+        count = [0]
+
+        def before(conn, cursor, statement, *args):
+            # stored fares are only rewritten when they move
+            if not statement.startswith("UPDATE flights"):
+                count[0] += 1
+
+        event.listen(engine, "before_cursor_execute", before)
+        try:
+            results = create_bookings_bulk(db, user.id, [_request(flight, 1) for _ in range(bookings)])
+        finally:
+            event.remove(engine, "before_cursor_execute", before)
+        assert all(r["booking"] for r in results)
+        return count[0]
+
+    statements(flights[0], 1)  # loads the cached airports and airlines
+    assert statements(flights[1], 8) == statements(flights[0], 2)
@@ -0,0 +1,104 @@
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.connection_index import ConnectionIndex, connection_index
+from app.services.flight_service import search_connections
+from conftest import days_from_now
+
+
+@pytest.fixture
+def network(make_flight):
+    """Airports A, B, C with A->B legs and B->C legs at various layovers."""
+    airports = make_flight.airports("A", "B", "C")
+    a, b, c = airports
+    day = days_from_now(15)
+
+    def fly(src, dst, dep_hour, minutes, price):
+        return make_flight(src, dst, day + timedelta(hours=dep_hour), duration=timedelta(minutes=minutes),
+                           base_price=price, economy=6, business=0)
+
+    connection_index.invalidate()
+    flights = {
+        "ab_early": fly(a, b, 8, 120, 3000.0),      # lands 10:00
+        "bc_tight": fly(b, c, 10.25, 60, 2000.0),  # 15 min layover
+        "bc_ok": fly(b, c, 11, 60, 2500.0),         # 60 min layover
+        "bc_cheap": fly(b, c, 13, 90, 1500.0),      # 180 min layover
+        "bc_late": fly(b, c, 20, 60, 1000.0),       # 600 min layover
+    }
+    return {"codes": (a.code, b.code, c.code), "day": day.strftime("%Y-%m-%d"), "flights": flights,
+            "fly": fly, "airports": airports}
+
+
+def _leg_ids(itineraries):
+    return [[leg["id"] for leg in it["legs"]] for it in itineraries]
+
+
+def test_connections_respect_layover_window_and_rank(db, network):
+    a, b, c = network["codes"]
+    f = network["flights"]
+
+    by_price = search_connections(db, a, c, network["day"], min_layover_minutes=45, max_layover_minutes=360)
+    assert _leg_ids(by_price) == [[f["ab_early"].id, f["bc_cheap"].id], [f["ab_early"].id, f["bc_ok"].id]]
+    assert by_price[0]["via"] == b
+    assert by_price[0]["layover_minutes"] == 180
+    assert by_price[1]["total_duration_minutes"] == 240
+
+    by_duration = search_connections(db, a, c, network["day"], sort_by="duration")
+    assert _leg_ids(by_duration)[0] == [f["ab_early"].id, f["bc_ok"].id]
+
+
+def test_index_picks_up_new_flights_incrementally(db, network):
+    a, b, c = network["codes"]
+    _, hub, dest = network["airports"]
+    search_connections(db, a, c, network["day"])
+    builds = connection_index.builds
+
+    # created after the index was built, cheapest in the window
+    new_leg = network["fly"](hub, dest, 12, 60, 500.0)
+    itineraries = search_connections(db, a, c, network["day"])
+    assert itineraries[0]["legs"][1]["id"] == new_leg.id
+    assert connection_index.builds == builds
+
+
+def test_index_window_lookup():
+    index = ConnectionIndex()
+    index._built_at = 0  # skip the DB build; flights are added incrementally
+    base = datetime(2030, 1, 1, 8, 0)
+
+    class F:
+        def __init__(self, id, dep, arr, hours, minutes):
+            self.id, self.departure_airport_id, self.arrival_airport_id = id, dep, arr
+            self.departure_time = base + timedelta(hours=hours)
+            self.arrival_time = self.departure_time + timedelta(minutes=minutes)
+
+    for flight in [F(1, 10, 20, 0, 60), F(2, 20, 30, 1.5, 60), F(3, 20, 30, 9, 60), F(4, 20, 10, 2, 60)]:
+        index.upsert_flight(flight)
+
+    pairs = index.connections(10, 30, base, base + timedelta(days=1), timedelta(minutes=30), timedelta(hours=4))
+    assert [(l1.id, l2.id) for l1, l2 in pairs] == [(1, 2)]
+
+    index.remove_flight(2)
+    assert index.connections(10, 30, base, base + timedelta(days=1), timedelta(minutes=30), timedelta(hours=4)) == []
+
+
+def test_index_ranks_every_pair_before_limiting():
+    index = ConnectionIndex()
+    index._built_at = 0
+    base = datetime(2030, 1, 1, 0, 0)
+    Flight_ = namedtuple("Flight_", "id departure_airport_id arrival_airport_id departure_time arrival_time")
+    # 80 x 80 = 6400 pairs through one hub, more than a fixed cap used to keep
+    for i in range(80):
+        dep = base + timedelta(minutes=i)
+        index.upsert_flight(Flight_(i + 1, 10, 20, dep, dep + timedelta(hours=1)))
+        dep = base + timedelta(hours=3, minutes=i)
+        index.upsert_flight(Flight_(i + 101, 20, 30, dep, dep + timedelta(hours=1)))
+    window = (10, 30, base, base + timedelta(days=1), timedelta(minutes=30), timedelta(hours=6))
+
+    assert len(index.connection_legs(*window)) == 160
+    # the best pair is the last one scanned
+    best = index.connections(*window, key=lambda l1, l2: -(l1.id + l2.id), limit=2)
+    assert [(l1.id, l2.id) for l1, l2 in best] == [(80, 180), (79, 180)]
+    odd_only = index.connections(*window, key=lambda l1, l2: None if l1.id % 2 == 0 else l1.id, limit=1)
+    assert odd_only[0][0].id == 1
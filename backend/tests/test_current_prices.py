@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import Column, Float, Index, Integer, MetaData, Table, create_engine, inspect
+
+from app.models.flight import Flight
+from app.services.fare_service import price_flights
+from app.services.flight_service import (
+    cancel_booking, create_booking, create_payment, invalidate_flight_cache, search_flights,
+)
+from app.routes.flight_routes import get_flight, update_flight
+from app.schemas.flight_schema import FlightUpdate
+from app.services.inventory_service import get_inventory_map
+from app.utils.schema import add_missing_columns
+
+
+@pytest.fixture
+def route(make_flight, user):
+    """Two flights on a fresh route: A has the lower base fare, B the higher."""
+    origin, destination = make_flight.airports("M", "N")
+    departure = (datetime.utcnow() + timedelta(days=45)).replace(microsecond=0)
+    a, b = (make_flight(origin, destination, departure, base_price=fare, capacity=5, economy=5, business=0)
+            for fare in (4000.0, 4400.0))
+    return {"origin": origin.code, "destination": destination.code, "a": a, "b": b, "user": user}
+
+
+def _search(db, route, **kwargs):
+    return search_flights(db, origin=route["origin"], destination=route["destination"], **kwargs)
+
+
+def test_fares_are_stored_on_create(db, route):
+    a = route["a"]
+    live = price_flights([a], get_inventory_map(db, [a.id]), "BUSINESS", datetime.utcnow())[0]
+    assert a.price_economy == 3600.0  # 4000 with 5 of 5 seats left
+    assert a.price_business == live
+
+
+def test_price_sort_and_filters_follow_bookings(db, route):
+    a, b = route["a"], route["b"]
+    assert [f["id"] for f in _search(db, route, sort_by="price")] == [a.id, b.id]
+
+    # selling 4 of A's 5 seats pushes it above B
+    result = create_booking(db, route["user"].id, a.id, a.departure_time.strftime("%Y-%m-%d"),
+                            [{"passenger_name": f"P{i}"} for i in range(4)])
+    by_price = _search(db, route, sort_by="price")
+    assert [f["id"] for f in by_price] == [b.id, a.id]
+    assert by_price[1]["current_price"] == 5000.0
+    assert [f["id"] for f in _search(db, route, max_price=4500)] == [b.id]
+    assert [f["id"] for f in _search(db, route, min_price=4500)] == [a.id]
+
+    booking = result["booking"]
+    create_payment(db, booking.booking_reference, result["total_fare"], "UPI")
+    cancel_booking(db, booking.pnr)
+    assert [f["id"] for f in _search(db, route, sort_by="price")] == [a.id, b.id]
+    assert db.query(Flight.price_economy).filter(Flight.id == a.id).scalar() == 3600.0
+
+
+def test_flight_endpoints_show_the_stored_fare(db, route):
+    a = route["a"]
+    # a stored fare the live formula wouldn't produce right now
+    db.query(Flight).filter(Flight.id == a.id).update({"price_economy": 3777.0})
+    db.commit()
+    invalidate_flight_cache([a.id])
+    listed = {f["id"]: f["current_price"] for f in _search(db, route)}
+    assert listed[a.id] == get_flight(a.id, db).current_price == 3777.0
+
+    updated = update_flight(a.id, FlightUpdate(base_price=5000.0), db)
+    db.refresh(a)
+    assert updated.current_price == a.price_economy == 4500.0  # 5000 with 5 of 5 seats left
+
+
+def test_add_missing_columns_upgrades_existing_table():
+    test_engine = create_engine("sqlite://")
+    old = MetaData()
+    Table("fares", old, Column("id", Integer, primary_key=True))
+    old.create_all(test_engine)
+
+    new = MetaData()
+    Table("fares", new, Column("id", Integer, primary_key=True), Column("amount", Float, nullable=True),
+          Index("ix_fares_amount", "amount"))
+    assert add_missing_columns(test_engine, new) == ["fares.amount", "ix_fares_amount"]
+    assert add_missing_columns(test_engine, new) == []
+    assert "amount" in {c["name"] for c in inspect(test_engine).get_columns("fares")}
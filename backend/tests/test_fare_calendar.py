@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.flight_service import create_booking, get_fare_calendar, search_flights
+
+
+@pytest.fixture
+def route(make_flight):
+    origin, destination = make_flight.airports("F", "G")
+    start = (datetime.utcnow() + timedelta(days=40)).date()
+    day = datetime.combine(start, datetime.min.time())
+
+    def fly(day_offset, hour, price):
+        return make_flight(origin, destination, day + timedelta(days=day_offset, hours=hour), base_price=price,
+                           capacity=2, economy=2, business=0)
+
+    flights = [fly(0, 9, 6000.0), fly(0, 18, 4000.0), fly(2, 7, 5000.0)]
+    return origin.code, destination.code, start, flights
+
+
+def test_calendar_reports_cheapest_flight_per_day(db, route):
+    origin, destination, start, flights = route
+    calendar = get_fare_calendar(db, origin, destination, start, days=5)
+
+    assert [d["date"] for d in calendar] == [start + timedelta(days=i) for i in range(5)]
+    assert [d["flights"] for d in calendar] == [2, 0, 1, 0, 0]
+    assert calendar[0]["flight_id"] == flights[1].id
+    assert calendar[1]["min_price"] is None
+
+    # matches the fare search shows for the same flight
+    listed = {f["id"]: f["current_price"] for f in search_flights(db, origin=origin, destination=destination,
+                                                                 date=start.strftime("%Y-%m-%d"))}
+    assert calendar[0]["min_price"] == listed[flights[1].id]
+
+
+def test_calendar_refreshes_after_booking(db, route, user):
+    origin, destination, start, flights = route
+    assert get_fare_calendar(db, origin, destination, start, days=3)[0]["seats_available"] == 4
+
+    cheapest = flights[1]
+    create_booking(db, user.id, cheapest.id, cheapest.departure_time.strftime("%Y-%m-%d"),
+                   [{"passenger_name": "A"}, {"passenger_name": "B"}])
+
+    # the sold-out flight no longer sets the day's fare
+    day = get_fare_calendar(db, origin, destination, start, days=3)[0]
+    assert day["seats_available"] == 2
+    assert day["flight_id"] == flights[0].id
@@ -0,0 +1,75 @@
+import json
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import orjson
+import pytest
+from fastapi.responses import ORJSONResponse
+
+from app.schemas.booking_schema import BookingResponse
+from app.schemas.flight_schema import FlightResponse
+from app.services.booking_results import (
+    booking_result, first_successful_payment, format_flight_seat, latest_successful_payment,
+)
+from app.services.flight_service import create_booking, create_payment, search_flights
+
+
+@pytest.fixture
+def flight(make_flight):
+    return make_flight(days_ahead=12, duration=timedelta(minutes=135), capacity=12, economy=8, business=4,
+                       base_price=4200.0)
+
+
+def _body(content) -> list | dict:
+    return orjson.loads(ORJSONResponse(content).body)
+
+
+def test_booking_result_matches_booking_response(db, flight, user):
+    created = create_booking(db, user.id, flight.id, flight.departure_time.strftime("%Y-%m-%d"),
+                             [{"passenger_name": "A", "age": 30}, {"passenger_name": "B"}], seat_class="BUSINESS")
+    booking = created["booking"]
+    create_payment(db, booking.booking_reference, created["total_fare"], "UPI")
+    db.refresh(booking)
+
+    result = booking_result(booking, latest_successful_payment(booking))
+    expected = BookingResponse.model_validate(result, from_attributes=True).model_dump_json()
+    assert ORJSONResponse(result).body == orjson.dumps(json.loads(expected))
+    assert result.transaction_id is not None
+    assert [t.flight_seat.split(" - ")[0] for t in result.tickets] == ["BUS", "BUS"]
+    assert not hasattr(result, "__dict__")
+
+
+def test_search_results_serialize_like_flight_response(db, flight):
+    results = search_flights(db, origin=flight.departure_airport.code, destination=flight.arrival_airport.code,
+                             tier="all")
+    assert results
+    expected = [FlightResponse.model_validate(r).model_dump(mode="json") for r in results]
+    body = _body(results)
+    assert body == expected
+    assert [list(r) for r in body] == [list(r) for r in expected]  # same key order
+
+
+def test_format_flight_seat_accepts_tier_and_class_names():
+    assert format_flight_seat("Premium Economy", "3C") == "ECF - 3C"
+    assert format_flight_seat("business", "1A") == "BUS - 1A"
+    assert format_flight_seat("Galley", "9") == "GA - 9"
+
+
+def test_user_routes_keep_their_seat_placeholder_and_payment_choice():
+    when = datetime(2030, 1, 1)
+    ticket = SimpleNamespace(
+        seat_class="Economy", seat_number=None, passenger_name="A", passenger_age=None, passenger_gender=None,
+        airline_name="Air", flight_number="W1", route="W-X", departure_airport="W", arrival_airport="X",
+        departure_city="W City", arrival_city="X City", departure_time=when, arrival_time=when,
+        payment_required=100.0, currency="INR", ticket_number=None, issued_at=None,
+    )
+    first, later = (SimpleNamespace(status="Success", transaction_id=t, amount=100.0, paid_at=when + timedelta(hours=h))
+                    for t, h in (("T1", 0), ("T2", 1)))
+    booking = SimpleNamespace(pnr=None, booking_reference="BKG1", status="Confirmed", created_at=when,
+                              tickets=[ticket], payments=[SimpleNamespace(status="Failed"), first, later],
+                              expires_at=None)
+
+    assert booking_result(booking).tickets[0].flight_seat == "EC - "
+    assert booking_result(booking, missing_seat="TBA").tickets[0].flight_seat == "EC - TBA"
+    assert first_successful_payment(booking) is first
+    assert latest_successful_payment(booking) is later
@@ -0,0 +1,135 @@
+import threading
+import time
+import uuid
+from collections import Counter
+
+import pytest
+
+from app.config import SessionLocal
+from app.models.booking import Booking
+from app.models.seat import Seat
+from app.models.user import User
+from app.services.demand_simulator import run_demand_simulation_once
+from app.services.flight_locks import FlightLockTimeout, StripedLockManager, flight_locks
+from app.services.flight_service import cancel_booking, create_booking, create_payment
+from app.services.inventory_service import SeatContention, get_flight_inventory
+
+
+def _hold_in_thread(locks, flight_id, seconds):
+    started = threading.Event()
+
+    def run():
+        with locks.hold(flight_id):
+            started.set()
+            time.sleep(seconds)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    started.wait()
+    return thread
+
+
+def test_stripes_count_contention_and_time_out():
+    locks = StripedLockManager(stripes=4, timeout_seconds=0.05)
+    assert locks.stripe_of(3) == locks.stripe_of(7)
+    with locks.hold(3, 7, None):  # one stripe, taken once
+        pass
+    assert locks.stats()["acquisitions"] == 1
+
+    holder = _hold_in_thread(locks, 1, 0.2)
+    with pytest.raises(FlightLockTimeout) as exc:
+        with locks.hold(2, 5):  # 5 shares flight 1's stripe; 2's is released again
+            pass
+    assert isinstance(exc.value, SeatContention)  # answered with 409, like other lost races
+    assert not locks._stripes[locks.stripe_of(2)].lock.locked()
+    holder.join()
+
+    locks.timeout_seconds = 5
+    holder = _hold_in_thread(locks, 1, 0.05)
+    with locks.hold(1):
+        pass
+    holder.join()
+    stats = locks.stats()
+    assert (stats["contended"], stats["timeouts"], stats["held"]) == (1, 1, 0)
+    assert stats["wait_seconds_max"] >= 0.02 and stats["contention_rate"] > 0
+
+    locks.reset_stats()
+    disabled = StripedLockManager(stripes=4, enabled=False)
+    with disabled.hold(1), disabled.hold(1):  # no-op, so no self-deadlock
+        pass
+    assert disabled.stats()["acquisitions"] == locks.stats()["acquisitions"] == 0
+
+
+def test_concurrent_booking_cancel_and_simulator_never_oversell(db, make_flight):
+    assert flight_locks.enabled  # the test database is SQLite
+    flight = make_flight(days_ahead=2, capacity=30, economy=24, business=6)
+    tag = uuid.uuid4().hex[:6]
+    users = [User(first_name="Stress", last_name=str(i), email=f"stress-{tag}-{i}@example.com",
+                  password_hash="x") for i in range(8)]
+    db.add_all(users)
+    db.commit()
+    date = flight.departure_time.strftime("%Y-%m-%d")
+    before = flight_locks.stats()
+    outcomes = Counter()
+    errors = []
+
+    def book(user_id, worker):
+        session = SessionLocal()
+        try:
+            for n in range(20):
+                try:
+                    result = create_booking(session, user_id, flight.id, date,
+                                            [{"passenger_name": f"{worker}-{n}-{i}"} for i in range(1 + n % 2)])
+                except ValueError:
+                    outcomes["sold_out"] += 1
+                    break
+                outcomes["booked"] += 1
+                booking = result["booking"]
+                if n % 3 == 0:
+                    create_payment(session, booking.booking_reference, result["total_fare"], "UPI")
+                    session.refresh(booking)
+                    cancel_booking(session, booking.pnr)
+                    outcomes["cancelled"] += 1
+        except Exception as exc:  # surfaced below
+            errors.append(exc)
+        finally:
+            session.close()
+
+    def simulate():
+        session = SessionLocal()
+        try:
+            for _ in range(3):
+                run_demand_simulation_once(session, within_hours=72)
+        except Exception as exc:
+            errors.append(exc)
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=book, args=(u.id, i)) for i, u in enumerate(users)]
+    threads.append(threading.Thread(target=simulate))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors
+    assert outcomes["booked"] > 0 and outcomes["cancelled"] > 0
+
+    db.expire_all()
+    seats = db.query(Seat).filter(Seat.flight_id == flight.id).all()
+    active = db.query(Booking).filter(Booking.user_id.in_([u.id for u in users]),
+                                      Booking.status != "Cancelled").all()
+    held = [t.seat_id for b in active for t in b.tickets]
+    assert len(held) == len(set(held))  # no seat sold twice
+    owner = {s.id: s.booking_id for s in seats}
+    assert all(owner[t.seat_id] == b.id for b in active for t in b.tickets)
+
+    # the counters agree with the seats themselves
+    inventory = get_flight_inventory(db, flight.id)["by_class"]
+    for seat_class in ("Economy", "Business"):
+        free = sum(1 for s in seats if s.seat_class == seat_class and s.is_available)
+        assert inventory[seat_class]["available"] == free
+
+    after = flight_locks.stats()
+    assert after["acquisitions"] - before["acquisitions"] >= outcomes["booked"] + outcomes["cancelled"]
+    assert after["held"] == 0
@@ -0,0 +1,82 @@
+from datetime import timedelta
+
+import pytest
+
+from app.models.flight import Flight
+from app.services.flight_service import (
+    ensure_flight_durations, next_search_cursor, search_flights, stream_search_flights,
+)
+from conftest import days_from_now
+
+
+@pytest.fixture
+def route(make_flight):
+    """Seven flights on a fresh route with repeated prices, times and durations."""
+    origin, destination = make_flight.airports("P", "Q")
+    start = days_from_now(20) + timedelta(hours=6)
+    for i in range(7):
+        departure = start + timedelta(hours=i // 2)  # pairs share a departure time
+        make_flight(origin, destination, departure, duration=timedelta(minutes=90 + 15 * (i % 3)),
+                    base_price=4000.0 + 500 * (i % 2), aircraft=None)
+    return origin.code, destination.code
+
+
+def _walk(db, origin, destination, sort_by, page_size):
+    pages, cursor = [], None
+    while True:
+        page = search_flights(db, origin=origin, destination=destination, sort_by=sort_by,
+                              limit=page_size, cursor=cursor)
+        pages.append([f["id"] for f in page])
+        cursor = next_search_cursor(page, sort_by, page_size)
+        if not cursor:
+            return pages
+
+
+@pytest.mark.parametrize("sort_by", [None, "price", "duration"])
+def test_cursor_pages_cover_results_once_in_order(db, route, sort_by):
+    origin, destination = route
+    everything = [f["id"] for f in search_flights(db, origin=origin, destination=destination, sort_by=sort_by)]
+    assert len(everything) == 7
+
+    pages = _walk(db, origin, destination, sort_by, page_size=2)
+    assert [fid for page in pages for fid in page] == everything
+    assert [len(p) for p in pages] == [2, 2, 2, 1]
+
+
+def test_cursor_must_match_sort(db, route):
+    origin, destination = route
+    first = search_flights(db, origin=origin, destination=destination, sort_by="price", limit=2)
+    cursor = next_search_cursor(first, "price", 2)
+
+    with pytest.raises(ValueError):
+        search_flights(db, origin=origin, destination=destination, sort_by="duration", limit=2, cursor=cursor)
+    with pytest.raises(ValueError):
+        search_flights(db, origin=origin, destination=destination, limit=2, cursor="not-a-cursor")
+
+
+def test_duration_is_stored_and_filterable(db, route):
+    origin, destination = route
+    short = search_flights(db, origin=origin, destination=destination, sort_by="duration", max_duration=100)
+    assert len(short) == 3
+    assert {f["arrival_time"] - f["departure_time"] for f in short} == {timedelta(minutes=90)}
+
+    # rows written without a duration are backfilled
+    ids = [f["id"] for f in short]
+    db.query(Flight).filter(Flight.id.in_(ids)).update({"duration_minutes": None}, synchronize_session=False)
+    db.commit()
+    assert ensure_flight_durations(db) >= 3
+    assert {d for (d,) in db.query(Flight.duration_minutes).filter(Flight.id.in_(ids))} == {90}
+
+
+@pytest.mark.parametrize("sort_by", [None, "price"])
+def test_stream_matches_search_across_batches(db, route, sort_by):
+    origin, destination = route
+    everything = search_flights(db, origin=origin, destination=destination, sort_by=sort_by, tier="all")
+    streamed = list(stream_search_flights(db, origin=origin, destination=destination, sort_by=sort_by,
+                                          tier="all", batch_size=2))
+    assert streamed == everything
+
+    first = search_flights(db, origin=origin, destination=destination, sort_by=sort_by, limit=3)
+    rest = stream_search_flights(db, origin=origin, destination=destination, sort_by=sort_by,
+                                 cursor=next_search_cursor(first, sort_by, 3), batch_size=2)
+    assert [f["id"] for f in rest] == [f["id"] for f in everything[3:]]
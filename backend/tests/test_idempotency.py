@@ -0,0 +1,118 @@
+import uuid
+from datetime import datetime, timedelta
+
+import orjson
+import pytest
+from fastapi import HTTPException
+from fastapi.responses import ORJSONResponse
+
+from app.models.booking import Booking
+from app.models.idempotency_key import IdempotencyKey
+from app.services.booking_results import booking_result
+from app.services.flight_service import create_booking
+from app.services.idempotency import REPLAY_HEADER, _digest, purge_expired_keys, run_idempotent
+
+
+@pytest.fixture
+def key():
+    return uuid.uuid4().hex
+
+
+class _Handler:
+    """Counts calls; returns `response` or raises `error`."""
+
+    def __init__(self, response=None, error=None):
+        self.calls = 0
+        self.response = response if response is not None else ORJSONResponse({"ok": True}, status_code=201)
+        self.error = error
+
+    def __call__(self):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return self.response
+
+
+def test_replay_returns_first_booking_response(db, key, make_flight, user):
+    flight = make_flight(days_ahead=9)
+
+    def book():
+        result = create_booking(db, user.id, flight.id, flight.departure_time.strftime("%Y-%m-%d"),
+                                [{"passenger_name": "A"}])
+        return ORJSONResponse(booking_result(result["booking"], total_fare=result["total_fare"]), status_code=201)
+
+    body = b'{"flight_number": "R1"}'
+    first = run_idempotent(db, "booking", key, user.id, body, book)
+    replay = run_idempotent(db, "booking", key, user.id, body, book)
+
+    assert (replay.status_code, replay.body) == (first.status_code, first.body)
+    assert replay.headers[REPLAY_HEADER] == "true" and REPLAY_HEADER not in first.headers
+    assert db.query(Booking).filter(Booking.user_id == user.id).count() == 1
+
+    # the same key with another body is refused
+    with pytest.raises(HTTPException) as exc:
+        run_idempotent(db, "booking", key, user.id, b'{"flight_number": "R2"}', book)
+    assert exc.value.status_code == 422
+    # keys are scoped per endpoint and per caller
+    assert run_idempotent(db, "payment", key, user.id, body, _Handler()).status_code == 201
+    other = _Handler()
+    assert REPLAY_HEADER not in run_idempotent(db, "booking", key, user.id + 1, body, other).headers
+    assert other.calls == 1
+
+
+def test_concurrent_duplicate_is_refused_without_running(db, key):
+    inner = _Handler()
+
+    def outer():
+        # a retry arriving while the first request is still running
+        with pytest.raises(HTTPException) as exc:
+            run_idempotent(db, "payment", key, None, b"{}", inner)
+        assert exc.value.status_code == 409
+        return ORJSONResponse({"paid": True}, status_code=201)
+
+    assert orjson.loads(run_idempotent(db, "payment", key, None, b"{}", outer).body) == {"paid": True}
+    assert inner.calls == 0
+
+
+def test_client_errors_are_stored_and_crashes_release_the_key(db, key):
+    rejected = _Handler(error=HTTPException(status_code=400, detail="booking not found"))
+    with pytest.raises(HTTPException):
+        run_idempotent(db, "payment", key, None, b"{}", rejected)
+    replay = run_idempotent(db, "payment", key, None, b"{}", rejected)
+    assert (replay.status_code, orjson.loads(replay.body)) == (400, {"detail": "booking not found"})
+    assert rejected.calls == 1
+
+    other = uuid.uuid4().hex
+    with pytest.raises(RuntimeError):
+        run_idempotent(db, "payment", other, None, b"{}", _Handler(error=RuntimeError("db down")))
+    retry = _Handler()
+    assert run_idempotent(db, "payment", other, None, b"{}", retry).status_code == 201
+    assert retry.calls == 1
+
+    # "try again" refusals aren't kept either: the retry runs for real
+    busy = uuid.uuid4().hex
+    for code in (409, 503):
+        with pytest.raises(HTTPException):
+            run_idempotent(db, "booking", busy, 1, b"{}", _Handler(error=HTTPException(status_code=code)))
+    assert run_idempotent(db, "booking", busy, 1, b"{}", _Handler()).status_code == 201
+
+
+def test_expired_and_abandoned_keys_can_be_reused(db, key):
+    run_idempotent(db, "booking", key, 1, b"{}", _Handler())
+    row = db.get(IdempotencyKey, _digest("booking", "1", key))
+    row.expires_at = datetime.utcnow() - timedelta(seconds=1)
+    db.commit()
+    again = _Handler()
+    assert REPLAY_HEADER not in run_idempotent(db, "booking", key, 1, b"{}", again).headers
+    assert again.calls == 1
+
+    # a request that died mid-way leaves an unfinished row behind
+    stale = datetime.utcnow() - timedelta(minutes=5)
+    abandoned = uuid.uuid4().hex
+    db.add(IdempotencyKey(key_hash=_digest("payment", "", abandoned), request_hash="x", created_at=stale,
+                          expires_at=stale + timedelta(hours=1)))
+    db.commit()
+    assert run_idempotent(db, "payment", abandoned, None, b"{}", _Handler()).status_code == 201
+
+    assert purge_expired_keys(db, now=datetime.utcnow() + timedelta(days=2)) >= 2
+    assert db.query(IdempotencyKey).count() == 0
@@ -17,3 +17,33 @@ def test_price_increases_when_near_full():
     price_more_available = compute_dynamic_price(1000.0, dep, total_seats=100, booked_seats=10, demand_level=DemandLevel.MEDIUM, tier="ECONOMY", now=now)
     price_near_full = compute_dynamic_price(1000.0, dep, total_seats=100, booked_seats=95, demand_level=DemandLevel.MEDIUM, tier="ECONOMY", now=now)
     assert price_near_full >= price_more_available
+
+
+def test_batch_prices_match_scalar_function():
+    from app.services.pricing_engine import compute_dynamic_prices
+
+    now = datetime.now(timezone.utc)
+    rows = []
+    for hours in (1, 47.99, 48, 100, 168, 500, 720, 721, 2000):
+        for total, booked in ((0, 0), (10, 0), (10, 3), (10, 6), (10, 8), (180, 179), (180, 180)):
+            for level in ("low", "MEDIUM", "high", DemandLevel.EXTREME, "unknown"):
+                for tier in ("ECONOMY", "economy_flex", "BUSINESS", "FIRST", "other"):
+                    dep = now + timedelta(hours=hours)
+                    rows.append((4999.99, dep.replace(tzinfo=None) if hours > 100 else dep, total, booked, level, tier))
+
+    expected = [compute_dynamic_price(*row, now=now) for row in rows]
+    base, deps, totals, booked, levels, tiers = zip(*rows)
+    assert compute_dynamic_prices(base, deps, totals, booked, levels, tiers, now=now) == expected
+
+
+def test_batch_prices_broadcast_single_tier_and_validate():
+    from app.services.pricing_engine import compute_dynamic_prices
+
+    now = datetime.now(timezone.utc)
+    deps = [now + timedelta(days=d) for d in (1, 10, 40)]
+    prices = compute_dynamic_prices([1000.0] * 3, deps, [100] * 3, [50] * 3, "high", "BUSINESS", now=now)
+    assert prices == [compute_dynamic_price(1000.0, d, 100, 50, "high", "BUSINESS", now=now) for d in deps]
+    assert compute_dynamic_prices([], [], [], []) == []
+
+    with pytest.raises(ValueError):
+        compute_dynamic_prices([1000.0], deps[:1], [10], [11], now=now)
@@ -0,0 +1,53 @@
+import uuid
+
+import pytest
+
+from app.models.aircraft import Aircraft
+from app.models.airline import Airline
+from app.models.airport import Airport
+from app.services.reference_data import ReferenceData
+
+
+@pytest.fixture
+def rows(db):
+    tag = uuid.uuid4().hex[:5].upper()
+    airport = Airport(code=f"R{tag}", name=f"Reference Intl {tag}", city="Ref City", country="India")
+    airline = Airline(name=f"Reference Air {tag}", code=tag)
+    aircraft = Aircraft(model=f"Ref-{tag}", capacity=10, economy_count=10)
+    db.add_all([airport, airline, aircraft])
+    db.commit()
+    return airport, airline, aircraft
+
+
+def test_lookups_by_code_name_and_model(db, rows):
+    airport, airline, aircraft = rows
+    ref = ReferenceData()
+
+    assert ref.airport(db, airport.code.lower()).id == airport.id
+    assert ref.airport_id(db, airport.name) == airport.id
+    assert ref.airport_by_id(db, airport.id).code == airport.code
+    assert ref.airline(db, airline.code.lower()).name == airline.name
+    assert ref.airline(db, airline.name).id == airline.id
+    assert ref.aircraft(db, aircraft.model).id == aircraft.id
+    assert ref.airport(db, "NOPE-" + airport.code) is None
+    assert ref.loads == 1
+
+
+def test_new_rows_resolve_without_invalidation_and_edits_after_it(db, rows):
+    airport, _, _ = rows
+    ref = ReferenceData()
+    ref.load(db)
+
+    tag = uuid.uuid4().hex[:5].upper()
+    created = Airport(code=f"S{tag}", name="Created Later", city="Later", country="India")
+    db.add(created)
+    db.commit()
+    assert ref.airport_id(db, created.code) == created.id  # miss falls through to the database
+
+    old_code = airport.code
+    airport.code = f"T{tag}"
+    db.commit()
+    assert ref.airport_id(db, old_code) == airport.id  # cached until invalidated
+    ref.invalidate()
+    assert ref.airport_id(db, old_code) is None
+    assert ref.airport_id(db, airport.code) == airport.id
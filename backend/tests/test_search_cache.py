@@ -0,0 +1,215 @@
+import os
+import pickle
+import sqlite3
+import stat
+import tempfile
+import threading
+import time
+from datetime import date, datetime
+
+import pytest
+
+from app.utils.cache import CacheLoader, LRUCache, SQLiteCache, create_cache
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now the oldest
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_memory_cap_bounds_cache():
+    cache = LRUCache(max_entries=1000, max_bytes=20_000, ttl_seconds=60)
+    for i in range(200):
+        cache.set(f"k{i}", [{"id": i, "name": "x" * 50}])
+
+    stats = cache.stats()
+    assert stats["bytes"] <= 20_000
+    assert stats["entries"] < 200
+    assert stats["evictions"] > 0
+
+
+def test_entries_expire_after_ttl():
+    cache = LRUCache(ttl_seconds=0.05)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    time.sleep(0.06)
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_tag_invalidation_drops_only_tagged_entries():
+    cache = LRUCache(ttl_seconds=60)
+    cache.set("DEL|BOM", [1, 2], tags=["flight:1", "flight:2"])
+    cache.set("DEL|BLR", [3], tags=["flight:3"])
+
+    assert cache.invalidate_tags(["flight:2"]) == 1
+    assert cache.get("DEL|BOM") is None
+    assert cache.get("DEL|BLR") == [3]
+
+
+def test_hit_and_miss_counters():
+    cache = LRUCache(ttl_seconds=60)
+    cache.get("missing")
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("a")
+
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+
+
+def test_sqlite_cache_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    worker_a = SQLiteCache(path, namespace="search", ttl_seconds=60)
+    worker_b = SQLiteCache(path, namespace="search", ttl_seconds=60)
+
+    value = [{"id": 1, "departure_time": datetime(2026, 1, 15, 9, 30), "current_price": 4999.5}]
+    worker_a.set("DEL|BOM", value, tags=["flight:1"])
+    assert worker_b.get("DEL|BOM") == value
+
+    # invalidation from one worker is visible to the other
+    assert worker_b.invalidate_tags(["flight:1"]) == 1
+    assert worker_a.get("DEL|BOM") is None
+
+
+def test_sqlite_cache_is_private_and_never_unpickles(tmp_path, monkeypatch):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = SQLiteCache(path)
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    cache.set("day", {"date": date(2026, 1, 15), "pair": (1, 2)})
+    assert cache.get("day") == {"date": date(2026, 1, 15), "pair": [1, 2]}
+
+    # a planted pickle is dropped, not loaded
+    conn = sqlite3.connect(path)
+    conn.execute("UPDATE cache_entries SET value = ? WHERE key = 'day'", (pickle.dumps(Exception("boom")),))
+    conn.commit()
+    conn.close()
+    assert cache.get("day") is None
+
+    monkeypatch.setattr(tempfile, "gettempdir", lambda: str(tmp_path))
+    monkeypatch.delenv("CACHE_SQLITE_PATH", raising=False)
+    default = create_cache("sqlite").path
+    assert stat.S_IMODE(os.stat(os.path.dirname(default)).st_mode) == 0o700
+
+
+def test_sqlite_cache_namespaces_are_isolated(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    search = SQLiteCache(path, namespace="search")
+    other = SQLiteCache(path, namespace="other")
+    search.set("k", 1)
+    assert other.get("k") is None
+    other.clear()
+    assert search.get("k") == 1
+
+
+def test_sqlite_cache_evicts_least_recently_used(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    time.sleep(0.01)
+    cache.set("b", 2)
+    time.sleep(0.01)
+    cache.set("c", 3)
+
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_sqlite_cache_expires_entries(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=0.05)
+    cache.set("a", 1)
+    time.sleep(0.06)
+    assert cache.get("a") is None
+
+
+def test_create_cache_selects_backend(tmp_path, monkeypatch):
+    monkeypatch.setenv("CACHE_SQLITE_PATH", str(tmp_path / "cache.sqlite3"))
+    assert isinstance(create_cache("memory"), LRUCache)
+    assert isinstance(create_cache("sqlite"), SQLiteCache)
+
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    assert isinstance(create_cache("auto"), SQLiteCache)
+    monkeypatch.setenv("WEB_CONCURRENCY", "1")
+    assert isinstance(create_cache("auto"), LRUCache)
+
+    with pytest.raises(ValueError):
+        create_cache("memcached")
+
+
+def test_loader_coalesces_concurrent_misses():
+    loader = CacheLoader(LRUCache(ttl_seconds=60))
+    calls = []
+    release = threading.Event()
+
+    def compute():
+        calls.append(1)
+        release.wait(2)
+        return ["result"], ["flight:1"]
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(loader.get_or_compute("DEL|BOM", compute))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == [["result"]] * 8
+    assert loader.stats()["coalesced"] == 7
+
+
+def test_loader_serves_stale_while_refreshing():
+    loader = CacheLoader(LRUCache(ttl_seconds=0.05, stale_seconds=5))
+    version = {"n": 0}
+    refreshed = threading.Event()
+
+    def compute():
+        version["n"] += 1
+        return version["n"], ["route:DEL:BOM"]
+
+    def refresh():
+        value = compute()
+        refreshed.set()
+        return value
+
+    assert loader.get_or_compute("k", compute, refresh=refresh) == 1
+    time.sleep(0.06)
+
+    # expired: the stale value comes back immediately and one refresh runs
+    assert loader.get_or_compute("k", compute, refresh=refresh) == 1
+    assert refreshed.wait(2)
+    time.sleep(0.05)
+    assert loader.get_or_compute("k", compute, refresh=refresh) == 2
+    assert loader.stats()["refreshes"] == 1
+
+
+def test_loader_does_not_cache_when_tags_are_none():
+    loader = CacheLoader(LRUCache(ttl_seconds=60))
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return [], None
+
+    loader.get_or_compute("empty", compute)
+    loader.get_or_compute("empty", compute)
+    assert len(calls) == 2
+
+
+def test_invalidated_entries_are_not_served_stale():
+    cache = LRUCache(ttl_seconds=60, stale_seconds=60)
+    cache.set("k", 1, tags=["flight:1"])
+    cache.invalidate_tags(["flight:1"])
+    assert cache.get_stale("k") is None
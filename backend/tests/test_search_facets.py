@@ -0,0 +1,78 @@
+from datetime import timedelta
+
+import pytest
+
+from app.models.seat_inventory import FlightSeatInventory
+from app.services.flight_service import search_facets, search_flights
+from app.services.search_facets import Candidate, facet_counts, price_buckets
+from conftest import days_from_now
+
+
+@pytest.fixture
+def route(db, make_flight):
+    """Two airlines on a fresh route: departures at 05:00, 09:00, 14:00 and 20:00."""
+    first, second = make_flight.airline("Facet One"), make_flight.airline("Facet Two")
+    origin, destination = make_flight.airports("M", "N")
+    day = days_from_now(15)
+    flights = [make_flight(origin, destination, day + timedelta(hours=hour), airline=airline,
+                           base_price=3000.0 + 1000 * i)
+               for i, (hour, airline) in enumerate([(5, first), (9, first), (14, second), (20, second)])]
+    # no business seats left on the 09:00 flight
+    db.query(FlightSeatInventory).filter(
+        FlightSeatInventory.flight_id == flights[1].id, FlightSeatInventory.seat_class == "Business",
+    ).update({"available_seats": 0})
+    db.commit()
+    return {"origin": origin.code, "destination": destination.code, "date": day.strftime("%Y-%m-%d"),
+            "airlines": (first.code, second.code), "flights": flights}
+
+
+def _ids(results):
+    return [f["id"] for f in results]
+
+
+def test_facet_filters_narrow_search(db, route):
+    base = dict(origin=route["origin"], destination=route["destination"], date=route["date"])
+    flights = route["flights"]
+    first, second = route["airlines"]
+
+    assert _ids(search_flights(db, **base, airlines=[first])) == [flights[0].id, flights[1].id]
+    assert _ids(search_flights(db, **base, times_of_day=["morning", "evening"])) == [flights[1].id, flights[3].id]
+    assert _ids(search_flights(db, origin=base["origin"], destination=base["destination"],
+                               times_of_day=["afternoon"])) == [flights[2].id]  # no date: hour extraction
+    assert _ids(search_flights(db, **base, airlines=[first], available_classes=["BUSINESS"])) == [flights[0].id]
+    assert search_flights(db, **base, airlines=["NOPE9"]) == []
+    with pytest.raises(ValueError):
+        search_flights(db, **base, times_of_day=["midnight"])
+
+
+def test_facets_count_other_selections_only(db, route):
+    first, second = route["airlines"]
+    facets = search_facets(db, origin=route["origin"], destination=route["destination"], date=route["date"],
+                           airlines=[first], available_classes=["BUSINESS"])
+
+    assert facets["total"] == 1
+    # airline counts ignore the airline selection but keep the class one
+    assert {a["value"]: a["count"] for a in facets["airlines"]} == {first: 1, second: 2}
+    assert {t["value"]: t["count"] for t in facets["time_of_day"]} == {
+        "early_morning": 1, "morning": 0, "afternoon": 0, "evening": 0,
+    }
+    # class counts ignore the class selection but keep the airline one
+    assert {c["value"]: c["count"] for c in facets["seat_classes"]} == {"ECONOMY": 2, "BUSINESS": 1, "FIRST": 0}
+    assert sum(p["count"] for p in facets["price_ranges"]) == 1
+
+
+def test_facet_counts_single_pass_semantics():
+    candidates = [
+        Candidate(1, "morning", 3100.0, frozenset({"ECONOMY"})),
+        Candidate(1, "evening", 5400.0, frozenset({"ECONOMY", "BUSINESS"})),
+        Candidate(2, "morning", 9900.0, frozenset()),
+    ]
+    counts = facet_counts(candidates, times_of_day={"morning"}, max_price=6000)
+    assert counts["total"] == 1
+    assert counts["airlines"] == {1: 1}
+    assert counts["time_of_day"]["evening"] == 1  # its own selection doesn't apply
+    assert [(low, high, n) for low, high, n in counts["price_ranges"]] == [
+        (2000, 4000, 1), (4000, 6000, 0), (6000, 8000, 0), (8000, 10000, 1),
+    ]
+    assert facet_counts(candidates, airline_ids=set())["total"] == 0
+    assert price_buckets([]) == []
@@ -0,0 +1,59 @@
+import uuid
+
+import pytest
+
+from app.config import SessionLocal
+from app.models.booking import Booking
+from app.models.seat import Seat
+from app.services.flight_service import create_booking
+from app.services.inventory_service import claim_seats, get_flight_inventory
+
+
+@pytest.fixture
+def flight(make_flight):
+    return make_flight(days_ahead=14)
+
+
+def _booking(db, user) -> Booking:
+    booking = Booking(user_id=user.id, booking_reference="BKG" + uuid.uuid4().hex[:12].upper())
+    db.add(booking)
+    db.flush()
+    return booking
+
+
+def test_bookings_get_disjoint_seats_without_flight_lock(db, flight, user):
+    date = flight.departure_time.strftime("%Y-%m-%d")
+    first = create_booking(db, user.id, flight.id, date, [{"passenger_name": "A"}, {"passenger_name": "B"}])
+    second = create_booking(db, user.id, flight.id, date, [{"passenger_name": "C"}, {"passenger_name": "D"}])
+
+    seats = {b["booking"].id: {t.seat_id for t in b["booking"].tickets} for b in (first, second)}
+    assert all(len(s) == 2 for s in seats.values())
+    assert not set.intersection(*seats.values())
+    assert get_flight_inventory(db, flight.id)["by_class"]["Economy"]["available"] == 0
+
+    with pytest.raises(ValueError, match="Not enough Economy class seats available. Requested: 1, Available: 0"):
+        create_booking(db, user.id, flight.id, date, [{"passenger_name": "E"}])
+    assert db.query(Booking).filter(Booking.user_id == user.id).count() == 2  # failed booking rolled back
+
+
+def test_claim_skips_seats_taken_concurrently(db, flight, user):
+    # another session takes a seat after this one could have seen it free
+    free = [s.id for s in db.query(Seat).filter(Seat.flight_id == flight.id, Seat.seat_class == "Economy")
+            .order_by(Seat.id)]
+    other = SessionLocal()
+    try:
+        claim_seats(other, flight.id, _booking(other, user).id, seat_ids=[free[0]])
+        other.commit()
+    finally:
+        other.close()
+
+    booking = _booking(db, user)
+    with pytest.raises(ValueError, match="not available"):
+        claim_seats(db, flight.id, booking.id, seat_ids=[free[1], free[0]])
+    db.rollback()
+
+    booking = _booking(db, user)
+    claimed = claim_seats(db, flight.id, booking.id, seat_ids=[free[2], free[1]])
+    assert [s.id for s in claimed] == [free[2], free[1]]  # in the order asked for
+    assert [s.id for s in claim_seats(db, flight.id, booking.id, count=1, seat_class="Economy")] == [free[3]]
+    db.rollback()
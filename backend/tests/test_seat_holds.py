@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.seat import Seat
+from app.services.flight_service import (
+    SEAT_HOLD_MINUTES, create_booking, create_payment, release_expired_holds,
+)
+from app.services.inventory_service import get_flight_inventory
+
+
+@pytest.fixture
+def flight(make_flight):
+    return make_flight(days_ahead=12)
+
+
+def _book(db, flight, user, *names):
+    return create_booking(db, user.id, flight.id, flight.departure_time.strftime("%Y-%m-%d"),
+                          [{"passenger_name": n} for n in names])
+
+
+def _economy_available(db, flight):
+    return get_flight_inventory(db, flight.id)["by_class"]["Economy"]["available"]
+
+
+def test_reaper_releases_expired_holds_only(db, flight, user):
+    expired = _book(db, flight, user, "A", "B")
+    fresh = _book(db, flight, user, "C")
+    booking = expired["booking"]
+    assert fresh["booking"].expires_at > datetime.utcnow() + timedelta(minutes=SEAT_HOLD_MINUTES - 1)
+    booking.expires_at = datetime.utcnow() - timedelta(seconds=1)
+    db.commit()
+    assert _economy_available(db, flight) == 1
+
+    assert release_expired_holds(db) >= 1
+    db.expire_all()
+    assert booking.status == "Cancelled"
+    assert fresh["booking"].status == "Payment Pending"
+    seats = db.query(Seat).filter(Seat.id.in_([t.seat_id for t in booking.tickets])).all()
+    assert all(s.is_available and s.booking_id is None for s in seats)
+    assert _economy_available(db, flight) == 3
+
+    with pytest.raises(ValueError, match="cancelled"):
+        create_payment(db, booking.booking_reference, expired["total_fare"], "UPI")
+
+
+def test_payment_refuses_expired_hold_and_ends_live_one(db, flight, user):
+    late = _book(db, flight, user, "A")
+    late["booking"].expires_at = datetime.utcnow() - timedelta(seconds=1)
+    db.commit()
+    with pytest.raises(ValueError, match="seat hold expired"):
+        create_payment(db, late["booking"].booking_reference, late["total_fare"], "UPI")
+
+    paid = _book(db, flight, user, "B")
+    payment = create_payment(db, paid["booking"].booking_reference, paid["total_fare"], "UPI")
+    assert payment.status == "Success"
+    db.refresh(paid["booking"])
+    assert paid["booking"].status == "Confirmed" and paid["booking"].expires_at is None
+    assert paid["booking"].pnr and all(t.ticket_number for t in paid["booking"].tickets)
+    with pytest.raises(ValueError, match="already paid"):
+        create_payment(db, paid["booking"].booking_reference, paid["total_fare"], "UPI")
+
+    # a confirmed booking keeps its seat however late the reaper runs
+    release_expired_holds(db, now=datetime.utcnow() + timedelta(days=1))
+    db.expire_all()
+    assert paid["booking"].status == "Confirmed"
+    assert late["booking"].status == "Cancelled"
+
+
+def test_reaper_batches_and_expires_bookings_without_deadline(db, flight, user):
+    stale = datetime.utcnow() - timedelta(minutes=SEAT_HOLD_MINUTES + 1)
+    bookings = [_book(db, flight, user, name)["booking"] for name in "ABC"]
+    for booking in bookings:
+        booking.expires_at = None
+        booking.created_at = stale
+    db.commit()
+    assert _economy_available(db, flight) == 1
+
+    assert release_expired_holds(db, batch_size=2) >= 3
+    db.expire_all()
+    assert [b.status for b in bookings] == ["Cancelled"] * 3
+    assert _economy_available(db, flight) == 4
@@ -0,0 +1,71 @@
+import pytest
+
+from app.models.seat import Seat
+from app.models.seat_inventory import FlightSeatInventory
+from app.services.flight_service import (
+    _search_flights_uncached, cancel_booking, create_booking, create_payment,
+)
+from app.services.inventory_service import get_flight_inventory, rebuild_seat_inventory
+from scripts.rebuild_seat_inventory import find_drift
+
+
+@pytest.fixture
+def flight(make_flight):
+    return make_flight(capacity=12, economy=8, business=4, base_price=5000.0)
+
+
+def _counters(db, flight_id):
+    db.expire_all()
+    return {
+        c.seat_class: (c.total_seats, c.available_seats)
+        for c in db.query(FlightSeatInventory).filter(FlightSeatInventory.flight_id == flight_id)
+    }
+
+
+def test_create_flight_builds_counters(db, flight):
+    assert _counters(db, flight.id) == {"Economy": (8, 8), "Business": (4, 4)}
+    stats = get_flight_inventory(db, flight.id)
+    assert stats["total"] == 12
+    assert stats["available"] == 12
+
+
+def test_booking_and_cancel_keep_counters_in_step(db, flight, user):
+    passengers = [{"passenger_name": "A"}, {"passenger_name": "B"}]
+    result = create_booking(db, user.id, flight.id, flight.departure_time.strftime("%Y-%m-%d"), passengers, seat_class="BUSINESS")
+    assert _counters(db, flight.id)["Business"] == (4, 2)
+
+    booking = result["booking"]
+    create_payment(db, booking.booking_reference, result["total_fare"], "UPI")
+    cancel_booking(db, booking.pnr)
+    assert _counters(db, flight.id)["Business"] == (4, 4)
+
+    # cancelling twice must not release seats twice
+    cancel_booking(db, booking.pnr)
+    assert _counters(db, flight.id)["Business"] == (4, 4)
+    assert find_drift(db, [flight.id]) == []
+
+
+def test_rebuild_repairs_drift(db, flight):
+    seat = db.query(Seat).filter(Seat.flight_id == flight.id, Seat.seat_class == "Economy").first()
+    seat.is_available = False
+    db.commit()
+
+    assert find_drift(db, [flight.id]) == [(flight.id, "Economy", 8, 7)]
+    rebuild_seat_inventory(db, [flight.id])
+    assert _counters(db, flight.id)["Economy"] == (8, 7)
+    assert find_drift(db, [flight.id]) == []
+
+
+def test_missing_counters_fall_back_to_seats(db, flight):
+    db.query(FlightSeatInventory).filter(FlightSeatInventory.flight_id == flight.id).delete()
+    db.commit()
+
+    stats = get_flight_inventory(db, flight.id)
+    assert stats["total"] == 12
+    assert stats["by_class"]["Business"] == {"total": 4, "available": 4}
+
+    [result] = _search_flights_uncached(
+        db, origin=flight.departure_airport.code, destination=flight.arrival_airport.code,
+    )
+    assert result["seats_left"] == 12
+    assert result["seats_by_class"]["BUSINESS"] == 4
@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.flight_service import get_search_cache_stats
+from app.services.trip_service import _combine, search_trip
+from conftest import days_from_now
+
+
+@pytest.fixture
+def trip(make_flight):
+    """A->B on day 0 (08:00, 15:00), B->C on day 0 (11:00, 18:00), B->A on day 3 (10:00)."""
+    a, b, c = make_flight.airports("U", "V", "W")
+    day = days_from_now(30)
+    flights = {}
+    for name, origin, destination, days, hour, fare in [
+        ("ab_morning", a, b, 0, 8, 5000.0), ("ab_afternoon", a, b, 0, 15, 3000.0),
+        ("bc_midday", b, c, 0, 11, 2000.0), ("bc_evening", b, c, 0, 18, 2500.0),
+        ("ba", b, a, 3, 10, 4000.0),
+    ]:
+        flights[name] = make_flight(origin, destination, day + timedelta(days=days, hours=hour), base_price=fare)
+    dates = [(day + timedelta(days=d)).strftime("%Y-%m-%d") for d in (0, 3)]
+    return {"a": a.code, "b": b.code, "c": c.code, "dates": dates, "flights": flights}
+
+
+def test_multi_city_respects_connection_times(trip):
+    f = trip["flights"]
+    legs = [dict(origin=trip["a"], destination=trip["b"], date=trip["dates"][0]),
+            dict(origin=trip["b"], destination=trip["c"], date=trip["dates"][0])]
+    itineraries = search_trip(legs, min_connection_minutes=60)
+
+    # the afternoon A->B lands at 17:00, too late for the 11:00 onward flight
+    assert [[leg["id"] for leg in i["legs"]] for i in itineraries] == [
+        [f["ab_afternoon"].id, f["bc_evening"].id],
+        [f["ab_morning"].id, f["bc_midday"].id],
+        [f["ab_morning"].id, f["bc_evening"].id],
+    ]
+    first = itineraries[0]
+    assert first["total_price"] == round(sum(leg["current_price"] for leg in first["legs"]), 2)
+    assert first["total_duration_minutes"] == 240
+
+    longer = search_trip(legs, min_connection_minutes=2 * 60)
+    assert [[leg["id"] for leg in i["legs"]] for i in longer] == [[f["ab_morning"].id, f["bc_evening"].id]]
+    assert len(search_trip(legs, limit=1)) == 1
+
+
+def test_round_trip_reuses_cached_legs(trip):
+    outbound = dict(origin=trip["a"], destination=trip["b"], date=trip["dates"][0])
+    inbound = dict(origin=trip["b"], destination=trip["a"], date=trip["dates"][1])
+    assert len(search_trip([outbound, inbound])) == 2
+
+    hits = get_search_cache_stats()["hits"]
+    again = search_trip([outbound, inbound], limit=1)
+    assert get_search_cache_stats()["hits"] == hits + 2
+    assert again[0]["legs"][1]["id"] == trip["flights"]["ba"].id
+
+    assert search_trip([outbound, dict(origin=trip["c"], destination=trip["a"], date=trip["dates"][1])]) == []
+    with pytest.raises(ValueError):
+        search_trip([dict(origin=trip["a"], destination=trip["a"], date=trip["dates"][0])])
+
+
+def test_combine_keeps_partials_that_can_still_connect():
+    day = datetime(2030, 1, 1)
+
+    def flight(id, hour, fare):
+        departure = day + timedelta(hours=hour)
+        return {"id": id, "departure_time": departure, "arrival_time": departure + timedelta(hours=1),
+                "current_price": fare, "seats_left": 3}
+
+    first = [flight(1, 6, 100.0)]
+    # ten cheap second legs land too late for the third leg; only the dear one connects
+    second = [flight(10 + i, 12, 50.0) for i in range(10)] + [flight(99, 8, 900.0)]
+    third = [flight(200, 11, 100.0)]
+
+    itineraries = _combine([first, second, third], "price", 1, timedelta(minutes=60))
+    assert [[leg["id"] for leg in i["legs"]] for i in itineraries] == [[1, 99, 200]]
+    assert itineraries[0]["total_price"] == 1100.0